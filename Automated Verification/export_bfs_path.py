@@ -1,58 +1,86 @@
 """
 Export BFS optimal path to JSON format for automated TAS playback
+
+Format version 2 stores purchase events only, the same [count, 'buy', building, time_ms] entries main()
+embeds in its verification page. Clicks (every 20ms) and waits are implicit. Version 1 files (no
+format_version, one ['click'|'wait'|'buy', value, time_ms] entry per action) are still read by
+create_standalone.py and can be rewritten with `python create_standalone.py OLD.json --convert NEW.json`.
 """
 import json
-from main import CookieClickerOptimizer
+
+FORMAT_VERSION = 2
+
+
+def write_event_path_json(f, header, events):
+    """
+    Write header fields, then 'path' with one event per line, then the event/purchase totals.
+    events is any iterable of (count, building, time_ms), so paths can be streamed straight through.
+    """
+    f.write('{\n  "format_version": ' + json.dumps(FORMAT_VERSION))
+    for key, value in header.items():
+        if key not in ('format_version', 'path', 'total_actions', 'total_purchases'):
+            f.write(',\n  ' + json.dumps(key) + ': ' + json.dumps(value))
+    f.write(',\n  "path": [')
+    total_actions = 0
+    total_purchases = 0
+    for count, building, time_ms in events:
+        f.write((',\n    ' if total_actions else '\n    ') + json.dumps([count, 'buy', building, time_ms]))
+        total_actions += 1
+        total_purchases += count
+    f.write('\n  ],\n  "total_actions": ' + json.dumps(total_actions))
+    f.write(',\n  "total_purchases": ' + json.dumps(total_purchases) + '\n}\n')
+    return total_actions, total_purchases
+
 
 def export_path_to_json(goal_cookies, output_file='bfs_path.json'):
     """Run BFS optimizer and export path to JSON file"""
+    from main import CookieClickerOptimizer, build_verification_payload
+
     print(f"Running BFS optimizer for {goal_cookies} cookies...")
     optimizer = CookieClickerOptimizer()
     result = optimizer.bfs_optimize(goal_cookies)
-    
+
     if result is None:
         print("No solution found!")
         return None
-    
+
     path, total_time_ms = result
-    
-    # Convert path to JSON-serializable format
-    json_path = []
-    for action in path:
-        action_type, action_value, action_time_ms = action
-        json_path.append([action_type, action_value, action_time_ms])
-    
-    # Create output data
+
+    # Purchase events, identical purchases at the same millisecond run-length encoded
+    json_path, _ = build_verification_payload(path)
+
     output_data = {
+        'format_version': FORMAT_VERSION,
         'goal_cookies': goal_cookies,
         'total_time_ms': total_time_ms,
-        'total_actions': len(path),
+        'total_actions': len(json_path),
+        'total_purchases': len(path),
         'path': json_path
     }
-    
+
     # Write to file
     with open(output_file, 'w') as f:
-        json.dump(output_data, f, indent=2)
-    
+        write_event_path_json(f, output_data, ((count, building, t) for count, _, building, t in json_path))
+
     print(f"\nPath exported to {output_file}")
     print(f"Total time: {total_time_ms}ms ({total_time_ms/1000:.3f} seconds)")
-    print(f"Total actions: {len(path)}")
-    
+    print(f"Total actions: {len(json_path)} events ({len(path)} purchases)")
+
     # Also print the path array for easy copy-paste
     print("\n" + "="*60)
     print("Copy the following JSON array to load into TAS Controller:")
     print("="*60)
     print(json.dumps(json_path))
     print("="*60)
-    
+
     return output_data
 
 if __name__ == "__main__":
     import sys
-    
+
     if len(sys.argv) > 1:
         goal = float(sys.argv[1])
     else:
         goal = float(input("Enter target cookie count (default 100): ") or "100")
-    
+
     export_path_to_json(goal)
@@ -0,0 +1,218 @@
+"""
+Non-interactive batch solver: runs bfs_optimize for many goals across a process pool and writes one
+JSON result per goal. No browser, no HTML unless --html is given.
+
+Usage:
+    python batch_solve.py GOAL [GOAL ...] [options]
+    python batch_solve.py --range 1000:20000:1000 [options]
+    python batch_solve.py --file goals.txt [options]       # one goal per line, '#' comments allowed
+    python batch_solve.py 10000 --from EXPORT.json --at-ms 60000   # re-plan from a checkpoint
+
+Options:
+    --workers N        worker processes (default: CPU count)
+    --out FILE         JSONL output (default: stdout)
+    --export json,bfsx write exports to bfs_data_exports/
+    --html DIR         write a verification page per goal into DIR
+    --beam-width N     BeamPolicy width (default 50)
+    --option-policy P  purchase quantities offered: all (default), bulk or reachable
+    --pareto           keep non-dominated (baked, bank, cps) layers first when truncating buckets
+    --front-times T,.. export the bucket Pareto fronts at these times (ms) to bfs_data_exports/
+    --max-time-ms T    give up on goals not reachable within T ms
+    --from FILE        start from a GameState snapshot JSON or a bfs_data_exports checkpoint
+    --at-ms T          with an export: last purchase at or before T ms (default: last purchase)
+    --event N          with an export: purchase number N (negative counts from the end)
+"""
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import redirect_stdout
+from typing import List, Optional
+
+try:
+    import resource
+except ImportError:  # not on Windows: peak_rss_kb is then reported as None
+    resource = None
+
+from main import (BeamPolicy, CookieClickerOptimizer, _generate_verification_html, _new_export_path, cli_option,
+                  collect_solution_outputs, export_pareto_fronts, load_snapshot)
+
+
+def parse_goal_range(spec: str) -> List[float]:
+    """'start:stop:step' (stop inclusive) -> goals."""
+    parts = [float(p) for p in spec.split(':')]
+    if len(parts) != 3 or parts[2] <= 0:
+        raise ValueError(f"range must be start:stop:step with step > 0, got {spec!r}")
+    start, stop, step = parts
+    count = int((stop - start) / step + 1e-9) + 1
+    return [start + i * step for i in range(count)]
+
+
+def read_goal_file(filename: str) -> List[float]:
+    goals = []
+    with open(filename, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.split('#', 1)[0].strip()
+            goals.extend(float(g) for g in line.replace(',', ' ').split())
+    return goals
+
+
+def peak_rss_kb() -> Optional[int]:
+    """Peak resident set size of this process in KB (ru_maxrss is in bytes on macOS), or None without resource."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+def single_task_pool(max_workers: int) -> ProcessPoolExecutor:
+    """
+    Process pool that retires each worker after one task, so peak_rss_kb reflects that task alone.
+    Python before 3.11 cannot retire workers; the pool then reuses them and a worker's peak carries over.
+    """
+    if sys.version_info >= (3, 11):
+        return ProcessPoolExecutor(max_workers=max_workers, max_tasks_per_child=1)
+    return ProcessPoolExecutor(max_workers=max_workers)
+
+
+def solve_goal(goal: float, beam_width: int = 50, max_time_ms: Optional[int] = None,
+               exports: tuple = (), html_dir: Optional[str] = None, start: Optional[dict] = None,
+               pareto: bool = False, front_times: tuple = (), option_policy: str = 'all') -> dict:
+    """
+    Solve one goal quietly and return its JSONL record. Meant to run in a fresh worker process, so
+    peak_rss_kb is the peak of this search alone plus the interpreter baseline.
+    start is a GameState.to_snapshot() dict to search from instead of a fresh game.
+    """
+    optimizer = CookieClickerOptimizer()
+    initial_state = optimizer.state_from_snapshot(start) if start is not None else None
+    started = time.perf_counter()
+    with redirect_stdout(io.StringIO()):
+        policy = BeamPolicy(width=beam_width, pareto=pareto, front_times=front_times)
+        result = optimizer.bfs_optimize(goal, max_time_ms=max_time_ms, beam_policy=policy, initial_state=initial_state,
+                                        option_policy=option_policy)
+    wall_s = time.perf_counter() - started
+    stats = optimizer.last_search_stats or {}
+    record = {
+        'goal': goal,
+        'start_time_ms': initial_state.time_ms if initial_state is not None else 0,
+        'found': result is not None,
+        'option_policy': option_policy,
+        'total_time_ms': None,
+        'purchases': None,
+        'cookies_baked': None,
+        'buildings': None,
+        'wall_s': round(wall_s, 4),
+        'states_expanded': stats.get('states_expanded'),
+        'depth': stats.get('depth'),
+        'peak_rss_kb': peak_rss_kb(),
+        'pid': os.getpid(),
+    }
+    if front_times:
+        record['pareto_fronts'] = export_pareto_fronts(stats['pareto_fronts'], goal)
+    if result is None:
+        return record
+
+    path, total_time_ms = result
+    trace = optimizer.last_solution
+    final_state = trace.final_state
+    record.update(
+        total_time_ms=total_time_ms,
+        purchases=len(path),
+        cookies_baked=final_state.cookies_baked,
+        buildings={b: n for b, n in final_state.buildings.items() if n > 0},
+    )
+
+    if 'json' in exports or html_dir:
+        viz_data, json_path, predicted, _ = collect_solution_outputs(trace, goal, optimizer)
+        if 'json' in exports:
+            export_path = _new_export_path(goal, 'json')
+            with open(export_path, 'w', encoding='utf-8') as f:
+                json.dump(viz_data, f, indent=2)
+            record['export_json'] = str(export_path)
+        if html_dir:
+            os.makedirs(html_dir, exist_ok=True)
+            html_path = os.path.join(html_dir, f'verification_{goal:g}.html')
+            with redirect_stdout(io.StringIO()):
+                _generate_verification_html(html_path, goal, total_time_ms, json_path, predicted, optimizer.buildings,
+                                            ruleset=optimizer.ruleset)
+            record['html'] = html_path
+    if 'bfsx' in exports:
+        from bfs_export_format import export_bfs_path_to_binary
+        record['export_bfsx'] = export_bfs_path_to_binary(path, goal, total_time_ms, optimizer)
+    return record
+
+
+def main(argv: List[str]) -> int:
+    argv = list(argv)
+    if not argv or argv[0] in ('-h', '--help'):
+        print(__doc__)
+        return 2
+    workers = int(cli_option(argv, '--workers', os.cpu_count() or 1))
+    out_file = cli_option(argv, '--out')
+    exports = tuple(e for e in cli_option(argv, '--export', '').split(',') if e)
+    html_dir = cli_option(argv, '--html')
+    beam_width = int(cli_option(argv, '--beam-width', 50))
+    option_policy = cli_option(argv, '--option-policy', 'all')
+    max_time_ms = cli_option(argv, '--max-time-ms')
+    max_time_ms = int(float(max_time_ms)) if max_time_ms is not None else None
+    goal_range = cli_option(argv, '--range')
+    goal_file = cli_option(argv, '--file')
+    start_file = cli_option(argv, '--from')
+    at_ms = cli_option(argv, '--at-ms')
+    event = cli_option(argv, '--event')
+    front_times = tuple(int(float(t)) for t in cli_option(argv, '--front-times', '').split(',') if t)
+    pareto = '--pareto' in argv
+    if pareto:
+        argv.remove('--pareto')
+
+    goals = [float(g) for g in argv]
+    if goal_range:
+        goals += parse_goal_range(goal_range)
+    if goal_file:
+        goals += read_goal_file(goal_file)
+    if not goals:
+        print("No goals given.", file=sys.stderr)
+        return 2
+    unknown = set(exports) - {'json', 'bfsx'}
+    if unknown:
+        print(f"Unknown export format(s): {', '.join(sorted(unknown))}", file=sys.stderr)
+        return 2
+    if option_policy not in ('all', 'bulk', 'reachable'):
+        print(f"Unknown option policy: {option_policy}", file=sys.stderr)
+        return 2
+
+    start = None
+    if start_file:
+        start = load_snapshot(start_file, CookieClickerOptimizer(), at_ms=int(float(at_ms)) if at_ms else None,
+                              event=int(event) if event else None).to_snapshot()
+        print(f"Starting from {start_file} at {start['time_ms']}ms "
+              f"({start['cookies_baked']:,.1f} baked, {sum(start['buildings'].values())} buildings)", file=sys.stderr)
+
+    out = open(out_file, 'w', encoding='utf-8') if out_file else sys.stdout
+    started = time.perf_counter()
+    solved = 0
+    try:
+        with single_task_pool(min(workers, len(goals))) as pool:
+            futures = {pool.submit(solve_goal, goal, beam_width, max_time_ms, exports, html_dir, start,
+                                   pareto, front_times, option_policy): goal
+                       for goal in goals}
+            for future in as_completed(futures):
+                try:
+                    record = future.result()
+                except Exception as e:
+                    record = {'goal': futures[future], 'found': False, 'error': f"{type(e).__name__}: {e}"}
+                solved += bool(record.get('found'))
+                out.write(json.dumps(record) + '\n')
+                out.flush()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print(f"Solved {solved}/{len(goals)} goals in {time.perf_counter() - started:.2f}s "
+          f"with {min(workers, len(goals))} workers", file=sys.stderr)
+    return 0 if solved == len(goals) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,531 @@
+"""
+Performance benchmarks for the optimizer and its exports.
+
+Usage:
+    python benchmarks.py export-format [EXPORT.json ...] [--goals 1000,10000] [--synthetic-minutes 60]
+    python benchmarks.py export-pass [--goals 1000,10000,30000] [--synthetic-minutes 60]
+    python benchmarks.py resume-ladder [--goals 500,1000,2000,4000,8000] [--beam-width 50]
+    python benchmarks.py large-goals [--goals 1e12,1e14,1e16,1e18] [--depth 8] [--lead 1e4]
+    python benchmarks.py afford-cache [--goals 1e4,1e5,1e6,1e7] [--depth 400] [--lead 1e3]
+    python benchmarks.py fused-advance [--goals 1000,3000,10000]
+    python benchmarks.py skip-cursor [--goals 1000,3000,10000]
+    python benchmarks.py exact [--goals 1000,3000,10000,30000] [--max-nodes 100000]
+    python benchmarks.py label-setting [--goals 1000,3000,10000,30000] [--beam-width 50]
+    python benchmarks.py duplicate-merge [--goals 1000,3000,10000,30000] [--beam-width 50] [--bank 1]
+    python benchmarks.py option-policy [--goals 3000,1e4,2e4] [--bank 1]
+    python benchmarks.py trajectory [--synthetic-minutes 60]
+    python benchmarks.py truncation-audit [--goals 1000,3000,10000] [--beam-width 1] [--wide-width 50]
+"""
+import glob
+import io
+import json
+import math
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+from typing import List
+
+from batch_solve import peak_rss_kb
+from main import (BeamPolicy, CookieClickerOptimizer, PathStep, SearchContext, SolutionTrace, build_visualization_data,
+                  build_verification_payload, cli_option, collect_solution_outputs, compress_path)
+
+
+def _timed(fn, repeat: int = 3) -> float:
+    """Best wall time of fn() over repeat runs, in seconds."""
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def _parse_goals(argv: List[str], default: str) -> List[float]:
+    return [float(g) for g in cli_option(argv, '--goals', default).split(',') if g]
+
+
+def _solve_quietly(optimizer: CookieClickerOptimizer, goal: float, **kwargs):
+    with redirect_stdout(io.StringIO()):
+        return optimizer.bfs_optimize(goal, **kwargs)
+
+
+def _greedy_path(optimizer: CookieClickerOptimizer, minutes: float, step_ms: int = 100) -> tuple:
+    """
+    A long, valid purchase path without running the search: every step_ms buy the cheapest buildings
+    while affordable. Used to benchmark exports at sizes the BFS cannot reach quickly.
+    Returns (path, total_time_ms, cookies_baked, SolutionTrace).
+    """
+    state = optimizer.fresh_state()
+    path = []
+    step = None
+    end_ms = int(minutes * 60000)
+    while state.time_ms < end_ms:
+        state = optimizer.advance_time(state, state.time_ms, state.time_ms + step_ms)
+        while True:
+            cost, bname = min((optimizer.get_building_cost(b, state.buildings.get(b, 0)), b) for b in optimizer.buildings)
+            if cost > state.cookies:
+                break
+            step = PathStep.extend(step, bname, 1, state.time_ms, state)
+            state = optimizer.purchase_building(state, bname)
+            path.append(('buy', bname, state.time_ms))
+    return path, state.time_ms, state.cookies_baked, SolutionTrace(step, state.time_ms, state)
+
+
+def bench_export_format(argv: List[str]):
+    """Size and load/write speed of the .bfsx format against timeline_paths JSON exports."""
+    from bfs_export_format import BFSBinaryReader, convert_from_json, write_path
+    from replay_verifier import check_checkpoints
+
+    optimizer = CookieClickerOptimizer()
+    files = [a for a in argv if a.endswith('.json')]
+    workdir = tempfile.mkdtemp(prefix='bfsx_bench_')
+    if not files:
+        files = sorted(glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bfs_data_exports', '*.json')))
+    if not files:
+        for goal in _parse_goals(argv, '1000,10000'):
+            result = _solve_quietly(optimizer, goal)
+            if result is None:
+                continue
+            path, total_time_ms = result
+            json_file = os.path.join(workdir, f'bfs_{int(goal)}.json')
+            with open(json_file, 'w', encoding='utf-8') as f:
+                json.dump(build_visualization_data(path, goal, total_time_ms, optimizer), f, indent=2)
+            files.append(json_file)
+        minutes = float(cli_option(argv, '--synthetic-minutes', 0))
+        if minutes:
+            path, total_time_ms, baked, _ = _greedy_path(optimizer, minutes)
+            json_file = os.path.join(workdir, f'greedy_{minutes:g}min.json')
+            with open(json_file, 'w', encoding='utf-8') as f:
+                json.dump(build_visualization_data(path, baked, total_time_ms, optimizer), f, indent=2)
+            files.append(json_file)
+
+    print(f"{'file':<32} {'purchases':>9} {'json KB':>9} {'bfsx KB':>9} {'+cp KB':>9} "
+          f"{'json load ms':>12} {'bfsx load ms':>12} {'ratio':>7}")
+    checked = []
+    for json_file in files:
+        with open(json_file, 'r', encoding='utf-8') as f:
+            viz_data = json.load(f)
+        n_purchases = len(viz_data['paths'][0]['events'])
+        bfsx_file = os.path.join(workdir, os.path.basename(json_file) + '.bfsx')
+        bfsx_cp_file = os.path.join(workdir, os.path.basename(json_file) + '.cp.bfsx')
+        convert_from_json(json_file, bfsx_file, optimizer)
+        convert_from_json(json_file, bfsx_cp_file, optimizer, checkpoint_every=100)
+
+        def load_json():
+            with open(json_file, 'r', encoding='utf-8') as f:
+                json.load(f)
+
+        def load_bfsx():
+            with open(bfsx_cp_file, 'rb') as f:
+                BFSBinaryReader(f).read_path()
+
+        json_load = _timed(load_json)
+        bfsx_load = _timed(load_bfsx)
+        print(f"{os.path.basename(json_file)[:32]:<32} {n_purchases:>9} {os.path.getsize(json_file) / 1024:>9.1f} "
+              f"{os.path.getsize(bfsx_file) / 1024:>9.2f} {os.path.getsize(bfsx_cp_file) / 1024:>9.2f} "
+              f"{json_load * 1000:>12.2f} {bfsx_load * 1000:>12.2f} "
+              f"{os.path.getsize(json_file) / os.path.getsize(bfsx_file):>6.0f}x")
+        checked.append(bfsx_cp_file)
+
+    # Same-time purchases of one building share a run; checkpoints inside it must keep their own index
+    same_time_file = os.path.join(workdir, 'same_time_run.bfsx')
+    with open(same_time_file, 'wb') as f:
+        write_path(f, [('buy', 'cursor', 10000)] * 5, 1000, 20000, optimizer, checkpoint_every=2)
+    checked.append(same_time_file)
+    failures = [f"{os.path.basename(name)}: {failure}" for name in checked
+                for failure in check_checkpoints(name, optimizer)]
+    print(f"checkpoints: {len(checked)} file(s), {len(failures)} difference(s) from replay")
+    if failures:
+        print('\n'.join(f"    {failure}" for failure in failures))
+        sys.exit(1)
+
+
+def bench_export_pass(argv: List[str]):
+    """
+    Post-search cost of main()'s outputs: re-simulating the path for the export plus two more walks
+    (RLE payload, console summary) against the single pass over the search's SolutionTrace.
+    """
+    optimizer = CookieClickerOptimizer()
+    runs = []
+    for goal in _parse_goals(argv, '1000,10000,30000'):
+        started = time.perf_counter()
+        result = _solve_quietly(optimizer, goal)
+        search_s = time.perf_counter() - started
+        if result is not None:
+            runs.append((f'goal {goal:g}', goal, result[0], result[1], optimizer.last_solution, search_s))
+    minutes = float(cli_option(argv, '--synthetic-minutes', 0))
+    if minutes:
+        path, total_time_ms, baked, trace = _greedy_path(optimizer, minutes)
+        runs.append((f'greedy {minutes:g}min', baked, path, total_time_ms, trace, float('nan')))
+
+    def old_outputs(goal, path, total_time_ms):
+        build_visualization_data(path, goal, total_time_ms, optimizer)
+        build_verification_payload(path)
+        owned = {}
+        for group in compress_path(path):
+            owned[group['building']] = owned.get(group['building'], 0) + 1
+            optimizer.get_building_cost(group['building'], owned[group['building']] - 1)
+
+    print(f"{'run':<18} {'purchases':>9} {'search s':>9} {'before ms':>10} {'after ms':>9} {'speedup':>8}")
+    for label, goal, path, total_time_ms, trace, search_s in runs:
+        before = _timed(lambda: old_outputs(goal, path, total_time_ms))
+        after = _timed(lambda: collect_solution_outputs(trace, goal, optimizer))
+        print(f"{label:<18} {len(path):>9} {search_s:>9.2f} {before * 1000:>10.2f} {after * 1000:>9.2f} {before / after:>7.0f}x")
+
+
+def bench_resume_ladder(argv: List[str]):
+    """
+    Goal ladder solved cold each time against one resumed SearchContext. Fails (exit 1) unless every
+    resumed result, path included, and its cumulative states_expanded equal the cold search's.
+    """
+    width = int(cli_option(argv, '--beam-width', 50))
+    optimizer = CookieClickerOptimizer()
+    context = SearchContext()
+    cold_total = resumed_total = 0.0
+    mismatches = 0
+    print(f"{'goal':>10} {'time ms':>9} {'same':>5} {'cold exp':>9} {'ctx exp':>8} {'cold s':>7} {'resume s':>9}")
+    for goal in _parse_goals(argv, '500,1000,2000,4000,8000'):
+        started = time.perf_counter()
+        cold = _solve_quietly(optimizer, goal, beam_policy=BeamPolicy(width=width))
+        cold_s = time.perf_counter() - started
+        cold_expanded = optimizer.last_search_stats['states_expanded']
+        started = time.perf_counter()
+        resumed = _solve_quietly(optimizer, goal, beam_policy=BeamPolicy(width=width), context=context)
+        resumed_s = time.perf_counter() - started
+        same = resumed == cold and optimizer.last_search_stats['states_expanded'] == cold_expanded
+        mismatches += not same
+        cold_total += cold_s
+        resumed_total += resumed_s
+        print(f"{goal:>10g} {cold[1] if cold else '-':>9} {'yes' if same else 'NO':>5} {cold_expanded:>9} "
+              f"{optimizer.last_search_stats['states_expanded']:>8} {cold_s:>7.2f} {resumed_s:>9.2f}")
+    print(f"ladder total: cold {cold_total:.2f}s, resumed {resumed_total:.2f}s "
+          f"({context.searches} fresh, {context.resumes} resumed)")
+    if mismatches:
+        print(f"{mismatches} resumed result(s) differ from the cold search")
+        sys.exit(1)
+
+
+def _formula_max_qty(optimizer: CookieClickerOptimizer, building_name: str, start_count: int, goal: float) -> int:
+    """max_affordable_qty_by_goal as it was before price tables: the price formula per unit."""
+    building = optimizer.buildings[building_name]
+    total = qty = 0
+    while True:
+        price = math.ceil(building.base_cost * (optimizer.price_increase ** (start_count + qty)))
+        if total + price > goal:
+            return qty
+        total += price
+        qty += 1
+
+
+def _midgame_start(optimizer: CookieClickerOptimizer, goal: float, lead: float) -> tuple:
+    """(owned, state): every building owned until its next price reaches goal/lead."""
+    owned = {}
+    for bname, building in optimizer.buildings.items():
+        if building.base_cost < goal / lead:
+            owned[bname] = math.floor(math.log(goal / lead / building.base_cost, optimizer.price_increase)) + 1
+    return owned, optimizer.state_from_snapshot({'cookies': 0, 'cookies_baked': 0, 'buildings': owned})
+
+
+def bench_large_goals(argv: List[str]):
+    """
+    Search throughput at goals of 1e12 and up, started mid-game: every building is owned until its next
+    price reaches goal/lead. Also times the per-expansion option bounds (max_affordable_qty_by_goal for
+    every building) against the per-unit formula, and fails (exit 1) if any table price differs from it.
+    """
+    depth = int(cli_option(argv, '--depth', 8))
+    lead = float(cli_option(argv, '--lead', 1e4))
+    optimizer = CookieClickerOptimizer()
+    mismatches = sum(optimizer.get_building_cost(b, n) != math.ceil(building.base_cost * optimizer.price_increase ** n)
+                     for b, building in optimizer.buildings.items() for n in range(1000))
+    print(f"{'goal':>8} {'owned':>6} {'cps':>9} {'options':>8} {'table us':>9} {'formula us':>10} "
+          f"{'expanded':>9} {'search s':>9} {'exp/s':>7}")
+    for goal in _parse_goals(argv, '1e12,1e14,1e16,1e18'):
+        owned, start = _midgame_start(optimizer, goal, lead)
+        options = sum(optimizer.max_affordable_qty_by_goal(b, owned.get(b, 0), goal) for b in optimizer.buildings)
+        table = _timed(lambda: [optimizer.max_affordable_qty_by_goal(b, owned.get(b, 0), goal)
+                                for b in optimizer.buildings], repeat=20)
+        formula = _timed(lambda: [_formula_max_qty(optimizer, b, owned.get(b, 0), goal)
+                                  for b in optimizer.buildings], repeat=20)
+        started = time.perf_counter()
+        _solve_quietly(optimizer, goal, initial_state=start, max_depth=depth)
+        search_s = time.perf_counter() - started
+        expanded = optimizer.last_search_stats['states_expanded']
+        print(f"{goal:>8.0e} {sum(owned.values()):>6} {start.cps:>9.3g} {options:>8} {table * 1e6:>9.1f} "
+              f"{formula * 1e6:>10.1f} {expanded:>9} {search_s:>9.2f} {expanded / search_s:>7.1f}")
+    if mismatches:
+        print(f"{mismatches} table price(s) differ from the formula")
+        sys.exit(1)
+
+
+def bench_afford_cache(argv: List[str]):
+    """
+    Search wall time with the time-to-afford cache against the bare next_event kernel, with the cache's
+    hit rate. Each goal starts mid-game as in large-goals (from zero while goal/lead is below the cheapest
+    price) and stops after --depth levels. Fails (exit 1) if a search result differs between the two.
+    """
+    depth = int(cli_option(argv, '--depth', 400))
+    lead = float(cli_option(argv, '--lead', 1e3))
+    mismatches = 0
+    print(f"{'goal':>8} {'owned':>6} {'expanded':>9} {'kernel s':>9} {'cached s':>9} {'speedup':>8} "
+          f"{'lookups':>8} {'hit rate':>9} {'fallbacks':>9}")
+    for goal in _parse_goals(argv, '1e4,1e5,1e6,1e7'):
+        results, times = [], []
+        for cached in (False, True):
+            optimizer = CookieClickerOptimizer()
+            if not cached:
+                optimizer.afford_cache = None
+            owned, start = _midgame_start(optimizer, goal, lead)
+            started = time.perf_counter()
+            result = _solve_quietly(optimizer, goal, initial_state=start, max_depth=depth)
+            times.append(time.perf_counter() - started)
+            results.append((result, optimizer.last_search_stats['states_expanded']))
+        stats = optimizer.last_search_stats['afford_cache']
+        mismatches += results[0] != results[1]
+        print(f"{goal:>8.0e} {sum(owned.values()):>6} {results[1][1]:>9} {times[0]:>9.2f} {times[1]:>9.2f} "
+              f"{times[0] / times[1]:>7.2f}x {stats['lookups']:>8} {stats['hit_rate']:>9.1%} {stats['fallbacks']:>9}")
+    if mismatches:
+        print(f"{mismatches} search result(s) differ with the cache")
+        sys.exit(1)
+
+
+def bench_fused_advance(argv: List[str]):
+    """
+    Search wall time with expansion states built from the first-event walk, against the same search with
+    check_fused_advance also walking every gap with advance_time (what each expansion used to cost). The
+    checked run raises AssertionError on the first state that differs.
+    """
+    print(f"{'goal':>8} {'expanded':>9} {'fused s':>8} {'checked s':>10} {'saved':>6}")
+    for goal in _parse_goals(argv, '1000,3000,10000'):
+        times = []
+        for check in (False, True):
+            optimizer = CookieClickerOptimizer()
+            optimizer.check_fused_advance = check
+            times.append(_timed(lambda: _solve_quietly(optimizer, goal), repeat=1))
+        print(f"{goal:>8g} {optimizer.last_search_stats['states_expanded']:>9} {times[0]:>8.2f} {times[1]:>10.2f} "
+              f"{1 - times[0] / times[1]:>6.0%}")
+
+
+def _skip_cursor_run(goal: float, resume: bool) -> tuple:
+    """One search with skip_cursors on or off: (result, seconds, afford_cache report, states expanded, peak RSS KB)."""
+    optimizer = CookieClickerOptimizer()
+    optimizer.skip_cursors = resume
+    started = time.perf_counter()
+    result = _solve_quietly(optimizer, goal)
+    elapsed = time.perf_counter() - started
+    stats = optimizer.last_search_stats
+    return result, elapsed, stats['afford_cache'], stats['states_expanded'], peak_rss_kb()
+
+
+def bench_skip_cursor(argv: List[str]):
+    """
+    Events the time-to-afford walks step one at a time and additions they sum, per expanded state, wall time
+    and peak RSS, with skip children resuming their parent's walk and options (skip_cursors) and with every
+    walk started afresh. Each search runs in its own process so peak RSS is that search's peak ('-' on Windows).
+    Fails (exit 1) if a search result differs between the two.
+    """
+    mismatches = 0
+    print(f"{'goal':>8} {'expanded':>9} {'resumed':>8} {'stepped':>15} {'summed':>17} {'fresh s':>8} {'resumed s':>10} "
+          f"{'fresh MB':>9} {'resumed MB':>11}")
+    for goal in _parse_goals(argv, '1000,3000,10000'):
+        runs = []
+        for resume in (False, True):
+            with ProcessPoolExecutor(max_workers=1) as pool:
+                runs.append(pool.submit(_skip_cursor_run, goal, resume).result())
+        results, times, reports, expanded, peaks = zip(*runs)
+        peaks = [f"{peak / 1024:.0f}" if peak is not None else '-' for peak in peaks]
+        stepped = [report['stepped'] / expanded[1] for report in reports]
+        summed = [report['summed'] / expanded[1] for report in reports]
+        mismatches += results[0] != results[1]
+        print(f"{goal:>8g} {expanded[1]:>9} {reports[1]['resumed']:>8} {stepped[0]:>6.2f} -> {stepped[1]:>5.2f} "
+              f"{summed[0]:>7.0f} -> {summed[1]:>6.0f} {times[0]:>8.2f} {times[1]:>10.2f} "
+              f"{peaks[0]:>9} {peaks[1]:>11}")
+    if mismatches:
+        print(f"{mismatches} search result(s) differ with skip cursors")
+        sys.exit(1)
+
+
+def bench_exact(argv: List[str]):
+    """
+    Exact branch-and-bound (exact_search.py) after the beam search it starts from: whether each goal is
+    proven optimal within --max-nodes expansions, the lower bound reached when it is not, and the nodes
+    pruned per rule.
+    """
+    from exact_search import ExactSearch
+    max_nodes = int(cli_option(argv, '--max-nodes', 100000))
+    print(f"{'goal':>8} {'beam ms':>9} {'beam s':>7} {'status':>10} {'exact ms':>9} {'lower ms':>9} "
+          f"{'expanded':>9} {'bound':>7} {'dominance':>9} {'duplicate':>9} {'exact s':>8}")
+    for goal in _parse_goals(argv, '1000,3000,10000,30000'):
+        optimizer = CookieClickerOptimizer()
+        started = time.perf_counter()
+        incumbent = _solve_quietly(optimizer, goal)
+        beam_s = time.perf_counter() - started
+        search = ExactSearch(optimizer, goal, max_nodes=max_nodes)
+        started = time.perf_counter()
+        certificate = search.run(incumbent)
+        exact_s = time.perf_counter() - started
+        pruned = certificate['pruned']
+        print(f"{goal:>8g} {incumbent[1]:>9} {beam_s:>7.2f} {certificate['status']:>10} {certificate['time_ms']:>9} "
+              f"{certificate['bounds']['lower_bound_ms']:>9} {search.expanded:>9} {pruned['bound']:>7} "
+              f"{pruned['dominance']:>9} {pruned['duplicate']:>9} {exact_s:>8.2f}")
+
+
+def bench_label_setting(argv: List[str]):
+    """
+    Label-setting search over building-count vectors (label_search.py) against bfs_optimize: the same
+    purchase tree (--bfs-tree, equal to the beam's time wherever the beam is wide enough) and the full one,
+    where a building passed over can still be bought later.
+    """
+    from label_search import LabelSearch
+    beam_width = int(cli_option(argv, '--beam-width', 50))
+    print(f"{'goal':>8} {'bfs ms':>9} {'states':>7} {'bfs s':>7} {'tree ms':>9} {'labels':>7} {'tree s':>7} "
+          f"{'free ms':>9} {'labels':>7} {'dominated':>9} {'free s':>7}")
+    differing = 0
+    for goal in _parse_goals(argv, '1000,3000,10000,30000'):
+        optimizer = CookieClickerOptimizer()
+        started = time.perf_counter()
+        beam = _solve_quietly(optimizer, goal, beam_policy=BeamPolicy(width=beam_width))
+        bfs_s = time.perf_counter() - started
+        row = [beam[1], optimizer.last_search_stats['states_expanded'], bfs_s]
+        for bfs_tree in (True, False):
+            search = LabelSearch(CookieClickerOptimizer(), goal, bfs_tree=bfs_tree)
+            started = time.perf_counter()
+            result = search.run()
+            elapsed = time.perf_counter() - started
+            row.extend([result[1], search.expanded] + ([] if bfs_tree else [search.dominated + search.superseded])
+                       + [elapsed])
+        differing += row[3] != row[0]
+        print(f"{goal:>8g} {row[0]:>9} {row[1]:>7} {row[2]:>7.2f} {row[3]:>9} {row[4]:>7} {row[5]:>7.2f} "
+              f"{row[6]:>9} {row[7]:>7} {row[8]:>9} {row[9]:>7.2f}")
+    if differing:
+        print(f"{differing} goal(s) where the beam missed its own tree's optimum; try a wider --beam-width")
+
+
+def bench_duplicate_merge(argv: List[str]):
+    """
+    Frontier buckets merging equivalent children as they are queued (BeamPolicy.merge_duplicates) against
+    buckets that keep every child until the beam is cut: duplicate rates, beam slots lost to duplicates and
+    the solution found at the same --beam-width, from the fresh game (cold) and from a --bank start (banked,
+    as in option-policy). Cold searches rarely meet the same state twice; banked ones, with several units
+    affordable at once, reach it through different purchase orders.
+    """
+    width = int(cli_option(argv, '--beam-width', 50))
+    bank = float(cli_option(argv, '--bank', 1.0))
+    print(f"{'goal':>8} {'start':>7} {'pushed':>8} {'merged':>7} {'worst':>6} {'merged ms':>10} {'s':>6} "
+          f"{'dup slots':>9} {'worst':>6} {'kept ms':>9} {'s':>6}")
+    for goal in _parse_goals(argv, '1000,3000,10000,30000'):
+        for start_kind in ('cold', 'banked'):
+            row = []
+            for merge in (True, False):
+                optimizer = CookieClickerOptimizer()
+                start = None if start_kind == 'cold' else _banked_start(optimizer, goal, bank)
+                started = time.perf_counter()
+                result = _solve_quietly(optimizer, goal, beam_policy=BeamPolicy(width=width, merge_duplicates=merge),
+                                        initial_state=start)
+                beam = optimizer.last_search_stats['beam']
+                row.append((beam, result[1] if result else None, time.perf_counter() - started))
+            (merged, merged_ms, merged_s), (kept, kept_ms, kept_s) = row
+            print(f"{goal:>8g} {start_kind:>7} {merged['children_pushed']:>8} {merged['duplicates_merged']:>7} "
+                  f"{merged['max_bucket_duplicate_rate']:>6.1%} {merged_ms:>10} {merged_s:>6.2f} "
+                  f"{kept['duplicate_slots']:>9} {kept['max_bucket_duplicate_rate']:>6.1%} {kept_ms:>9} "
+                  f"{kept_s:>6.2f}")
+
+
+def _banked_start(optimizer: CookieClickerOptimizer, goal: float, bank: float):
+    """A mid-game start with bank cookies per 10 goal cookies, 5 cursors and 3 grandmas."""
+    return optimizer.state_from_snapshot({'cookies': goal * bank / 10, 'cookies_baked': goal * bank / 10,
+                                          'buildings': {'cursor': 5, 'grandma': 3}})
+
+
+def bench_option_policy(argv: List[str]):
+    """
+    Purchase options per event, expansions, search time and result for each optimizer.option_policy, from the
+    fresh game (cold) and from a start with --bank cookies per 10 goal cookies and a few cursors and grandmas,
+    so several units can be affordable at once (banked). Search times are the best of three runs.
+    """
+    bank = float(cli_option(argv, '--bank', 1.0))
+    print(f"{'goal':>8} {'start':>7} {'policy':>10} {'time ms':>9} {'events':>7} {'options':>8} {'expanded':>9} "
+          f"{'search s':>9}")
+    for goal in _parse_goals(argv, '3000,1e4,2e4'):
+        for start_kind in ('cold', 'banked'):
+            for option_policy in ('all', 'bulk', 'reachable'):
+                optimizer = CookieClickerOptimizer()
+                start = None if start_kind == 'cold' else _banked_start(optimizer, goal, bank)
+                results = []
+                search_s = _timed(lambda: results.append(
+                    _solve_quietly(optimizer, goal, initial_state=start, option_policy=option_policy)))
+                result = results[-1]
+                beam = optimizer.last_search_stats['beam']
+                print(f"{goal:>8g} {start_kind:>7} {option_policy:>10} {result[1] if result else '-':>9} "
+                      f"{beam['afford_events']:>7} {beam['options'] / max(beam['afford_events'], 1):>8.2f} "
+                      f"{optimizer.last_search_stats['states_expanded']:>9} {search_s:>9.2f}")
+
+
+def bench_trajectory(argv: List[str]):
+    """
+    Closed-form trajectory sampling (trajectory.py) of a synthetic --synthetic-minutes path at each resolution,
+    against stepping the same samples with advance_time. Fails (exit 1) if they differ by more than 1e-9
+    of cookies baked.
+    """
+    from trajectory import max_difference, sample_path, stepped_trajectory
+    minutes = float(cli_option(argv, '--synthetic-minutes', 60))
+    optimizer = CookieClickerOptimizer()
+    path, total_time_ms, _, _ = _greedy_path(optimizer, minutes)
+    print(f"{len(path)} purchases over {total_time_ms}ms")
+    print(f"{'resolution':>10} {'samples':>8} {'closed ms':>10} {'stepped ms':>11} {'max diff':>13}")
+    worst = 0.0
+    for resolution in ('frame', '100ms', '1s'):
+        closed = _timed(lambda: sample_path(optimizer, path, total_time_ms, resolution))
+        samples = sample_path(optimizer, path, total_time_ms, resolution)
+        started = time.perf_counter()
+        stepped = stepped_trajectory(optimizer, path, samples.time_ms)
+        stepped_s = time.perf_counter() - started
+        diff = max_difference(samples, stepped)
+        worst = max(worst, diff)
+        print(f"{resolution:>10} {len(samples):>8} {closed * 1000:>10.1f} {stepped_s * 1000:>11.1f} {diff:>13.3g}")
+    if worst > 1e-9:
+        sys.exit(1)
+
+
+def bench_truncation_audit(argv: List[str]):
+    """
+    How often beam truncation cut the line to a better incumbent (optimizer.audit_truncation): each goal is
+    searched at --beam-width and at --wide-width, and the wider incumbent's purchase history is looked up
+    among the states the narrow search dropped.
+    """
+    width = int(cli_option(argv, '--beam-width', 1))
+    wide_width = int(cli_option(argv, '--wide-width', 50))
+    print(f"{'goal':>8} {'width':>6} {'time ms':>9} {'wide ms':>9} {'dropped':>8} {'cut':>4} {'first cut ms':>12}")
+    for goal in _parse_goals(argv, '1000,3000,10000'):
+        optimizer = CookieClickerOptimizer()
+        with redirect_stdout(io.StringIO()):
+            audit = optimizer.audit_truncation(goal, BeamPolicy(width=width), wide_width)
+        cuts = audit['lineage_cut_ms']
+        print(f"{goal:>8g} {width:>6} {audit['time_ms']:>9} {audit['wide_time_ms']:>9} {audit['dropped_states']:>8} "
+              f"{'yes' if cuts else 'no':>4} {cuts[0] if cuts else '-':>12}")
+
+
+BENCHMARKS = {
+    'export-format': bench_export_format,
+    'export-pass': bench_export_pass,
+    'resume-ladder': bench_resume_ladder,
+    'large-goals': bench_large_goals,
+    'afford-cache': bench_afford_cache,
+    'fused-advance': bench_fused_advance,
+    'skip-cursor': bench_skip_cursor,
+    'exact': bench_exact,
+    'label-setting': bench_label_setting,
+    'duplicate-merge': bench_duplicate_merge,
+    'option-policy': bench_option_policy,
+    'trajectory': bench_trajectory,
+    'truncation-audit': bench_truncation_audit,
+}
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] not in BENCHMARKS:
+        print(__doc__)
+        sys.exit(2)
+    BENCHMARKS[sys.argv[1]](sys.argv[2:])
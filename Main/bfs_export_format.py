@@ -0,0 +1,343 @@
+"""
+Compact columnar export format for BFS paths (.bfsx).
+
+Layout (all integers little-endian):
+    b'BFSX' | u8 version | u32 header length | header JSON
+    then records, each starting with a one-byte tag:
+      b'B' block of purchase runs (columnar)
+      b'F' u32 length | final state JSON
+      b'E' end of file
+
+A block holds up to BLOCK_RUNS runs. A run is consecutive purchases of one building at one time, and a block
+stores them as three columns: time deltas (from the previous run, across blocks), building ids (indices into
+the header's building list) and run counts. Each column is written as a u8 width code plus a raw array of
+that width, so readers decode a whole column with one array.frombytes call. A block may carry sparse
+checkpoints: the run index they follow, [cookies, cookies_baked, cps, click_power, last_click_time_ms,
+last_production_frame] as float64 and a dense building-count vector. The click and frame phase (version 2;
+version 1 files, which lack it, are still read) make a checkpoint an exact search start.
+
+The writer and reader both stream: memory stays bounded by one block however long the path is. A file that
+ends before its b'E' record (for example one still being written) raises ValueError instead of reading as a
+shorter path.
+"""
+import json
+import struct
+import sys
+from array import array
+from typing import BinaryIO, Iterator, List, Optional, Tuple
+
+from main import GameState, build_visualization_data, _new_export_path
+
+MAGIC = b'BFSX'
+VERSION = 2
+CHECKPOINT_FLOATS = {1: 4, 2: 6}  # float64 fields per checkpoint, by version
+BLOCK_RUNS = 4096
+_WIDTH_TYPECODES = {1: 'B', 2: 'H', 4: 'I', 8: 'Q'}
+
+
+def _write_column(f: BinaryIO, values: List[int]):
+    """Write an unsigned column using the narrowest array width that fits."""
+    top = max(values) if values else 0
+    width = 1 if top < 1 << 8 else 2 if top < 1 << 16 else 4 if top < 1 << 32 else 8
+    column = array(_WIDTH_TYPECODES[width], values)
+    if sys.byteorder == 'big':
+        column.byteswap()
+    f.write(struct.pack('<B', width))
+    f.write(column.tobytes())
+
+
+def _read_exact(f: BinaryIO, size: int) -> bytes:
+    data = f.read(size)
+    if len(data) != size:
+        raise ValueError("Truncated BFSX file")
+    return data
+
+
+def _read_column(f: BinaryIO, n: int) -> array:
+    width = struct.unpack('<B', _read_exact(f, 1))[0]
+    if width not in _WIDTH_TYPECODES:
+        raise ValueError(f"Corrupt BFSX column width {width}")
+    column = array(_WIDTH_TYPECODES[width])
+    column.frombytes(_read_exact(f, width * n))
+    if sys.byteorder == 'big':
+        column.byteswap()
+    return column
+
+
+def _write_json_record(f: BinaryIO, obj: dict):
+    payload = json.dumps(obj, separators=(',', ':')).encode('utf-8')
+    f.write(struct.pack('<I', len(payload)))
+    f.write(payload)
+
+
+def _read_json_record(f: BinaryIO) -> dict:
+    size = struct.unpack('<I', _read_exact(f, 4))[0]
+    return json.loads(_read_exact(f, size).decode('utf-8'))
+
+
+class BFSBinaryWriter:
+    """
+    Streaming .bfsx writer. Call write_purchase for every unit purchase in path order (same-time purchases of
+    the same building are folded into one run, which a checkpoint ends), then close with the final state.
+    """
+
+    def __init__(self, f: BinaryIO, goal: float, building_names: List[str], total_time_ms: Optional[int] = None,
+                 name: Optional[str] = None, color: str = 'BLUE_C'):
+        self.f = f
+        self.building_names = list(building_names)
+        self.building_ids = {bname: i for i, bname in enumerate(self.building_names)}
+        self._times: List[int] = []
+        self._ids: List[int] = []
+        self._counts: List[int] = []
+        self._checkpoints: List[Tuple[int, GameState]] = []  # (run index in block, state after that run)
+        self._last_time = 0
+        header = {
+            'goal': goal,
+            'total_ms': total_time_ms,
+            'buildings': self.building_names,
+            'name': name,
+            'color': color,
+        }
+        f.write(MAGIC)
+        f.write(struct.pack('<B', VERSION))
+        _write_json_record(f, header)
+
+    def write_purchase(self, building: str, time_ms: int, count: int = 1, state_after: Optional[GameState] = None):
+        """Append count purchases of building at time_ms; state_after (if given) becomes a checkpoint for the run."""
+        if building not in self.building_ids:
+            raise ValueError(f"Unknown building for binary export: {building}")
+        bid = self.building_ids[building]
+        # A checkpoint stands for the state after its run's last unit, so a run that has one is not extended
+        checkpointed = bool(self._checkpoints) and self._checkpoints[-1][0] == len(self._counts) - 1
+        if self._counts and self._ids[-1] == bid and self._times[-1] == time_ms and not checkpointed:
+            self._counts[-1] += count
+        else:
+            if len(self._counts) >= BLOCK_RUNS:
+                self._flush_block()
+            self._times.append(time_ms)
+            self._ids.append(bid)
+            self._counts.append(count)
+        if state_after is not None:
+            self._checkpoints.append((len(self._counts) - 1, state_after))
+
+    def _flush_block(self):
+        if not self._counts:
+            return
+        f = self.f
+        deltas = []
+        previous = self._last_time
+        for t in self._times:
+            deltas.append(t - previous)
+            previous = t
+        self._last_time = previous
+        f.write(b'B')
+        f.write(struct.pack('<I', len(self._counts)))
+        _write_column(f, deltas)
+        _write_column(f, self._ids)
+        _write_column(f, self._counts)
+        f.write(struct.pack('<I', len(self._checkpoints)))
+        if self._checkpoints:
+            _write_column(f, [run for run, _ in self._checkpoints])
+            floats = array('d')
+            counts = []
+            for _, state in self._checkpoints:
+                floats.extend((state.cookies, state.cookies_baked, state.cps, state.click_power,
+                               state.last_click_time_ms, state.last_production_frame))
+                counts.extend(state.buildings.get(bname, 0) for bname in self.building_names)
+            if sys.byteorder == 'big':
+                floats.byteswap()
+            f.write(floats.tobytes())
+            _write_column(f, counts)
+        self._times, self._ids, self._counts, self._checkpoints = [], [], [], []
+
+    def close(self, final_state: Optional[dict] = None):
+        """Flush the last block and write the final state and end marker (the file object stays open)."""
+        self._flush_block()
+        if final_state is not None:
+            self.f.write(b'F')
+            _write_json_record(self.f, final_state)
+        self.f.write(b'E')
+
+
+class BFSBinaryReader:
+    """Streaming .bfsx reader; runs and checkpoints are decoded one block at a time."""
+
+    def __init__(self, f: BinaryIO):
+        self.f = f
+        if f.read(4) != MAGIC:
+            raise ValueError("Not a BFSX file")
+        self.version = struct.unpack('<B', _read_exact(f, 1))[0]
+        if self.version not in CHECKPOINT_FLOATS:
+            raise ValueError(f"Unsupported BFSX version {self.version}")
+        self.header = _read_json_record(f)
+        self.building_names = self.header['buildings']
+        self.final_state: Optional[dict] = None  # available once iteration has finished
+        self.checkpoints: List[dict] = []  # filled while iterating
+
+    def iter_runs(self) -> Iterator[Tuple[int, str, int]]:
+        """Yield (time_ms, building, count) runs in path order."""
+        f = self.f
+        names = self.building_names
+        n_buildings = len(names)
+        width = CHECKPOINT_FLOATS[self.version]
+        current_time = 0
+        purchases_before = 0
+        while True:
+            tag = f.read(1)
+            if tag == b'B':
+                n = struct.unpack('<I', _read_exact(f, 4))[0]
+                deltas = _read_column(f, n)
+                ids = _read_column(f, n)
+                counts = _read_column(f, n)
+                n_checkpoints = struct.unpack('<I', _read_exact(f, 4))[0]
+                checkpoint_at = {}
+                if n_checkpoints:
+                    runs = _read_column(f, n_checkpoints)
+                    floats = array('d')
+                    floats.frombytes(_read_exact(f, 8 * width * n_checkpoints))
+                    if sys.byteorder == 'big':
+                        floats.byteswap()
+                    building_counts = _read_column(f, n_checkpoints * n_buildings)
+                    for j, run in enumerate(runs):
+                        vector = building_counts[j * n_buildings:(j + 1) * n_buildings]
+                        fields = floats[width * j:width * (j + 1)]
+                        checkpoint_at[run] = {
+                            'cookies': fields[0],
+                            'cookies_baked': fields[1],
+                            'buildings': {names[b]: c for b, c in enumerate(vector) if c},
+                            'cps': fields[2],
+                            'click_power': fields[3],
+                        }
+                        if width > 4:
+                            checkpoint_at[run].update(last_click_time_ms=int(fields[4]),
+                                                      last_production_frame=int(fields[5]))
+                for i in range(n):
+                    current_time += deltas[i]
+                    purchases_before += counts[i]
+                    if i in checkpoint_at:
+                        if width > 4:
+                            checkpoint_at[i]['time_ms'] = current_time
+                        self.checkpoints.append({'t': current_time, 'purchase_index': purchases_before - 1,
+                                                 'state_after': checkpoint_at[i]})
+                    yield current_time, names[ids[i]], counts[i]
+            elif tag == b'F':
+                self.final_state = _read_json_record(f)
+            elif tag == b'E':
+                return
+            elif tag == b'':
+                raise ValueError("Truncated BFSX file: no end record")
+            else:
+                raise ValueError(f"Corrupt BFSX record tag {tag!r}")
+
+    def iter_purchases(self) -> Iterator[Tuple[str, str, int]]:
+        """Yield unit purchases in the bfs_optimize path format: ('buy', building, time_ms)."""
+        for time_ms, building, count in self.iter_runs():
+            for _ in range(count):
+                yield 'buy', building, time_ms
+
+    def read_path(self) -> List[Tuple[str, str, int]]:
+        return list(self.iter_purchases())
+
+
+def write_path(f: BinaryIO, path: List[Tuple], goal: float, total_time_ms: int, optimizer, checkpoint_every: int = 0):
+    """
+    Write a bfs_optimize path. With checkpoint_every > 0 the path is replayed (as the JSON export does)
+    and the state after every checkpoint_every-th purchase is stored.
+    """
+    building_names = [b.name for b in sorted(optimizer.buildings.values(), key=lambda b: b.id)]
+    writer = BFSBinaryWriter(f, goal, building_names, total_time_ms, name=f"Optimal Path ({total_time_ms}ms)")
+    state = None
+    if checkpoint_every > 0:
+        state = optimizer.fresh_state()
+    for index, (action_type, building, time_ms) in enumerate(path):
+        if action_type != 'buy':
+            continue
+        checkpoint = None
+        if state is not None:
+            if time_ms > state.time_ms:
+                state = optimizer.advance_time(state, state.time_ms, time_ms)
+            state = optimizer.purchase_building(state, building)
+            if (index + 1) % checkpoint_every == 0:
+                checkpoint = state
+        writer.write_purchase(building, time_ms, 1, checkpoint)
+    final_state = None
+    if state is not None:
+        if total_time_ms > state.time_ms:
+            state = optimizer.advance_time(state, state.time_ms, total_time_ms)
+        final_state = {
+            'cookies': state.cookies,
+            'cookies_baked': state.cookies_baked,
+            'buildings': dict(state.buildings),
+            'cps': state.cps,
+            'click_power': state.click_power,
+            'time_ms': state.time_ms,
+            'last_production_frame': state.last_production_frame,
+        }
+    writer.close(final_state)
+
+
+def export_bfs_path_to_binary(path: List[Tuple], goal: float, total_time_ms: int, optimizer,
+                              checkpoint_every: int = 0) -> str:
+    """Binary counterpart of export_bfs_path_to_visualization; returns the path of the .bfsx file."""
+    filepath = _new_export_path(goal, 'bfsx')
+    with open(filepath, 'wb') as f:
+        write_path(f, path, goal, total_time_ms, optimizer, checkpoint_every)
+    return str(filepath)
+
+
+def convert_to_json(bfsx_file: str, json_file: str, optimizer=None) -> str:
+    """Convert a .bfsx file to the timeline_paths JSON written by export_bfs_path_to_visualization."""
+    from main import CookieClickerOptimizer
+    optimizer = optimizer or CookieClickerOptimizer()
+    with open(bfsx_file, 'rb') as f:
+        reader = BFSBinaryReader(f)
+        path = reader.read_path()
+    header = reader.header
+    viz_data = build_visualization_data(path, header['goal'], header['total_ms'], optimizer)
+    with open(json_file, 'w', encoding='utf-8') as f:
+        json.dump(viz_data, f, indent=2)
+    return json_file
+
+
+def convert_from_json(json_file: str, bfsx_file: str, optimizer=None, checkpoint_every: int = 0) -> str:
+    """
+    Convert a timeline_paths JSON export to .bfsx, keeping every checkpoint_every-th state_after. Exports
+    written before checkpoints carried their click and frame phase are replayed once to recover it.
+    """
+    from main import CookieClickerOptimizer
+    optimizer = optimizer or CookieClickerOptimizer()
+    with open(json_file, 'r', encoding='utf-8') as f:
+        viz_data = json.load(f)
+    entry = viz_data['paths'][0]
+    if checkpoint_every > 0 and any('last_production_frame' not in e['state_after']
+                                    for e in entry['events'] if e['kind'] == 'purchase'):
+        path = [('buy', e['item_key'], e['t']) for e in entry['events'] if e['kind'] == 'purchase']
+        replayed = build_visualization_data(path, viz_data['goal'], entry['total_ms'], optimizer)['paths'][0]
+        entry = {**entry, 'events': replayed['events']}
+    building_names = [b.name for b in sorted(optimizer.buildings.values(), key=lambda b: b.id)]
+    with open(bfsx_file, 'wb') as f:
+        writer = BFSBinaryWriter(f, viz_data['goal'], building_names, entry['total_ms'],
+                                 name=entry.get('name'), color=entry.get('color', 'BLUE_C'))
+        for index, event in enumerate(entry['events']):
+            if event['kind'] != 'purchase':
+                continue
+            checkpoint = None
+            if checkpoint_every > 0 and (index + 1) % checkpoint_every == 0:
+                s = event['state_after']
+                checkpoint = GameState(cookies=s['cookies'], cookies_baked=s['cookies_baked'], buildings=s['buildings'],
+                                       cps=s['cps'], time_ms=event['t'], last_click_time_ms=s['last_click_time_ms'],
+                                       last_production_frame=s['last_production_frame'], click_power=s['click_power'])
+            writer.write_purchase(event['item_key'], event['t'], 1, checkpoint)
+        writer.close(entry.get('final_state'))
+    return bfsx_file
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 4 and sys.argv[1] in ('to-json', 'from-json'):
+        if sys.argv[1] == 'to-json':
+            print(convert_to_json(sys.argv[2], sys.argv[3]))
+        else:
+            print(convert_from_json(sys.argv[2], sys.argv[3]))
+    else:
+        print("Usage: python bfs_export_format.py to-json IN.bfsx OUT.json")
+        print("       python bfs_export_format.py from-json IN.json OUT.bfsx")
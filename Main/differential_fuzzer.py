@@ -0,0 +1,372 @@
+"""
+Differential fuzzer for the simulation engine. It generates random purchase paths and replays each one two
+ways, comparing the state after every action:
+- the Python engine: CookieClickerOptimizer.advance_time / purchase_multiple, with purchase times picked
+  by the same next_event walk _simulate_until_first_event runs (through afford_cache)
+- a per-millisecond port of the verification page's Game + TASController: advanceOneMs for every
+  millisecond, the loop the page's advanceTo shortcut stands in for
+
+A divergence in time, cookies, cookies baked, production frame, building counts or accepted purchases is
+shrunk to a small reproducing path and written as one JSON line (ruleset, RLE path, end time, the
+differing fields). Half the cases use random rulesets (click interval, fps, price increase) unless
+--default-rules is given.
+
+Usage:
+    python differential_fuzzer.py [options]
+
+Options:
+    --cases N            paths to generate (default 2000)
+    --seed S             first seed; case i uses seed S + i (default 0)
+    --workers N          worker processes (default: CPU count)
+    --max-purchases N    purchases per path (default 40)
+    --rel-tol X          tolerance for cookie sums, relative to cookies baked (default 0: bit-exact)
+    --default-rules      only the default Ruleset
+    --out FILE           JSONL divergences (default: stdout)
+"""
+import json
+import math
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import List, NamedTuple, Optional, Tuple
+
+from main import CookieClickerOptimizer, Ruleset, _build_js_building_name, cli_option
+
+# Constant as written in the generated page
+JS_CLICK_POWER = 1
+
+
+class FuzzCase(NamedTuple):
+    seed: int
+    ruleset: Ruleset
+    steps: Tuple[Tuple[str, int, int, bool], ...]  # (building, qty, time_ms, first time it is affordable)
+    end_ms: int
+
+    def path_json(self) -> list:
+        """The path in the page's RLE action format."""
+        return [[qty, 'buy', building, time_ms] for building, qty, time_ms, _ in self.steps]
+
+
+class Checkpoint(NamedTuple):
+    """State right after one action (or at the end time for the last checkpoint)."""
+    time_ms: int
+    cookies: float
+    cookies_baked: float
+    last_production_frame: int
+    buildings: Tuple[int, ...]  # amounts in Game.Objects order
+    bought: int  # units the action bought
+    bank_before: float  # bank one millisecond before the action (nan for the engine)
+
+
+class TASControllerPort:
+    """Millisecond-by-millisecond port of the page's Game + TASController pair."""
+
+    def __init__(self, optimizer: CookieClickerOptimizer, ruleset: Ruleset):
+        ordered = sorted(optimizer.buildings.values(), key=lambda b: b.id)
+        self.index = {_build_js_building_name(b.name): i for i, b in enumerate(ordered)}
+        self.base_price = [b.base_cost for b in ordered]
+        self.base_cps = [b.base_cps for b in ordered]
+        self.price_increase = ruleset.price_increase
+        self.fps = ruleset.fps
+        self.ms_per_frame = 1000 / ruleset.fps
+        self.click_interval = ruleset.click_interval_ms
+
+        self.cookies = 0.0  # Game.cookies
+        self.cookies_ps = 0.0  # Game.cookiesPs
+        self.amount = [0] * len(ordered)
+        self.time_ms = 0
+        self.cookies_baked = 0.0
+        self.last_click_time_ms = -ruleset.click_interval_ms
+        self.last_production_frame = -1
+
+    def advance_one_ms(self):
+        self.time_ms += 1
+        current_frame = math.floor(self.time_ms / self.ms_per_frame)
+        if current_frame > self.last_production_frame and self.cookies_ps > 0:
+            self.produce(current_frame)
+        self.auto_click()
+
+    def produce(self, frame: int):
+        production_this_frame = self.cookies_ps / self.fps
+        self.cookies += production_this_frame
+        self.cookies_baked += production_this_frame
+        self.last_production_frame = frame
+
+    def auto_click(self):
+        if self.time_ms % self.click_interval == 0 and self.time_ms != self.last_click_time_ms:
+            self.cookies += JS_CLICK_POWER
+            self.cookies_baked += JS_CLICK_POWER
+            self.last_click_time_ms = self.time_ms
+
+    def buy_building(self, building_name: str) -> bool:
+        i = self.index.get(_build_js_building_name(building_name))
+        if i is None:
+            return False
+        price = math.ceil(self.base_price[i] * self.price_increase ** self.amount[i])
+        if self.cookies >= price:
+            self.cookies -= price
+            self.amount[i] += 1
+            self.cookies_ps = 0.0
+            for amount, base_cps in zip(self.amount, self.base_cps):
+                self.cookies_ps += amount * base_cps
+            return True
+        return False
+
+    def checkpoint(self, bought: int, bank_before: float) -> Checkpoint:
+        return Checkpoint(self.time_ms, self.cookies, self.cookies_baked, self.last_production_frame,
+                          tuple(self.amount), bought, bank_before)
+
+    def run(self, path_json: list, expected_time_ms: int) -> List[Checkpoint]:
+        """executeNextAction over the whole path, with advanceTo spelled out as advanceOneMs calls."""
+        checkpoints = []
+        for count, action_type, action_value, action_time in path_json:
+            if self.time_ms == 0 and action_time > 0:
+                self.auto_click()
+            bank_before = math.nan
+            while self.time_ms < action_time:
+                bank_before = self.cookies
+                self.advance_one_ms()
+            bought = 0
+            if action_type == 'buy':
+                for _ in range(count):
+                    bought += self.buy_building(action_value)
+            checkpoints.append(self.checkpoint(bought, bank_before))
+        self.auto_click()
+        while self.time_ms < expected_time_ms:
+            self.advance_one_ms()
+        checkpoints.append(self.checkpoint(0, math.nan))
+        return checkpoints
+
+
+_optimizers = {}  # per-process, one per ruleset
+
+
+def _optimizer(ruleset: Ruleset) -> CookieClickerOptimizer:
+    optimizer = _optimizers.get(ruleset)
+    if optimizer is None:
+        optimizer = _optimizers[ruleset] = CookieClickerOptimizer(ruleset)
+    return optimizer
+
+
+def engine_checkpoints(case: FuzzCase) -> List[Checkpoint]:
+    """Replay the case through advance_time and purchase_multiple, the calls bfs_optimize builds paths with."""
+    optimizer = _optimizer(case.ruleset)
+    names = [b.name for b in sorted(optimizer.buildings.values(), key=lambda b: b.id)]
+    state = optimizer.fresh_state()
+
+    def checkpoint(bought):
+        return Checkpoint(state.time_ms, state.cookies, state.cookies_baked, state.last_production_frame,
+                          tuple(state.buildings.get(name, 0) for name in names), bought, math.nan)
+
+    checkpoints = []
+    for building, qty, time_ms, _ in case.steps:
+        if time_ms > state.time_ms:
+            state = optimizer.advance_time(state, state.time_ms, time_ms)
+        bought_state = optimizer.purchase_multiple(state, building, qty)
+        if bought_state is not None:
+            state = bought_state
+        checkpoints.append(checkpoint(qty if bought_state is not None else 0))
+    if case.end_ms > state.time_ms:
+        state = optimizer.advance_time(state, state.time_ms, case.end_ms)
+    checkpoints.append(checkpoint(0))
+    return checkpoints
+
+
+def random_ruleset(rng: random.Random) -> Ruleset:
+    return Ruleset(
+        click_interval_ms=rng.choice([20, rng.randint(1, 100)]),
+        fps=rng.choice([30, rng.choice([1, 7, 24, 25, 60, 144, 1000])]),
+        price_increase=rng.choice([1.15, round(rng.uniform(1.01, 1.5), 3)]),
+    )
+
+
+def generate_case(seed: int, max_purchases: int = 40, random_rules: bool = True) -> FuzzCase:
+    """
+    A random path: each purchase goes to one of the three cheapest buildings, usually at the first
+    millisecond next_event says it is affordable, otherwise later (often on a frame or click boundary)
+    or a little too early.
+    """
+    rng = random.Random(seed)
+    ruleset = random_ruleset(rng) if random_rules and rng.random() < 0.5 else Ruleset()
+    optimizer = _optimizer(ruleset)
+    kernels = optimizer._kernels
+    interval = ruleset.click_interval_ms
+    state = optimizer.fresh_state()
+    steps = []
+    for _ in range(rng.randint(1, max_purchases)):
+        prices = sorted((optimizer.get_building_cost(b, state.buildings.get(b, 0)), b) for b in optimizer.buildings)
+        building = rng.choice(prices[:3])[1]
+        owned = state.buildings.get(building, 0)
+        qty = rng.choice(ruleset.purchase_quantities) if rng.random() < 0.2 else 1
+        if optimizer.cost_for_quantity(building, owned, qty) > 30 * prices[0][0] + 100:
+            qty = 1
+        cost = optimizer.cost_for_quantity(building, owned, qty)
+        t = optimizer.afford_cache.next_event(
+            state.time_ms, state.cookies, state.cookies_baked, state.last_click_time_ms,
+            state.last_production_frame, state.cps, state.click_power, math.inf, cost)[0]
+        first = False
+        roll = rng.random()
+        if roll < 0.5:
+            first = True
+        elif roll < 0.75:
+            t += rng.choice([1, 2, rng.randint(1, 5 * interval)])
+        elif roll < 0.9:
+            # On, or one millisecond either side of, the next frame or click boundary
+            boundary = max(kernels.frame_entry_ms(ruleset.frame_at(t) + 1), (t // interval + 1) * interval)
+            t = boundary + rng.choice([-1, 0, 1])
+        else:
+            # bfs_optimize only buys affordable quantities, so early purchases are single units
+            t, qty = max(state.time_ms, t - rng.randint(1, 50)), 1
+        if t > state.time_ms:
+            state = optimizer.advance_time(state, state.time_ms, t)
+        state = optimizer.purchase_multiple(state, building, qty) or state
+        steps.append((building, qty, t, first))
+    end_ms = state.time_ms + rng.choice([0, 1, rng.randint(1, 2000)])
+    return FuzzCase(seed, ruleset, tuple(steps), end_ms)
+
+
+def first_divergence(case: FuzzCase, rel_tol: float = 0.0) -> Optional[dict]:
+    """The first checkpoint where the engine and the page port disagree, or None."""
+    optimizer = _optimizer(case.ruleset)
+    engine = engine_checkpoints(case)
+    page = TASControllerPort(optimizer, case.ruleset).run(case.path_json(), case.end_ms)
+    owned = {}
+    for index, (ours, theirs) in enumerate(zip(engine, page)):
+        fields = [name for name in ('time_ms', 'last_production_frame', 'buildings', 'bought')
+                  if getattr(ours, name) != getattr(theirs, name)]
+        # The bank is what is left after spending, so its rounding error is relative to cookies baked
+        scale = max(abs(theirs.cookies_baked), 1.0)
+        for name in ('cookies', 'cookies_baked'):
+            if abs(getattr(ours, name) - getattr(theirs, name)) > rel_tol * scale:
+                fields.append(name)
+        if index < len(case.steps):
+            building, qty, _, first = case.steps[index]
+            cost = optimizer.cost_for_quantity(building, owned.get(building, 0), qty)
+            # next_event picked this millisecond as the first one the purchase is affordable at
+            if first and theirs.bank_before - cost >= rel_tol * scale:
+                fields.append('first_affordable')
+            owned[building] = owned.get(building, 0) + ours.bought
+        if fields:
+            return {
+                'action': index if index < len(case.steps) else 'end',
+                'fields': fields,
+                'engine': ours._asdict(),
+                'page': theirs._asdict(),
+            }
+    return None
+
+
+def minimize(case: FuzzCase, divergence: dict, rel_tol: float = 0.0) -> Tuple[FuzzCase, dict]:
+    """
+    Shrink a diverging case while the same fields still diverge: cut the path after the diverging action,
+    drop chunks of purchases (ddmin), then cut quantities to 1 and pull the end time in.
+    """
+    target = set(divergence['fields'])
+
+    def still_fails(candidate):
+        found = first_divergence(candidate, rel_tol)
+        return found if found is not None and target <= set(found['fields']) else None
+
+    def attempt(candidate):
+        nonlocal case, divergence
+        found = still_fails(candidate)
+        if found is not None:
+            case, divergence = candidate, found
+        return found is not None
+
+    if divergence['action'] != 'end':
+        attempt(case._replace(steps=case.steps[:divergence['action'] + 1], end_ms=case.steps[divergence['action']][2]))
+    chunks = 2
+    while len(case.steps) >= 2:
+        size = math.ceil(len(case.steps) / chunks)
+        for start in range(0, len(case.steps), size):
+            # Later purchases no longer wait on the removed ones, so their first-affordable claims are dropped
+            rest = tuple((building, qty, time_ms, False) for building, qty, time_ms, _ in case.steps[start + size:])
+            if attempt(case._replace(steps=case.steps[:start] + rest)):
+                chunks = max(chunks - 1, 2)
+                break
+        else:
+            if size == 1:
+                break
+            chunks = min(chunks * 2, len(case.steps))
+    for i, (building, qty, time_ms, _) in enumerate(case.steps):
+        if qty > 1:
+            attempt(case._replace(steps=case.steps[:i] + ((building, 1, time_ms, False),) + case.steps[i + 1:]))
+    last = case.steps[-1][2] if case.steps else 0
+    if case.end_ms > last:
+        attempt(case._replace(end_ms=last))
+    return case, divergence
+
+
+def case_record(case: FuzzCase, divergence: dict) -> dict:
+    return {
+        'seed': case.seed,
+        'ruleset': case.ruleset.to_js(),
+        'path': case.path_json(),
+        'first_affordable': [i for i, step in enumerate(case.steps) if step[3]],
+        'end_ms': case.end_ms,
+        'divergence': divergence,
+    }
+
+
+def fuzz_seeds(first_seed: int, count: int, max_purchases: int, random_rules: bool, rel_tol: float) -> dict:
+    """Run seeds first_seed .. first_seed + count - 1 in this process; minimized records for failures."""
+    failures = []
+    actions = 0
+    for seed in range(first_seed, first_seed + count):
+        case = generate_case(seed, max_purchases, random_rules)
+        actions += len(case.steps)
+        divergence = first_divergence(case, rel_tol)
+        if divergence is not None:
+            failures.append(case_record(*minimize(case, divergence, rel_tol)))
+    return {'cases': count, 'actions': actions, 'failures': failures}
+
+
+def main(argv: List[str]) -> int:
+    argv = list(argv)
+    if argv and argv[0] in ('-h', '--help'):
+        print(__doc__)
+        return 2
+    cases = int(cli_option(argv, '--cases', 2000))
+    first_seed = int(cli_option(argv, '--seed', 0))
+    workers = int(cli_option(argv, '--workers', os.cpu_count() or 1))
+    max_purchases = int(cli_option(argv, '--max-purchases', 40))
+    rel_tol = float(cli_option(argv, '--rel-tol', 0.0))
+    out_file = cli_option(argv, '--out')
+    random_rules = '--default-rules' not in argv
+    if not random_rules:
+        argv.remove('--default-rules')
+    if argv or cases < 1 or max_purchases < 1:
+        print(__doc__)
+        return 2
+
+    # Small batches keep every worker busy until the end without paying per-case task overhead
+    batch = max(1, min(50, cases // (4 * workers) or 1))
+    out = open(out_file, 'w', encoding='utf-8') if out_file else sys.stdout
+    started = time.perf_counter()
+    actions = failures = 0
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(fuzz_seeds, seed, min(batch, first_seed + cases - seed), max_purchases,
+                                   random_rules, rel_tol)
+                       for seed in range(first_seed, first_seed + cases, batch)]
+            for future in as_completed(futures):
+                result = future.result()
+                actions += result['actions']
+                for record in result['failures']:
+                    failures += 1
+                    out.write(json.dumps(record) + '\n')
+                    out.flush()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    elapsed = time.perf_counter() - started
+    print(f"Fuzzed {cases} paths ({actions} purchases) in {elapsed:.2f}s with {workers} workers: "
+          f"{failures} divergence(s)", file=sys.stderr)
+    return 0 if failures == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,583 @@
+"""
+Exact search: branch-and-bound over the same purchase tree as bfs_optimize (buy any newly affordable
+option now, or defer them all until the next purchase), with no beam truncation, ending in a certificate.
+
+The beam search answer is the starting incumbent. Depth first from the start state, a node is pruned when
+- bound: a lower bound on its goal time is no better than the incumbent. The bound relaxes the game so that
+  every cookie spent buys production at the best cps per cookie on offer at current prices (a concave
+  majorant of what the remaining price ladders can buy), solved in closed form per 100ms period.
+- dominance: a finished node at the same time with the same buildings, click and frame phase has at least
+  its bank and baked total and defers no more options (duplicate: the same state again).
+Finished nodes are kept in a table of at most --table-size entries, oldest evicted first, and the stack
+holds one path of siblings. Stopping at --max-nodes gives an incomplete certificate with the best lower bound
+proven so far.
+
+The certificate records the model, the incumbent and bound values, the pruned counts per rule, and the
+whole search tree: one short record per node in preorder (see TREE_FORMAT), so it grows with the nodes
+generated. --check replays the path with the headless verifier and rebuilds the tree from the start state
+without the search's code: each expanded node's next event is found by bisecting advance_time, its
+options are priced with get_building_cost and its children bought with purchase_building. Every child the
+game offers must appear exactly once and every leaf must be settled: a goal no earlier than the path, a
+bound cut whose ProductionBound value (recomputed) is no better, or a finished node that dominates it.
+
+Usage:
+    python exact_search.py GOAL [--max-nodes N] [--table-size N] [--beam-width N] [--out FILE]
+    python exact_search.py --check CERTIFICATE.json
+"""
+import bisect
+import io
+import json
+import math
+import sys
+import time
+from collections import OrderedDict
+from contextlib import redirect_stdout
+from typing import List, Optional, Tuple
+
+from main import (BeamPolicy, CookieClickerOptimizer, GameState, PathStep, Ruleset, _new_export_path,
+                  cli_option, path_from_step)
+
+RULES = ('bound', 'dominance', 'duplicate')
+# Relative slack on every closed-form step of the bound, so float rounding can only lower it
+BOUND_EPSILON = 1e-9
+TREE_FORMAT = ("[building, quantity, rule, value] per node in preorder, children in the order generated; "
+               "building null and quantity 0 for the root and for the skip child (defer every newly "
+               "affordable option). rule expanded: value is the number of children that follow; goal: the "
+               "node's next event reaches the goal, value is its time; bound: value is the node's lower bound "
+               "in ms (null for never); dominance or duplicate: value is the index of the finished node that "
+               "dominates it; open: not entered before max_nodes, value is its lower bound")
+MODEL = ("building purchases only (no upgrades), each made in the first millisecond it is affordable after "
+         "the previous purchase, on bfs_optimize's tree: a building passed over when it becomes affordable is "
+         "not bought later on that branch; clicks every click interval and production on frame entry as in "
+         "advance_time")
+
+
+class ProductionBound:
+    """
+    Admissible lower bound on the time a state can first have baked the goal.
+
+    Per 100ms period the game bakes frame_weight * cps + click_weight * click power. A unit of a building adds
+    its gain to that, and the cookies spent by any time are at most the bank plus what was baked since. Taking
+    the units in order of gain per cookie gives a concave bound f(spent) on the gain; each line in lines()
+    lies above f everywhere. Production in a period is at most the rate at its end, so with line
+    F + rho * (spent - S) the baked total after a period obeys x' <= (x + E + F + rho * (bank + x - S)) / (1 - rho),
+    which is summed in closed form until the goal is passed.
+    """
+
+    def __init__(self, optimizer: CookieClickerOptimizer, goal: float, max_cached: int = 1 << 16):
+        ruleset = optimizer.ruleset
+        self.optimizer = optimizer
+        self.goal = goal
+        self.interval = ruleset.click_interval_ms
+        self.fps = ruleset.fps
+        frame_period_ms = 1000 // math.gcd(1000, self.fps)
+        self.period_ms = self.interval * frame_period_ms // math.gcd(self.interval, frame_period_ms)
+        self.frame_weight = self.period_ms / 1000    # cookies per period for each cps
+        self.click_weight = self.period_ms / self.interval  # cookies per period for each unit of click power
+        self.max_cached = max_cached
+        self._gains = {}
+        self._lines = {}
+
+    def gains(self, upgrades: frozenset) -> dict:
+        """Per-period production one more unit of each building adds under these upgrades."""
+        gains = self._gains.get(upgrades)
+        if gains is None:
+            optimizer = self.optimizer
+            bare = GameState(cookies=0, cookies_baked=0, buildings={}, cps=0.0, time_ms=0, last_click_time_ms=0,
+                             last_production_frame=0, click_power=1.0, upgrades=set(upgrades))
+            bare_click = optimizer.calculate_click_power(bare)
+            gains = {}
+            for bname in optimizer.buildings:
+                probe = bare.copy()
+                probe.buildings = {bname: 1}
+                gains[bname] = (self.frame_weight * optimizer.calculate_total_cps(probe)
+                                + self.click_weight * (optimizer.calculate_click_power(probe) - bare_click))
+            self._gains[upgrades] = gains
+        return gains
+
+    def lines(self, state: GameState) -> Tuple[list, list]:
+        """(spend breakpoints, (S, F, rho) lines) for the buildings of state; each line bounds f from above."""
+        upgrades = frozenset(state.upgrades)
+        key = (upgrades, tuple(sorted(state.buildings.items())))
+        cached = self._lines.get(key)
+        if cached is not None:
+            return cached
+        optimizer = self.optimizer
+        ladders = []
+        rho = 0.0
+        for bname, gain in self.gains(upgrades).items():
+            owned = state.buildings.get(bname, 0)
+            ub = optimizer.max_affordable_qty_by_goal(bname, owned, self.goal)
+            if ub == 0 or gain <= 0:
+                continue
+            prices, prefix = optimizer._extend_price_table(bname, owned + ub)
+            ladders.append((gain, prices, prefix, owned, ub))
+            rho = max(rho, gain / prices[owned])
+        lines = [(0, 0.0, rho)]
+        while ladders:
+            # Every unit worth at least rho per cookie; the next one is worth less
+            spent, gained, complete = 0, 0.0, True
+            for gain, prices, prefix, owned, ub in ladders:
+                units = bisect.bisect_right(prices, gain / rho, owned, owned + ub) - owned
+                spent += prefix[owned + units] - prefix[owned]
+                gained += gain * units
+                complete = complete and units == ub
+            if complete:
+                lines.append((spent, gained, 0.0))
+                break
+            lines.append((spent, gained, rho))
+            rho /= 2
+        if len(self._lines) >= self.max_cached:
+            self._lines.clear()
+        cached = self._lines[key] = ([line[0] for line in lines], lines)
+        return cached
+
+    def lower_bound(self, state: GameState) -> float:
+        """No earlier ms than this can have cookies_baked >= goal from state (math.inf when it never can)."""
+        target = self.goal - state.cookies_baked
+        t0 = state.time_ms
+        if target <= 0:
+            return t0
+        spends, lines = self.lines(state)
+        bank = state.cookies
+        rate = self.frame_weight * state.cps + self.click_weight * state.click_power
+        grow = 1 + BOUND_EPSILON
+
+        # Up to the next period start: its clicks and frames, plus a lagging frame's catch-up
+        ruleset = self.optimizer.ruleset
+        period_start = (t0 // self.period_ms + 1) * self.period_ms
+        clicks = (period_start - 1) // self.interval - t0 // self.interval
+        frames = ruleset.frame_at(period_start - 1) - ruleset.frame_at(t0) + 1
+        weight = max(frames / self.fps / self.frame_weight, clicks / self.click_weight)
+        spend, gained, rho = lines[bisect.bisect_right(spends, bank) - 1]
+        if weight * rho >= 1:
+            return t0 + 1
+        x = weight * (rate + gained + rho * (bank - spend)) / (1 - weight * rho) * grow
+        if x >= target:
+            return t0 + 1
+
+        periods = 0
+        while True:
+            index = bisect.bisect_right(spends, bank + x) - 1
+            spend, gained, rho = lines[index]
+            if rho >= 1:
+                return period_start
+            a = 1 / (1 - rho) * grow
+            b = (rate + gained + rho * (bank - spend)) / (1 - rho) * grow
+            if b <= 0:
+                return math.inf
+            stop = min(target, spends[index + 1] - bank) if index + 1 < len(spends) else target
+            # Fewest periods n with x_n >= stop, x_n = a^n (x - xf) + xf (or x + n b without growth)
+            if rho == 0:
+                n = max(1, math.ceil((stop - x) / b - BOUND_EPSILON))
+                x += n * b
+            else:
+                fixed = -b / (a - 1)
+                n = max(1, math.ceil(math.log((stop - fixed) / (x - fixed)) / math.log(a) - BOUND_EPSILON))
+                try:
+                    x = a ** n * (x - fixed) + fixed
+                except OverflowError:
+                    x = math.inf
+            periods += n
+            if x >= target:
+                # Below the goal before the last of these periods
+                return period_start + self.period_ms * (periods - 1)
+
+
+class ExactSearch:
+    """
+    Depth-first branch-and-bound for one goal from the fresh game, expanding nodes exactly as bfs_optimize
+    does. run() returns the certificate; best_path and best_time hold the optimum once status is 'optimal'.
+    """
+
+    def __init__(self, optimizer: CookieClickerOptimizer, goal: float, max_nodes: Optional[int] = None,
+                 table_size: int = 1 << 20):
+        self.optimizer = optimizer
+        self.goal = goal
+        self.max_nodes = max_nodes
+        self.table_size = table_size
+        self.bound = ProductionBound(optimizer, goal)
+        self.pruned = dict.fromkeys(RULES, 0)
+        self.expanded = 0
+        self.generated = 0
+        self.improvements = 0
+        self.max_stack = 0
+        self.evictions = 0
+        self.best_path: list = []
+        self.best_time: float = math.inf
+        # (time, buildings, click phase, frame) -> [(cookies, baked, deferred, tree node)] of finished nodes
+        self._finished = OrderedDict()
+        self._finished_count = 0
+        # Tree nodes are [edge, rule, value, children]: edge (building, qty) or None for the root and skips
+        self.tree = None
+
+    @staticmethod
+    def _key(state: GameState) -> tuple:
+        return (state.time_ms, tuple(sorted(state.buildings.items())), state.last_click_time_ms,
+                state.last_production_frame)
+
+    def _dominated(self, state: GameState) -> Optional[tuple]:
+        """('dominance' or 'duplicate', the finished entry) when a finished node is at least as good."""
+        deferred = state.deferred_options
+        for entry in self._finished.get(self._key(state), ()):
+            cookies, baked, entry_deferred, _ = entry
+            if cookies >= state.cookies and baked >= state.cookies_baked and entry_deferred <= deferred:
+                same = (cookies == state.cookies and baked == state.cookies_baked and entry_deferred == deferred)
+                return ('duplicate' if same else 'dominance'), entry
+        return None
+
+    def _finish(self, state: GameState, node: list):
+        entries = self._finished.setdefault(self._key(state), [])
+        entries.append((state.cookies, state.cookies_baked, frozenset(state.deferred_options), node))
+        self._finished_count += 1
+        while self._finished_count > self.table_size:
+            _, evicted = self._finished.popitem(last=False)
+            self._finished_count -= len(evicted)
+            self.evictions += len(evicted)
+
+    def _cut_by_bound(self, state: GameState, node: list, lower_bound: float):
+        self.pruned['bound'] += 1
+        node[1:3] = 'bound', lower_bound
+        self._finish(state, node)
+
+    def _children(self, state: GameState, step: Optional[PathStep], node: list) -> list:
+        """(lower bound, child, step, node) for the skip and buy-now children, or [] once the goal is reached."""
+        optimizer = self.optimizer
+        dt, ev_type, options, cookies, baked, last_click, last_frame, skip_cursor = \
+            optimizer._simulate_until_first_event(state, self.goal)
+        advanced = optimizer._state_at_event(state, dt, cookies, baked, last_click, last_frame)
+        if ev_type == 'goal':
+            node[1:3] = 'goal', advanced.time_ms
+            if advanced.time_ms < self.best_time:
+                self.best_time = advanced.time_ms
+                self.best_path = path_from_step(step)
+                self.improvements += 1
+            return []
+        skip = advanced.copy()
+        skip.deferred_options |= options
+        skip.skip_cursor = skip_cursor
+        children = [(skip, step, None)]
+        for bname, qty in sorted(options):
+            bought = optimizer.purchase_multiple(advanced, bname, qty)
+            if bought is not None:
+                children.append((bought, PathStep.extend(step, bname, qty, bought.time_ms, advanced), (bname, qty)))
+        scored = []
+        for child, child_step, edge in children:
+            self.generated += 1
+            lower_bound = self.bound.lower_bound(child)
+            child_node = [edge, 'open', lower_bound, None]
+            node[3].append(child_node)
+            if lower_bound >= self.best_time:
+                self._cut_by_bound(child, child_node, lower_bound)
+            else:
+                scored.append((lower_bound, child, child_step, child_node))
+        return scored
+
+    def run(self, incumbent: Optional[Tuple[list, int]] = None, beam_width: int = 50) -> dict:
+        """Search to completion (or max_nodes) and return the certificate."""
+        started = time.perf_counter()
+        if incumbent is None:
+            with redirect_stdout(io.StringIO()):
+                incumbent = self.optimizer.bfs_optimize(self.goal, beam_policy=BeamPolicy(width=beam_width))
+        if incumbent is not None:
+            self.best_path, self.best_time = list(incumbent[0]), incumbent[1]
+        initial_upper_bound = self.best_time
+        root = self.optimizer.fresh_state()
+        root_lower_bound = self.bound.lower_bound(root)
+        self.tree = [None, 'open', root_lower_bound, None]
+
+        # (lower bound, state, step, node) to enter, or (None, state, step, node) once its children are all done
+        stack = [(root_lower_bound, root, None, self.tree)]
+        stopped = False
+        while stack:
+            self.max_stack = max(self.max_stack, len(stack))
+            lower_bound, state, step, node = stack.pop()
+            if lower_bound is None:
+                self._finish(state, node)
+                continue
+            if lower_bound >= self.best_time:
+                self._cut_by_bound(state, node, lower_bound)
+                continue
+            found = self._dominated(state)
+            if found is not None:
+                rule, entry = found
+                self.pruned[rule] += 1
+                node[1:3] = rule, entry[3]
+                continue
+            if self.max_nodes is not None and self.expanded >= self.max_nodes:
+                stack.append((lower_bound, state, step, node))
+                stopped = True
+                break
+            self.expanded += 1
+            node[1:4] = 'expanded', None, []
+            stack.append((None, state, step, node))
+            # Smallest bound on top, so it is entered first
+            stack.extend(sorted(self._children(state, step, node), key=lambda c: -c[0]))
+
+        # Every open node bounds its own subtree and the root bounds them all
+        open_bounds = [entry[0] for entry in stack if entry[0] is not None]
+        lower_bound = min(self.best_time, max(root_lower_bound, min(open_bounds))) if stopped else self.best_time
+        return self.certificate(initial_upper_bound, root_lower_bound, lower_bound, stopped,
+                                time.perf_counter() - started)
+
+    def tree_records(self) -> list:
+        """The search tree as TREE_FORMAT records, in preorder."""
+        order = []
+        index = {}
+        stack = [self.tree]
+        while stack:
+            node = stack.pop()
+            index[id(node)] = len(order)
+            order.append(node)
+            if node[1] == 'expanded':
+                stack.extend(reversed(node[3]))
+        records = []
+        for edge, rule, value, children in order:
+            if rule == 'expanded':
+                value = len(children)
+            elif rule in ('dominance', 'duplicate'):
+                value = index[id(value)]
+            elif value == math.inf:
+                value = None
+            records.append([edge[0], edge[1], rule, value] if edge is not None else [None, 0, rule, value])
+        return records
+
+    def certificate(self, initial_upper_bound: float, root_lower_bound: float, lower_bound: float,
+                    stopped: bool, elapsed: float) -> dict:
+        def number(value):
+            return value if value < math.inf else None
+
+        return {
+            'goal': self.goal,
+            'ruleset': self.optimizer.ruleset.to_js(),
+            'model': MODEL,
+            'status': 'incomplete' if stopped else 'optimal',
+            'time_ms': number(self.best_time),
+            'path': [[bname, t] for _, bname, t in self.best_path],
+            'bounds': {
+                'initial_upper_bound_ms': number(initial_upper_bound),
+                'root_lower_bound_ms': number(root_lower_bound),
+                'lower_bound_ms': number(lower_bound),
+                'lower_bound': 'production relaxation per period (ProductionBound)',
+                'period_ms': self.bound.period_ms,
+                'epsilon': BOUND_EPSILON,
+            },
+            'nodes': {'expanded': self.expanded, 'generated': self.generated, 'improvements': self.improvements,
+                      'max_stack': self.max_stack},
+            'pruned': dict(self.pruned),
+            'table': {'size': self.table_size, 'finished': self._finished_count, 'evictions': self.evictions},
+            'tree_format': TREE_FORMAT,
+            'tree': self.tree_records(),
+            'seconds': round(elapsed, 3),
+        }
+
+
+def first_event(optimizer: CookieClickerOptimizer, state: GameState, goal: float) -> Tuple[str, GameState, set]:
+    """
+    The next event of a tree node, found from the game rules alone: ('goal' or 'afford', the state at its
+    millisecond, the options newly affordable then). Nothing is bought until the event, so the bank and the
+    baked total only grow: advance_time gallops forward in doubling steps and then bisects the last one for
+    the first millisecond where either target is met.
+    """
+    deferred = {bname for bname, _ in state.deferred_options}
+    limit = math.floor(goal)
+    ladders = []  # (building, owned, prices of up to the units the goal could pay for)
+    for bname in optimizer.buildings:
+        if bname in deferred:
+            continue
+        owned = state.buildings.get(bname, 0)
+        prices, spent = [], 0
+        while spent + optimizer.get_building_cost(bname, owned + len(prices)) <= limit:
+            spent += optimizer.get_building_cost(bname, owned + len(prices))
+            prices.append(spent)
+        if prices:
+            ladders.append((bname, prices))
+    threshold = min((prices[0] for _, prices in ladders), default=math.inf)
+
+    def reached(s: GameState) -> bool:
+        return s.cookies_baked >= goal or s.cookies >= threshold
+
+    # Advancing in pieces gives the state advancing at once does, bit for bit
+    advanced = optimizer.advance_time(state, state.time_ms, state.time_ms)
+    if not reached(advanced):
+        low, step = advanced, 1
+        while True:
+            advanced = optimizer.advance_time(low, low.time_ms, low.time_ms + step)
+            if reached(advanced):
+                break
+            low, step = advanced, 2 * step
+        while advanced.time_ms - low.time_ms > 1:
+            middle = optimizer.advance_time(low, low.time_ms, (low.time_ms + advanced.time_ms) // 2)
+            if reached(middle):
+                advanced = middle
+            else:
+                low = middle
+    if advanced.cookies_baked >= goal:
+        return 'goal', advanced, set()
+    bank = math.floor(advanced.cookies)
+    options = {(bname, k + 1) for bname, prices in ladders for k, spent in enumerate(prices) if spent <= bank}
+    return 'afford', advanced, options
+
+
+def check_tree(certificate: dict, optimizer: CookieClickerOptimizer, bound: ProductionBound) -> List[str]:
+    """
+    Failures found rebuilding the certificate's tree from the start state (see the module docstring); an
+    empty list when every node the game offers is accounted for and every leaf is settled.
+    """
+    goal = certificate['goal']
+    best = certificate['time_ms'] if certificate['time_ms'] is not None else math.inf
+    records = certificate['tree']
+    if not records:
+        return ["empty tree"]
+    referenced = {value for _, _, rule, value in records if rule in ('dominance', 'duplicate')}
+    states = {}       # referenced index -> state, for the dominance checks
+    dominated = []    # (index, state, index of the node it is cut by, that node's open ancestors)
+    open_bounds = []
+    failures = []
+    # Per expanded node still taking children: [its index, state at its event, its options, child edges not
+    # seen yet (None for the skip child), children left]
+    frames = []
+    for index, (bname, qty, rule, value) in enumerate(records):
+        if len(failures) >= 20:
+            failures.append("... stopped after 20 failures")
+            break
+        if index == 0:
+            state = optimizer.fresh_state()
+            parent = None
+        else:
+            if not frames:
+                failures.append(f"node {index}: more records than the tree has nodes")
+                break
+            frame = frames[-1]
+            parent, advanced, options, unseen = frame[:4]
+            frame[4] -= 1
+            if frame[4] == 0:
+                frames.pop()
+            edge = (bname, qty) if bname is not None else None
+            if edge not in unseen:
+                failures.append(f"node {index}: {'skip' if edge is None else f'{qty} {bname}'} is not an unseen "
+                                f"child of node {parent}")
+                continue
+            unseen.discard(edge)
+            if edge is None:
+                state = advanced.copy()
+                state.deferred_options = advanced.deferred_options | options
+            else:
+                state = advanced
+                for _ in range(qty):
+                    if state.cookies < optimizer.get_building_cost(bname, state.buildings.get(bname, 0)):
+                        failures.append(f"node {index}: {qty} {bname} not affordable at {state.time_ms}ms")
+                    state = optimizer.purchase_building(state, bname)
+                state.deferred_options = {option for option in state.deferred_options if option[0] != bname}
+        if index in referenced:
+            states[index] = state
+        if rule in ('expanded', 'goal'):
+            kind, advanced, options = first_event(optimizer, state, goal)
+            if rule == 'goal':
+                if kind != 'goal' or advanced.time_ms != value:
+                    failures.append(f"node {index}: next event is {kind} at {advanced.time_ms}ms, recorded goal at {value}ms")
+                elif value < best:
+                    failures.append(f"node {index}: reaches the goal at {value}ms, before the path's {best}ms")
+            elif kind != 'afford':
+                failures.append(f"node {index}: expanded, but its next event is the goal at {advanced.time_ms}ms")
+            elif value != len(options) + 1:
+                failures.append(f"node {index}: {value} children recorded, the game offers {len(options) + 1}")
+            else:
+                frames.append([index, advanced, options, options | {None}, value])
+        elif rule == 'bound':
+            lower_bound = bound.lower_bound(state)
+            if (lower_bound if lower_bound < math.inf else None) != value:
+                failures.append(f"node {index}: lower bound {lower_bound}, recorded {value}")
+            elif lower_bound < best:
+                failures.append(f"node {index}: lower bound {lower_bound} is below the path's {best}ms")
+        elif rule in ('dominance', 'duplicate'):
+            dominated.append((index, state, value, {frame[0] for frame in frames} | {parent}))
+        elif rule == 'open':
+            open_bounds.append(bound.lower_bound(state))
+        else:
+            failures.append(f"node {index}: unknown rule {rule!r}")
+    if frames and len(failures) < 20:
+        failures.append(f"node {frames[-1][0]}: {frames[-1][4]} children missing")
+    for index, state, by, ancestors in dominated:
+        other = states.get(by)
+        if other is None or by in ancestors or by == index or records[by][2] == 'open':
+            failures.append(f"node {index}: cut by node {by}, which is not a finished node")
+        elif (ExactSearch._key(state) != ExactSearch._key(other) or other.cookies < state.cookies
+              or other.cookies_baked < state.cookies_baked or not other.deferred_options <= state.deferred_options):
+            failures.append(f"node {index}: node {by} does not dominate it")
+    lower_bound = certificate['bounds']['lower_bound_ms']
+    if open_bounds:
+        if certificate['status'] == 'optimal':
+            failures.append(f"{len(open_bounds)} open nodes in an optimal certificate")
+        proven = min(best, max(bound.lower_bound(optimizer.fresh_state()), min(open_bounds)))
+        if lower_bound is None or lower_bound > proven:
+            failures.append(f"lower bound {lower_bound} above the {proven}ms the open nodes prove")
+    return failures
+
+
+def check_certificate(certificate: dict) -> List[str]:
+    """Failures found replaying the certificate's path and tree (an empty list when it checks out)."""
+    from replay_verifier import ReplayEngine
+    optimizer = CookieClickerOptimizer(Ruleset.from_js(certificate['ruleset']))
+    goal = certificate['goal']
+    best = certificate['time_ms']
+    failures = []
+    if best is not None:
+        path = [('buy', bname, t) for bname, t in certificate['path']]
+        report = ReplayEngine(optimizer).verify_solution(path, goal, best)
+        failures.extend(f"path: {failure}" for failure in report.failures)
+    bound = ProductionBound(optimizer, goal)
+    root = bound.lower_bound(optimizer.fresh_state())
+    bounds = certificate['bounds']
+    if root != bounds['root_lower_bound_ms']:
+        failures.append(f"root lower bound {root} != {bounds['root_lower_bound_ms']}")
+    if best is not None and bounds['lower_bound_ms'] is not None and bounds['lower_bound_ms'] > best:
+        failures.append(f"lower bound {bounds['lower_bound_ms']} above the path's {best}ms")
+    if certificate['status'] == 'optimal' and bounds['lower_bound_ms'] != best:
+        failures.append("an optimal certificate must close the gap")
+    failures.extend(f"tree: {failure}" for failure in check_tree(certificate, optimizer, bound))
+    return failures
+
+
+def main(argv: List[str]) -> int:
+    argv = list(argv)
+    if not argv or argv[0] in ('-h', '--help'):
+        print(__doc__)
+        return 2
+    check = cli_option(argv, '--check')
+    if check is not None:
+        with open(check, 'r', encoding='utf-8') as f:
+            certificate = json.load(f)
+        started = time.perf_counter()
+        failures = check_certificate(certificate)
+        for failure in failures:
+            print(f"    {failure}")
+        print(f"{'✓' if not failures else '⚠'} {check}: {certificate['status']} {certificate['time_ms']}ms for "
+              f"goal {certificate['goal']:g}; path and a tree of {len(certificate['tree'])} nodes replayed in "
+              f"{time.perf_counter() - started:.2f}s")
+        return 0 if not failures else 1
+
+    max_nodes = cli_option(argv, '--max-nodes')
+    table_size = int(cli_option(argv, '--table-size', 1 << 20))
+    beam_width = int(cli_option(argv, '--beam-width', 50))
+    out = cli_option(argv, '--out')
+    if len(argv) != 1:
+        print(__doc__)
+        return 2
+    goal = float(argv[0])
+    search = ExactSearch(CookieClickerOptimizer(), goal, int(max_nodes) if max_nodes is not None else None,
+                         table_size)
+    certificate = search.run(beam_width=beam_width)
+    out = out or str(_new_export_path(goal, 'certificate.json'))
+    with open(out, 'w', encoding='utf-8') as f:
+        json.dump(certificate, f, indent=1)
+    bounds = certificate['bounds']
+    pruned = ', '.join(f"{rule} {count}" for rule, count in certificate['pruned'].items())
+    print(f"Goal {goal:g}: {certificate['status']}, {certificate['time_ms']}ms (beam {bounds['initial_upper_bound_ms']}ms, "
+          f"lower bound {bounds['lower_bound_ms']}ms); {search.expanded} nodes expanded, pruned {pruned}; "
+          f"{certificate['seconds']:.2f}s -> {out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
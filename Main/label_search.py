@@ -0,0 +1,248 @@
+"""
+Label-setting search over building-count vectors: an alternative to bfs_optimize that expands each way of
+owning the same buildings only while it is not beaten by another way of owning them.
+
+A label is a state reached by buying one unit at a time, each in the first millisecond it is affordable
+after the purchase before it. Bulk purchases and deferrals need no labels of their own: the units of a bulk
+purchase are each affordable no later one at a time, and buying sooner never leaves fewer cookies baked.
+Labels are expanded in increasing time from a priority queue. Expanding one walks its options cheapest
+first, resuming the time-to-afford walk between thresholds, and buys one unit of each option on the
+millisecond it becomes affordable, until the goal is reached. The search stops once the next label is no
+earlier than the best goal time found.
+
+Per building-count vector only Pareto-best labels are kept. A label at time t dominates one at time u >= t
+when, after waiting until u, its bank and baked total are both at least the other's: with the same
+buildings both then click and produce in the same phase from u on. Waiting adds exactly the clicks and
+frames in (t, u], so that is checked without simulating (less a small relative margin for float rounding).
+A label that has not yet produced its current frame (the first building of a game) is never compared.
+
+Usage:
+    python label_search.py GOAL [--max-labels N] [--bfs-tree] [--compare] [--beam-width N] [--json]
+
+--bfs-tree keeps to bfs_optimize's purchase tree, where a building passed over when it becomes affordable
+is not bought again on that branch; without it the search may buy it later, and can finish earlier.
+"""
+import heapq
+import io
+import json
+import math
+import sys
+import time
+from contextlib import redirect_stdout
+from typing import List, Optional, Tuple
+
+from main import BeamPolicy, CookieClickerOptimizer, GameState, PathStep, cli_option, path_from_step
+
+# Relative margin on the production a label gains while waiting, so float rounding cannot make it dominate
+DOMINANCE_EPSILON = 1e-9
+
+
+class _Label:
+    __slots__ = ('state', 'step', 'passed', 'open', 'frame')
+
+    def __init__(self, state: GameState, step: Optional[PathStep], passed: frozenset, frame: Optional[int]):
+        self.state = state
+        self.step = step
+        self.passed = passed  # buildings never to be bought again (bfs_tree only)
+        self.open = True      # still queued for expansion
+        self.frame = frame    # last frame produced at state.time_ms (None: not in phase, never compared)
+
+
+class LabelSearch:
+    """
+    Label-setting search for one goal from a start state (the fresh game by default). run() returns the
+    path and time in bfs_optimize's format, or None when the goal is out of reach (or max_labels is hit).
+    With bfs_tree, a building passed over at the event it became affordable is never bought later, as on
+    bfs_optimize's skip children, so the optimum is the one over bfs_optimize's own purchase tree.
+    """
+
+    def __init__(self, optimizer: CookieClickerOptimizer, goal: float, max_labels: Optional[int] = None,
+                 bfs_tree: bool = False):
+        self.optimizer = optimizer
+        self.goal = goal
+        self.max_labels = max_labels
+        self.bfs_tree = bfs_tree
+        self.expanded = 0
+        self.generated = 0
+        self.dominated = 0   # new labels dropped on arrival
+        self.superseded = 0  # queued labels dropped by a later arrival
+        self.max_queue = 0
+        self.best_step: Optional[PathStep] = None
+        self.best_time: float = math.inf
+        self.stopped = False
+        # (upgrades, building counts) -> labels not dominated by another label of the vector
+        self._labels = {}
+        self._queue = []
+        self._serial = 0
+
+    def _frame(self, state: GameState) -> Optional[int]:
+        """The last frame produced by state.time_ms when state is in phase (clicked and produced up to now)."""
+        t = state.time_ms
+        interval = self.optimizer.ruleset.click_interval_ms
+        if t < 0 or state.last_click_time_ms != t - t % interval or state.cps <= 0:
+            return None
+        frame = max(state.last_production_frame, math.floor((t + 1) / self.optimizer.ms_per_frame) - 1)
+        if frame != state.last_production_frame or self.optimizer._kernels.frame_entry_ms(frame + 1) <= t:
+            return None
+        return frame
+
+    def _dominates(self, label: _Label, other: _Label) -> bool:
+        """label, waiting until other's time if it is earlier, has at least other's bank and baked total."""
+        state, later = label.state, other.state
+        if state.time_ms > later.time_ms or not label.passed <= other.passed:
+            return False
+        if state.time_ms == later.time_ms:
+            return state.cookies >= later.cookies and state.cookies_baked >= later.cookies_baked
+        interval = self.optimizer.ruleset.click_interval_ms
+        clicks = later.time_ms // interval - state.time_ms // interval
+        production = clicks * state.click_power + (other.frame - label.frame) * (state.cps / self.optimizer.fps)
+        keep = 1 - DOMINANCE_EPSILON
+        return ((state.cookies + production) * keep >= later.cookies
+                and (state.cookies_baked + production) * keep >= later.cookies_baked)
+
+    def _add(self, state: GameState, step: Optional[PathStep], passed: frozenset):
+        self.generated += 1
+        label = _Label(state, step, passed, self._frame(state))
+        if label.frame is not None:
+            key = (frozenset(state.upgrades), tuple(sorted(state.buildings.items())))
+            labels = self._labels.setdefault(key, [])
+            for other in labels:
+                if self._dominates(other, label):
+                    self.dominated += 1
+                    return
+            kept = []
+            for other in labels:
+                if self._dominates(label, other):
+                    if other.open:
+                        other.open = False
+                        self.superseded += 1
+                else:
+                    kept.append(other)
+            kept.append(label)
+            self._labels[key] = kept
+        self._serial += 1
+        heapq.heappush(self._queue, (state.time_ms, self._serial, label))
+        self.max_queue = max(self.max_queue, len(self._queue))
+
+    def _walk(self, state: GameState, threshold: float, cursor):
+        optimizer = self.optimizer
+        if optimizer.afford_cache is None:
+            return optimizer._kernels.next_event(
+                state.time_ms, state.cookies, state.cookies_baked, state.last_click_time_ms,
+                state.last_production_frame, state.cps, state.click_power, self.goal, threshold), None
+        if cursor is not None:
+            return optimizer.afford_cache.resume(cursor, self.goal, threshold)
+        return optimizer.afford_cache.walk(
+            state.time_ms, state.cookies, state.cookies_baked, state.last_click_time_ms,
+            state.last_production_frame, state.cps, state.click_power, self.goal, threshold)
+
+    def _expand(self, label: _Label):
+        """One child per option, bought on the millisecond it becomes affordable; a goal time ends the walk."""
+        optimizer = self.optimizer
+        state = label.state
+        options = []
+        for bname in optimizer.buildings:
+            owned = state.buildings.get(bname, 0)
+            if bname not in label.passed and optimizer.max_affordable_qty_by_goal(bname, owned, self.goal) > 0:
+                options.append((optimizer.get_building_cost(bname, owned), bname))
+        options.sort()
+        at, cursor, index, passed = state, None, 0, label.passed
+        while True:
+            threshold = options[index][0] if index < len(options) else math.inf
+            (t, kind, cookies, baked, last_click, last_frame), cursor = self._walk(at, threshold, cursor)
+            at = optimizer._state_at_event(at, t - at.time_ms, cookies, baked, last_click, last_frame)
+            if kind == 'goal':
+                if t < self.best_time:
+                    self.best_time, self.best_step = t, label.step
+                return
+            newly = index
+            while index < len(options) and options[index][0] <= cookies:
+                bname = options[index][1]
+                self._add(optimizer.purchase_multiple(at, bname, 1), PathStep.extend(label.step, bname, 1, t, at),
+                          passed)
+                index += 1
+            if self.bfs_tree:
+                passed = passed.union(bname for _, bname in options[newly:index])
+
+    def run(self, state: Optional[GameState] = None) -> Optional[Tuple[list, int]]:
+        if state is None:
+            state = self.optimizer.fresh_state()
+        if state.cookies_baked >= self.goal:
+            self.best_time = state.time_ms
+            return [], state.time_ms
+        self._add(state, None, frozenset())
+        while self._queue:
+            time_ms, _, label = heapq.heappop(self._queue)
+            if time_ms >= self.best_time:
+                break
+            if not label.open:
+                continue
+            if self.max_labels is not None and self.generated >= self.max_labels:
+                self.stopped = True
+                return None
+            label.open = False
+            self.expanded += 1
+            self._expand(label)
+        if self.best_step is None and math.isinf(self.best_time):
+            return None
+        return path_from_step(self.best_step), self.best_time
+
+    def stats(self) -> dict:
+        return {
+            'expanded': self.expanded,
+            'generated': self.generated,
+            'dominated': self.dominated,
+            'superseded': self.superseded,
+            'vectors': len(self._labels),
+            'labels': sum(len(labels) for labels in self._labels.values()),
+            'max_queue': self.max_queue,
+            'stopped': self.stopped,
+        }
+
+
+def main(argv: List[str]) -> int:
+    argv = list(argv)
+    if not argv or argv[0] in ('-h', '--help'):
+        print(__doc__)
+        return 2
+    max_labels = cli_option(argv, '--max-labels')
+    beam_width = int(cli_option(argv, '--beam-width', 50))
+    flags = {flag: flag in argv for flag in ('--bfs-tree', '--compare', '--json')}
+    argv = [arg for arg in argv if arg not in flags]
+    if len(argv) != 1:
+        print(__doc__)
+        return 2
+    goal = float(argv[0])
+
+    optimizer = CookieClickerOptimizer()
+    search = LabelSearch(optimizer, goal, int(max_labels) if max_labels is not None else None, flags['--bfs-tree'])
+    started = time.perf_counter()
+    result = search.run()
+    record = dict(goal=goal, time_ms=result[1] if result else None, seconds=round(time.perf_counter() - started, 3),
+                  **search.stats())
+    if flags['--compare']:
+        started = time.perf_counter()
+        with redirect_stdout(io.StringIO()):
+            beam = optimizer.bfs_optimize(goal, beam_policy=BeamPolicy(width=beam_width))
+        record['bfs_time_ms'] = beam[1] if beam else None
+        record['bfs_seconds'] = round(time.perf_counter() - started, 3)
+        record['bfs_states_expanded'] = optimizer.last_search_stats['states_expanded']
+    if flags['--json']:
+        record['path'] = [[bname, t] for _, bname, t in result[0]] if result else None
+        print(json.dumps(record))
+        return 0 if result else 1
+    if result is None:
+        print(f"Goal {goal:g}: {'stopped at --max-labels' if search.stopped else 'unreachable'} after "
+              f"{search.expanded} labels expanded", file=sys.stderr)
+        return 1
+    print(f"Goal {goal:g}: {result[1]}ms, {len(result[0])} purchases; {record['expanded']} labels expanded "
+          f"({record['generated']} generated, {record['dominated']} dominated on arrival, {record['superseded']} "
+          f"superseded) over {record['vectors']} building vectors in {record['seconds']:.2f}s")
+    if flags['--compare']:
+        print(f"bfs_optimize (beam {beam_width}): {record['bfs_time_ms']}ms, {record['bfs_states_expanded']} "
+              f"states expanded in {record['bfs_seconds']:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -1,6 +1,9 @@
-from collections import deque
-from dataclasses import dataclass, field
-from typing import List, Tuple, Optional
+from array import array
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field, replace
+from itertools import accumulate
+from typing import List, Tuple, Optional, Union, Callable, NamedTuple, Iterator
+import bisect
 import math
 import json
 import os
@@ -42,6 +45,8 @@ class GameState:
     click_power: float  # current click value
     deferred_options: set = field(default_factory=set)  # set of (building, qty) deferred until next purchase
     upgrades: set = field(default_factory=set)  # set of upgrade names that have been purchased
+    # Search bookkeeping for a skip child: where its first-event simulation can pick up (not copied)
+    skip_cursor: Optional['SkipCursor'] = field(default=None, compare=False, repr=False)
     
     def copy(self):
         return GameState(
@@ -57,6 +62,678 @@ class GameState:
             upgrades=set(self.upgrades)
         )
 
+    def to_snapshot(self) -> dict:
+        """JSON-serializable snapshot (search bookkeeping such as deferred_options is not included)."""
+        return {
+            "cookies": self.cookies,
+            "cookies_baked": self.cookies_baked,
+            "buildings": dict(self.buildings),
+            "upgrades": sorted(self.upgrades),
+            "cps": self.cps,
+            "click_power": self.click_power,
+            "time_ms": self.time_ms,
+            "last_click_time_ms": self.last_click_time_ms,
+            "last_production_frame": self.last_production_frame,
+        }
+
+class SimulationKernels(NamedTuple):
+    """Simulation loops specialized to one Ruleset (see Ruleset.compile)."""
+    frame_entry_ms: Callable[[int], int]
+    advance: Callable[[GameState, int, int], GameState]
+    next_event: Callable[..., Tuple[int, Optional[str], float, float, int, int]]
+
+
+@dataclass(frozen=True)
+class Ruleset:
+    """
+    Timing and pricing rules shared by the simulator and the generated verification page.
+    Defaults are the game's: an auto-click every 20ms from 0ms, CpS paid out over 30 frames per second
+    (frame F starts at the first millisecond t with floor(t / ms_per_frame) >= F) and prices growing
+    by 1.15 per owned building.
+    """
+    click_interval_ms: int = 20
+    fps: int = 30
+    price_increase: float = 1.15
+    purchase_quantities: Tuple[int, ...] = (1, 10, 100)
+
+    @property
+    def ms_per_frame(self) -> float:
+        return 1000 / self.fps
+
+    def frame_at(self, time_ms: int) -> int:
+        """Frame the game is in at time_ms (JS: Math.floor(timeMs / msPerFrame))."""
+        return math.floor(time_ms / self.ms_per_frame)
+
+    def to_js(self) -> dict:
+        """The RULESET constant embedded in verification pages."""
+        return {
+            'clickIntervalMs': self.click_interval_ms,
+            'fps': self.fps,
+            'priceIncrease': self.price_increase,
+            'purchaseQuantities': list(self.purchase_quantities),
+        }
+
+    @classmethod
+    def from_js(cls, data: dict) -> 'Ruleset':
+        return cls(click_interval_ms=int(data['clickIntervalMs']), fps=int(data['fps']),
+                   price_increase=float(data['priceIncrease']),
+                   purchase_quantities=tuple(int(q) for q in data.get('purchaseQuantities', (1, 10, 100))))
+
+    def compile(self) -> SimulationKernels:
+        """
+        Build the simulation loops for these rules with every constant bound as a closure local.
+        Clicks repeat every click_interval_ms. Frame start times are tabulated rather than taken from a
+        fixed period: float division puts some of them a millisecond late (at 30 fps frame 3 starts at
+        101ms and frame 30 at 1001ms), and the table keeps them exactly where the page has them.
+        """
+        interval = self.click_interval_ms
+        fps = self.fps
+        ms_per_frame = self.ms_per_frame
+        floor = math.floor
+        entries = []  # entries[F] = first millisecond of frame F
+
+        def frame_entry_ms(frame: int) -> int:
+            if frame >= len(entries):
+                for f in range(len(entries), max(frame + 1, 2 * len(entries), 256)):
+                    t = math.ceil(f * ms_per_frame)
+                    while t > 0 and floor((t - 1) / ms_per_frame) >= f:
+                        t -= 1
+                    while floor(t / ms_per_frame) < f:
+                        t += 1
+                    entries.append(t)
+            return entries[frame]
+
+        def advance(state: GameState, from_ms: int, to_ms: int) -> GameState:
+            # Same event order as next_event and the page: the click due at from_ms, then for each later
+            # millisecond production on frame entry before the click, so the float sums match bit for bit
+            new_state = state.copy()
+            cookies = new_state.cookies
+            baked = new_state.cookies_baked
+            click_power = new_state.click_power
+            last_click = state.last_click_time_ms
+            t = max(from_ms, 0)
+            if t % interval == 0 and t != last_click and t <= to_ms:
+                cookies += click_power
+                baked += click_power
+                last_click = t
+            next_click = (t // interval + 1) * interval
+
+            # Production when entering each new frame (JavaScript: if (currentFrame > lastProductionFrame &&
+            # cookiesPs > 0) produce). lastProductionFrame only moves when something is produced, so a frame
+            # left behind while CpS was 0 is caught up with a single production on the next millisecond
+            cps = new_state.cps
+            last_frame = state.last_production_frame
+            if cps > 0:
+                last_frame = max(last_frame, floor((t + 1) / ms_per_frame) - 1)
+                next_frame = frame_entry_ms(last_frame + 1)
+                if next_frame <= t:
+                    next_frame = t + 1
+                frame_entry_ms(floor(to_ms / ms_per_frame) + 1)  # fill the table for the loop below
+            else:
+                next_frame = math.inf
+            first_frame = last_frame
+            production = cps / fps
+            while True:
+                t = next_frame if next_frame <= next_click else next_click
+                if t > to_ms:
+                    break
+                if t == next_frame:
+                    cookies += production
+                    baked += production
+                    last_frame += 1
+                    next_frame = entries[last_frame + 1]
+                if t == next_click:
+                    cookies += click_power
+                    baked += click_power
+                    last_click = t
+                    next_click += interval
+            new_state.cookies = cookies
+            new_state.cookies_baked = baked
+            new_state.last_click_time_ms = last_click
+            if last_frame > first_frame:
+                new_state.last_production_frame = last_frame
+            new_state.time_ms = to_ms
+            return new_state
+
+        def next_event(t: int, cookies: float, baked: float, last_click: int, last_frame: int, cps: float,
+                       click_power: float, goal: float, threshold: float):
+            """
+            Step clicks and frames from t until baked >= goal ('goal') or cookies >= threshold ('afford').
+            Returns (t, kind, cookies, baked, last_click, last_frame); the goal wins a tie.
+            """
+            # Deterministic click at the current time if it is a click time
+            if t % interval == 0 and t >= 0 and t != last_click:
+                cookies += click_power
+                baked += click_power
+                last_click = t
+            if baked >= goal:
+                return t, 'goal', cookies, baked, last_click, last_frame
+            if cookies >= threshold:
+                return t, 'afford', cookies, baked, last_click, last_frame
+
+            next_click = (t // interval + 1) * interval
+            # Without CpS frames change nothing, so they are not stepped (last_frame stays put). A last_frame
+            # left behind that way produces once on the next millisecond and then continues from its frame
+            if cps > 0:
+                last_frame = max(last_frame, floor((t + 1) / ms_per_frame) - 1)
+                next_frame = frame_entry_ms(last_frame + 1)
+                if next_frame <= t:
+                    next_frame = t + 1
+            else:
+                next_frame = math.inf
+            production = cps / fps
+            while True:
+                t = next_frame if next_frame <= next_click else next_click
+                if t == next_frame:
+                    cookies += production
+                    baked += production
+                    last_frame += 1
+                    next_frame = frame_entry_ms(last_frame + 1)
+                if t == next_click:
+                    cookies += click_power
+                    baked += click_power
+                    last_click = t
+                    next_click += interval
+                if baked >= goal:
+                    return t, 'goal', cookies, baked, last_click, last_frame
+                if cookies >= threshold:
+                    return t, 'afford', cookies, baked, last_click, last_frame
+
+        return SimulationKernels(frame_entry_ms, advance, next_event)
+
+
+class _PeriodBlock:
+    """The additions of whole periods for one (cps, click power, frame pattern), repeated as far as needed."""
+    __slots__ = ('adds', 'per_period', 'period_sum', 'group_ends', 'offsets', 'frames')
+
+    def __init__(self, adds: list, group_ends: list, offsets: list, frames: list):
+        self.adds = adds              # additions in the page's order (frame before click on a shared ms)
+        self.per_period = len(adds)
+        self.period_sum = sum(adds)
+        self.group_ends = group_ends  # per event time of a period: its additions done once its events are applied
+        self.offsets = offsets        # per event time of a period: ms after the period start
+        self.frames = frames          # per event time of a period: frames produced so far in the period
+
+    def grow(self, periods: int):
+        if periods * self.per_period > len(self.adds):
+            self.adds = self.adds[:self.per_period] * periods
+
+
+class WalkCursor(NamedTuple):
+    """Where a TimeToAffordCache walk stopped inside a summed run, for TimeToAffordCache.resume."""
+    period: int          # first period of the run
+    last_click: int      # last click and last frame at the start of the run
+    last_frame: int
+    cps: float
+    click_power: float
+    pattern: Optional[int]  # frame pattern of the run's block (None without production)
+    periods: int         # periods summed in the run
+    cookies: float       # bank and baked total at the stop
+    baked: float
+    base: int            # index of the stop among the run's additions (the sums after it are redone on resume)
+
+
+class TimeToAffordCache:
+    """
+    Bounded memo for the next_event walk. Clicks and frame starts repeat every period_ms, so from a period
+    start the walk's additions are one period's template over and over, and they depend only on cps, click
+    power and the period's frame start offsets. Float division starts some frames a millisecond late,
+    over runs of periods, so periods come in a few offset patterns. The repeated additions are stored per
+    (cps, click power, pattern), shared by every state with that cps and click power. A query steps the
+    kernel's loop up to the next period start, then sums the stored additions from its own bank and baked
+    count with itertools.accumulate. Sums of positive additions never decrease, so bisecting them finds the
+    crossing, and the sums are the kernel's bit for bit. Only the cookies short (the deficit) differ between
+    the states sharing a block.
+    Blocks are evicted least recently used once there are max_blocks of them or they hold more than
+    max_stored_additions additions between them.
+    """
+
+    def __init__(self, ruleset: 'Ruleset', kernels: SimulationKernels, max_blocks: int = 4096,
+                 max_stored_additions: int = 1 << 22, max_chunk_periods: int = 1 << 14):
+        self.interval = ruleset.click_interval_ms
+        self.fps = ruleset.fps
+        self.ms_per_frame = ruleset.ms_per_frame
+        frame_period_ms = 1000 // math.gcd(1000, self.fps)
+        self.period_ms = self.interval * frame_period_ms // math.gcd(self.interval, frame_period_ms)
+        self.frames_per_period = self.period_ms * self.fps // 1000
+        self.max_blocks = max_blocks
+        self.max_stored_additions = max_stored_additions
+        self.max_chunk_periods = max_chunk_periods  # periods summed per accumulate pass
+        self._frame_entry_ms = kernels.frame_entry_ms
+        self._kernel_next_event = kernels.next_event
+        self._patterns = []                # frame start offsets within a period, one tuple per pattern seen
+        self._pattern_ids = {}
+        self._period_pattern = array('q')  # pattern index of each period scanned so far
+        self._pattern_changes = []         # periods whose pattern differs from the period before
+        self._blocks = OrderedDict()
+        self._stored = 0
+        self.lookups = self.hits = self.evictions = self.fallbacks = 0
+        self.resumed = 0
+        self.stepped = self.summed = 0  # events stepped one at a time, additions summed from blocks
+
+    def stats(self) -> dict:
+        return {
+            'lookups': self.lookups,
+            'hits': self.hits,
+            'hit_rate': self.hits / self.lookups if self.lookups else 0.0,
+            'evictions': self.evictions,
+            'fallbacks': self.fallbacks,
+            'resumed': self.resumed,
+            'stepped': self.stepped,
+            'summed': self.summed,
+            'blocks': len(self._blocks),
+            'stored_additions': self._stored,
+        }
+
+    def _pattern(self, period: int) -> int:
+        """Pattern index of a period, scanning the frame table up to it."""
+        per_period = self.frames_per_period
+        while period >= len(self._period_pattern):
+            q = len(self._period_pattern)
+            offsets = tuple(self._frame_entry_ms(q * per_period + r) - q * self.period_ms for r in range(per_period))
+            pattern = self._pattern_ids.setdefault(offsets, len(self._patterns))
+            if pattern == len(self._patterns):
+                self._patterns.append(offsets)
+            if q and pattern != self._period_pattern[q - 1]:
+                self._pattern_changes.append(q)
+            self._period_pattern.append(pattern)
+        return self._period_pattern[period]
+
+    def _block(self, cps: float, click_power: float, pattern: int, periods: int) -> _PeriodBlock:
+        key = (cps, click_power, pattern)
+        self.lookups += 1
+        block = self._blocks.get(key)
+        if block is None:
+            events = {}  # ms within the period -> additions, frame first
+            if cps > 0:
+                for offset in self._patterns[pattern]:
+                    events.setdefault(offset, []).append(cps / self.fps)
+            for offset in range(0, self.period_ms, self.interval):
+                events.setdefault(offset, []).append(click_power)
+            adds, group_ends, offsets, frames = [], [], [], []
+            produced = 0
+            for offset in sorted(events):
+                produced += len(events[offset]) - (offset % self.interval == 0)
+                adds.extend(events[offset])
+                group_ends.append(len(adds))
+                offsets.append(offset)
+                frames.append(produced)
+            block = self._blocks[key] = _PeriodBlock(adds, group_ends, offsets, frames)
+            self._stored += len(adds)
+        else:
+            self.hits += 1
+            self._blocks.move_to_end(key)
+        if periods * block.per_period > len(block.adds):
+            self._stored -= len(block.adds)
+            block.grow(max(periods, 2 * len(block.adds) // block.per_period))
+            self._stored += len(block.adds)
+        while len(self._blocks) > self.max_blocks or (self._stored > self.max_stored_additions
+                                                      and len(self._blocks) > 1):
+            _, evicted = self._blocks.popitem(last=False)
+            self._stored -= len(evicted.adds)
+            self.evictions += 1
+        return block
+
+    def next_event(self, t: int, cookies: float, baked: float, last_click: int, last_frame: int, cps: float,
+                   click_power: float, goal: float, threshold: float):
+        """Same arguments and result as the next_event kernel."""
+        return self.walk(t, cookies, baked, last_click, last_frame, cps, click_power, goal, threshold)[0]
+
+    def walk(self, t: int, cookies: float, baked: float, last_click: int, last_frame: int, cps: float,
+             click_power: float, goal: float, threshold: float) -> Tuple[tuple, Optional[WalkCursor]]:
+        """
+        next_event's result and a WalkCursor to continue from it with a later goal or threshold (None when
+        the walk did not stop inside a summed run).
+        """
+        args = (t, cookies, baked, last_click, last_frame, cps, click_power, goal, threshold)
+        if t < 0 or (math.isinf(goal) and math.isinf(threshold)) or (cps <= 0 and click_power <= 0):
+            return self._kernel_next_event(*args), None
+        interval, floor = self.interval, math.floor
+        # The kernel's loop up to the next period start: the click due now, a lagging frame's catch-up
+        if t % interval == 0 and t != last_click:
+            cookies += click_power
+            baked += click_power
+            last_click = t
+        if baked >= goal:
+            return (t, 'goal', cookies, baked, last_click, last_frame), None
+        if cookies >= threshold:
+            return (t, 'afford', cookies, baked, last_click, last_frame), None
+        next_click = (t // interval + 1) * interval
+        if cps > 0:
+            last_frame = max(last_frame, floor((t + 1) / self.ms_per_frame) - 1)
+            next_frame = self._frame_entry_ms(last_frame + 1)
+            if next_frame <= t:
+                next_frame = t + 1
+        else:
+            next_frame = math.inf
+        production = cps / self.fps
+        period = t // self.period_ms + 1
+        period_start = period * self.period_ms
+        while True:
+            t = next_frame if next_frame <= next_click else next_click
+            if t >= period_start:
+                break
+            self.stepped += 1
+            if t == next_frame:
+                cookies += production
+                baked += production
+                last_frame += 1
+                next_frame = self._frame_entry_ms(last_frame + 1)
+            if t == next_click:
+                cookies += click_power
+                baked += click_power
+                last_click = t
+                next_click += interval
+            if baked >= goal:
+                return (t, 'goal', cookies, baked, last_click, last_frame), None
+            if cookies >= threshold:
+                return (t, 'afford', cookies, baked, last_click, last_frame), None
+        if cps > 0 and last_frame + 1 != period * self.frames_per_period:
+            self.fallbacks += 1
+            return self._kernel_next_event(*args), None
+        return self._periods(period, cookies, baked, last_click, last_frame, cps, click_power, goal, threshold)
+
+    def resume(self, cursor: WalkCursor, goal: float, threshold: float) -> Tuple[tuple, Optional[WalkCursor]]:
+        """
+        walk() from the state cursor stopped at, without stepping or summing again what is left of its run.
+        The state must not have changed since (no purchase), and nothing the stop satisfied may be asked again.
+        """
+        self.resumed += 1
+        return self._periods(cursor.period, None, None, cursor.last_click, cursor.last_frame, cursor.cps,
+                             cursor.click_power, goal, threshold, cursor)
+
+    def _periods(self, period: int, cookies: Optional[float], baked: Optional[float], last_click: int,
+                 last_frame: int, cps: float, click_power: float, goal: float, threshold: float,
+                 cursor: Optional[WalkCursor] = None) -> Tuple[tuple, Optional[WalkCursor]]:
+        """Whole periods from the start of period, one run of same-pattern periods at a time (or cursor's run first)."""
+        interval = self.interval
+        period_start = period * self.period_ms
+        while True:
+            if cursor is not None:
+                # The block is looked up again rather than held, so cursors never keep evicted blocks alive
+                pattern, needed, base = cursor.pattern, cursor.periods, cursor.base
+                block = self._block(cps, click_power, pattern, needed)
+                adds = block.adds[base:needed * block.per_period]
+                banked = list(accumulate(adds, initial=cursor.cookies))
+                baked_sums = list(accumulate(adds, initial=cursor.baked))
+                self.summed += len(adds)
+                start = 0
+                cursor = None
+            else:
+                if cps > 0:
+                    pattern = self._pattern(period)
+                    block = self._blocks.get((cps, click_power, pattern))
+                    per_period_sum = block.period_sum if block is not None else cps * self.period_ms / 1000
+                else:
+                    pattern = None
+                    block = None
+                    per_period_sum = 0.0
+                per_period_sum += click_power * (self.period_ms // interval)
+                needed = min(int(min(goal - baked, threshold - cookies) / per_period_sum) + 2, self.max_chunk_periods)
+                if cps > 0:
+                    self._pattern(period + needed)
+                    change = bisect.bisect_right(self._pattern_changes, period)
+                    if change < len(self._pattern_changes):
+                        needed = min(needed, self._pattern_changes[change] - period)
+                block = self._block(cps, click_power, pattern, needed)
+                adds = block.adds[:needed * block.per_period]
+                banked = list(accumulate(adds, initial=cookies))
+                baked_sums = list(accumulate(adds, initial=baked))
+                self.summed += len(adds)
+                base, start = 0, 1
+            count = needed * block.per_period
+            # First addition at or past each target, then the event time it belongs to
+            reached_goal = bisect.bisect_left(baked_sums, goal, start)
+            reached_afford = bisect.bisect_left(banked, threshold, start)
+            first = base + min(reached_goal, reached_afford)
+            if first <= count:
+                q, index = divmod(first - 1, block.per_period)
+                within = bisect.bisect_right(block.group_ends, index)
+                end = q * block.per_period + block.group_ends[within]
+                at = end - base
+                kind = 'goal' if baked_sums[at] >= goal else 'afford'
+                time_ms = (period + q) * self.period_ms + block.offsets[within]
+                click = time_ms - time_ms % interval
+                stop_click = click if click >= period_start else last_click
+                stop_frame = last_frame + q * self.frames_per_period + block.frames[within] if cps > 0 else last_frame
+                return ((time_ms, kind, banked[at], baked_sums[at], stop_click, stop_frame),
+                        WalkCursor(period, last_click, last_frame, cps, click_power, pattern, needed, banked[at],
+                                   baked_sums[at], end))
+            cookies, baked = banked[-1], baked_sums[-1]
+            if cps > 0:
+                last_frame += needed * self.frames_per_period
+            last_click = (period + needed) * self.period_ms - interval
+            period += needed
+            period_start = period * self.period_ms
+
+
+class SkipCursor(NamedTuple):
+    """
+    What a skip child's first-event simulation would rebuild: the purchase options left once the newly
+    affordable ones are deferred, cheapest first, and where the parent's walk stopped (None to walk afresh).
+    """
+    goal: Optional[float]
+    option_ranges: list  # (building, prefix sums, owned count, ub), ordered by the price of one more
+    walk: Optional[WalkCursor]
+
+
+class PathStep(NamedTuple):
+    """One purchase group on a search path, linked to the previous group (None at the root)."""
+    parent: Optional['PathStep']
+    building: str
+    qty: int
+    time_ms: int
+    state_before: GameState  # search state right before the purchase (exports reuse it instead of re-simulating)
+    units: int  # unit purchases on the path up to and including this step
+    key: int  # running hash of the unit-purchase history (equal histories hash equal)
+
+    @staticmethod
+    def extend(parent: Optional['PathStep'], building: str, qty: int, time_ms: int, state_before: GameState) -> 'PathStep':
+        key = parent.key if parent is not None else 0
+        for _ in range(qty):
+            key = hash((key, building, time_ms))
+        units = (parent.units if parent is not None else 0) + qty
+        return PathStep(parent, building, qty, time_ms, state_before, units, key)
+
+def path_steps(step: Optional[PathStep]) -> List[PathStep]:
+    """Steps from the root to step, in purchase order."""
+    steps = []
+    while step is not None:
+        steps.append(step)
+        step = step.parent
+    steps.reverse()
+    return steps
+
+def path_from_step(step: Optional[PathStep]) -> List[Tuple[str, str, int]]:
+    """Unit purchases in the bfs_optimize path format: ('buy', building, time_ms)."""
+    path = []
+    for s in path_steps(step):
+        path.extend([('buy', s.building, s.time_ms)] * s.qty)
+    return path
+
+@dataclass
+class SolutionTrace:
+    """Winning path of a search together with the states the search already computed along it."""
+    last_step: Optional[PathStep]
+    total_time_ms: int
+    final_state: GameState  # state at total_time_ms
+
+    def path(self) -> List[Tuple[str, str, int]]:
+        return path_from_step(self.last_step)
+
+    def iter_purchases(self, optimizer: 'CookieClickerOptimizer') -> Iterator[Tuple[str, int, float, GameState]]:
+        """Yield (building, time_ms, cost, state_after) per unit purchase without advancing time."""
+        for step in path_steps(self.last_step):
+            state = step.state_before
+            for _ in range(step.qty):
+                cost = optimizer.get_building_cost(step.building, state.buildings.get(step.building, 0))
+                state = optimizer.purchase_building(state, step.building)
+                yield step.building, step.time_ms, cost, state
+
+@dataclass
+class BeamPolicy:
+    """How many states survive each time bucket in bfs_optimize, and how they are ranked."""
+    width: int = 50  # states kept per time bucket
+    min_width: int = 10  # floor when narrowing under memory pressure
+    max_width: int = 400  # ceiling when widening with spare budget
+    frontier_budget: Optional[int] = None  # global memory budget in queued states (None = fixed width)
+    score: Union[str, Callable[['GameState'], float]] = 'baked'  # 'baked', 'projected', 'cps_weighted' or a callable
+    horizon_ms: int = 10000  # look-ahead for the 'projected' score
+    cps_weight: float = 60.0  # seconds of production one unit of cps is worth for 'cps_weighted'
+    track_drops: bool = True  # record dropped states' purchase histories (incumbent prefix drops, audit_truncation)
+    pareto: bool = False  # keep non-dominated (baked, bank, cps) layers first; score orders states within a layer
+    front_times: Tuple[int, ...] = ()  # record the bucket's Pareto front at the first bucket at or after each time
+    merge_duplicates: bool = True  # merge children with the same state signature as they are queued
+
+    def score_key(self) -> Callable[['GameState'], float]:
+        """Return the ranking key for this policy (higher is better)."""
+        if callable(self.score):
+            return self.score
+        if self.score == 'baked':
+            return lambda s: s.cookies_baked
+        if self.score == 'projected':
+            # Cookies baked by the horizon if nothing else is bought (clicks every 20ms -> 50/s)
+            horizon_s = self.horizon_ms / 1000
+            return lambda s: s.cookies_baked + (s.cps + 50 * s.click_power) * horizon_s
+        if self.score == 'cps_weighted':
+            return lambda s: s.cookies + s.cps * self.cps_weight
+        raise ValueError(f"Unknown beam score: {self.score!r}")
+
+    def adjust_width(self, width: int, frontier_size: int) -> int:
+        """Narrow when the queued frontier exceeds the budget, widen when it is well under it."""
+        if self.frontier_budget is None:
+            return width
+        if frontier_size > self.frontier_budget:
+            return max(self.min_width, (width * 3) // 4)
+        if frontier_size < self.frontier_budget // 2:
+            return min(self.max_width, width + max(1, width // 4))
+        return width
+
+    def select(self, entries: list, width: int, score_key: Callable[['GameState'], float]) -> Tuple[list, list]:
+        """
+        Split a bucket's queue entries (state first) into (kept, dropped). Entries are ranked by score;
+        in Pareto mode whole non-dominated layers are kept first and the score only decides within the
+        layer that crosses width.
+        """
+        entries.sort(key=lambda x: score_key(x[0]), reverse=True)
+        if len(entries) <= width:
+            return entries, []
+        if not self.pareto:
+            return entries[:width], entries[width:]
+        kept = []
+        remaining = entries
+        while len(kept) < width:
+            front = pareto_front([e[0] for e in remaining])
+            taken = set(front[:width - len(kept)])
+            kept.extend(remaining[i] for i in sorted(taken))
+            remaining = [e for i, e in enumerate(remaining) if i not in taken]
+        return kept, remaining
+
+class FrontierBucket(list):
+    """
+    One bfs_optimize time bucket: (state, PathStep|None, order) entries kept in increasing order. Entries
+    pushed with a key are merged on it: a child with the same key as one already queued is folded into it
+    instead of taking a beam slot. Keys leave out the bank, which is the only thing equal keys can differ in
+    (the cookies spent follow from the buildings owned), so the entry kept is the one with the larger bank,
+    then the smaller order, and the bucket does not depend on the order children arrive in.
+    """
+    __slots__ = ('keys', 'pushed', 'merged')
+
+    def __init__(self):
+        super().__init__()
+        self.keys = {}    # merge key -> entry queued with it
+        self.pushed = 0   # children pushed, merged ones included
+        self.merged = 0
+
+    def push(self, entry: tuple, key: Optional[tuple] = None) -> bool:
+        """Queue entry; False when it was merged into an equivalent entry (the bucket did not grow)."""
+        self.pushed += 1
+        queued = self.keys.get(key) if key is not None else None
+        if queued is not None:
+            self.merged += 1
+            bank = (entry[0].cookies, entry[0].cookies_baked)
+            queued_bank = (queued[0].cookies, queued[0].cookies_baked)
+            if bank < queued_bank or (bank == queued_bank and entry[2] > queued[2]):
+                return False
+            del self[next(i for i, e in enumerate(self) if e is queued)]
+        if key is not None:
+            self.keys[key] = entry
+        self._insert(entry)
+        return queued is None
+
+    def _insert(self, entry: tuple):
+        order = entry[2]
+        if self and self[-1][2] > order:
+            index = len(self)
+            while index and self[index - 1][2] > order:
+                index -= 1
+            self.insert(index, entry)
+        else:
+            self.append(entry)
+
+def pareto_front(states: List['GameState']) -> List[int]:
+    """
+    Indices (ascending) of the states not dominated on (cookies_baked, cookies, cps), all maximized.
+    Sweep in decreasing baked order over a (bank, cps) staircase: O(n log n) comparisons.
+    """
+    order = sorted(range(len(states)), key=lambda i: (states[i].cookies_baked, states[i].cookies, states[i].cps),
+                   reverse=True)
+    stair_bank = []  # bank ascending
+    stair = []  # (bank, cps, baked), cps strictly descending as bank ascends
+    front = []
+    for i in order:
+        s = states[i]
+        j = bisect.bisect_left(stair_bank, s.cookies)
+        # stair[j] has the highest cps among swept points with bank >= s.cookies
+        if j < len(stair) and stair[j][1] >= s.cps:
+            if stair[j] == (s.cookies, s.cps, s.cookies_baked):
+                front.append(i)  # an exact copy does not dominate
+            continue
+        front.append(i)
+        end = j + 1 if j < len(stair) and stair[j][0] == s.cookies else j
+        start = j
+        while start > 0 and stair[start - 1][1] <= s.cps:
+            start -= 1
+        stair_bank[start:end] = [s.cookies]
+        stair[start:end] = [(s.cookies, s.cps, s.cookies_baked)]
+    front.sort()
+    return front
+
+@dataclass
+class SearchContext:
+    """
+    Resumable bfs_optimize state. Pass one instance to successive calls with non-decreasing goals:
+    every bucket a search processed lies before its first goal crossing, so it is processed the same way
+    for any larger goal. A follow-up call only re-expands the states that stopped at the old goal
+    ("parked") and continues with the untouched frontier, returning what a cold search would.
+    Calls with a smaller goal, another max_time_ms, beam policy, option policy or start state, or a
+    policy with frontier_budget (its width depends on the whole frontier) start over and refill the context.
+    """
+    goal: Optional[float] = None
+    max_time_ms: Optional[int] = None
+    policy: Optional[BeamPolicy] = None
+    initial_state: Optional[GameState] = None
+    option_policy: Optional[str] = None  # optimizer.option_policy the search ran with
+    states_by_time: dict = field(default_factory=dict)  # {time_ms: FrontierBucket of (state, PathStep|None, order)}
+    visited: set = field(default_factory=set)
+    parked: list = field(default_factory=list)  # [(order, state, PathStep|None, already_visited), ...]
+    frontier_size: int = 0
+    width: int = 0
+    depth: int = 0
+    states_expanded: int = 0
+    beam_report: dict = field(default_factory=dict)
+    dropped_paths: dict = field(default_factory=dict)
+    pareto_fronts: list = field(default_factory=list)
+    solution: Optional[SolutionTrace] = None  # incumbent for goal
+    searches: int = 0  # calls that started from scratch
+    resumes: int = 0  # calls that continued this context
+
+    def can_resume(self, goal_cookies: float, max_time_ms: Optional[int], policy: BeamPolicy,
+                   initial_state: Optional[GameState], option_policy: str = 'all') -> bool:
+        return (self.goal is not None and goal_cookies >= self.goal and max_time_ms == self.max_time_ms
+                and policy == self.policy and policy.frontier_budget is None and initial_state == self.initial_state
+                and option_policy == self.option_policy)
+
 def _build_js_building_name(py_name: str) -> str:
     mapping = {
         'cursor': 'Cursor',
@@ -69,12 +746,52 @@ def _build_js_building_name(py_name: str) -> str:
         'wizard_tower': 'Wizard tower',
         'shipment': 'Shipment',
         'alchemy_lab': 'Alchemy lab',
+        'portal': 'Portal',
+        'time_machine': 'Time machine',
+        'antimatter_condenser': 'Antimatter condenser',
+        'prism': 'Prism',
+        'chancemaker': 'Chancemaker',
+        'fractal_engine': 'Fractal engine',
+        'javascript_console': 'Javascript console',
+        'idleverse': 'Idleverse',
+        'cortex_baker': 'Cortex baker',
+        'you': 'You',
     }
     return mapping.get(py_name, py_name)
 
 
-def _generate_verification_html(output_path: str, goal: float, total_time_ms: int, path_json: list, predicted_buildings_js: dict):
+def building_tables_js(buildings: Optional[dict] = None) -> Tuple[str, str]:
+    """
+    Game.Objects entries and the NAME_MAP literal for a building table (default: the optimizer's), ordered by
+    id, so a verification page prices and produces exactly what the search did.
+    """
+    if buildings is None:
+        buildings = CookieClickerOptimizer().buildings
+    ordered = sorted(buildings.values(), key=lambda b: b.id)
+    name_map = {b.name: _build_js_building_name(b.name) for b in ordered}
+    objects_js = ',\n'.join(
+        f"                    {json.dumps(name_map[b.name])}: {{ name: {json.dumps(name_map[b.name])}, id: {b.id}, "
+        f"basePrice: {json.dumps(b.base_cost)}, baseCps: {json.dumps(b.base_cps)}, amount: 0, "
+        f"priceIncrease: RULESET.priceIncrease, produced: 0, "
+        f"buy: function() {{ return Game.buyBuilding({json.dumps(name_map[b.name])}); }} }}"
+        for b in ordered
+    )
+    return objects_js, json.dumps(name_map)
+
+
+def _generate_verification_html(output_path: str, goal: float, total_time_ms: int, path_json: list, predicted_buildings_js: dict,
+                                buildings: Optional[dict] = None, verify_only: bool = False,
+                                ruleset: Optional[Ruleset] = None):
+    """
+    Write the auto-verification page. The embedded TASController jumps straight between click, frame and
+    purchase events and renders at most once per animation frame; with verify_only (or ?verify in the URL)
+    it replays the whole path synchronously and only touches the DOM for the final report.
+    Click interval, frame rate and price increase come from ruleset (embedded as RULESET).
+    """
     total_actions = len(path_json)
+    if ruleset is None:
+        ruleset = Ruleset()
+    objects_js, name_map_js = building_tables_js(buildings)
     html = f'''<!DOCTYPE html>
 <html lang="en">
 <head>
@@ -140,22 +857,24 @@ def _generate_verification_html(output_path: str, goal: float, total_time_ms: in
         const GOAL_COOKIES = {goal};
         const EXPECTED_TIME = {total_time_ms};
         const PREDICTED_BUILDINGS = {json.dumps(predicted_buildings_js)};
-        const PREDICTED_FRAMES = Math.floor(EXPECTED_TIME / (1000/30));
+        const RULESET = {json.dumps(ruleset.to_js())};
+        const PREDICTED_FRAMES = Math.floor(EXPECTED_TIME / (1000/RULESET.fps));
+        const NAME_MAP = {name_map_js};
+        const VERIFY_ONLY = {json.dumps(verify_only)} || /[?&]verify\b/.test(window.location.search);
 
         var Game = {{
             cookies: 0,
             cookiesEarned: 0,
             cookiesPs: 0,
             cookieClicks: 0,
-            fps: 30,
+            fps: RULESET.fps,
             Objects: {{}},
             gameLoopInterval: null,
+            renderPending: false,
 
             init: function(skipBuildUI) {{
                 this.Objects = {{
-                    'Cursor': {{ name: 'Cursor', id: 0, basePrice: 15, baseCps: 0.1, amount: 0, priceIncrease: 1.15, produced: 0, buy: function() {{ return Game.buyBuilding('Cursor'); }} }},
-                    'Grandma': {{ name: 'Grandma', id: 1, basePrice: 100, baseCps: 1, amount: 0, priceIncrease: 1.15, produced: 0, buy: function() {{ return Game.buyBuilding('Grandma'); }} }},
-                    'Farm': {{ name: 'Farm', id: 2, basePrice: 1100, baseCps: 8, amount: 0, priceIncrease: 1.15, produced: 0, buy: function() {{ return Game.buyBuilding('Farm'); }} }}
+{objects_js}
                 }};
                 if (!skipBuildUI) this.buildUI();
                 this.startGameLoop();
@@ -185,7 +904,7 @@ def _generate_verification_html(output_path: str, goal: float, total_time_ms: in
 
             buyBuilding: function(buildingName) {{
                 var obj = this.Objects[buildingName]; var price = this.getPrice(buildingName);
-                if (this.cookies >= price) {{ this.cookies -= price; obj.amount++; this.recalculateCps(); this.updateUI(); return true; }}
+                if (this.cookies >= price) {{ this.cookies -= price; obj.amount++; this.recalculateCps(); this.scheduleRender(); return true; }}
                 return false;
             }},
 
@@ -200,6 +919,13 @@ def _generate_verification_html(output_path: str, goal: float, total_time_ms: in
             startGameLoop: function() {{ var self=this; this.gameLoopInterval = setInterval(function() {{ self.Logic(); self.updateUI(); }}, 1000/ self.fps); }},
             stopGameLoop: function() {{ if (this.gameLoopInterval) {{ clearInterval(this.gameLoopInterval); this.gameLoopInterval=null; }} }},
 
+            // Coalesce DOM updates into one per animation frame; verify-only runs render once at the end
+            scheduleRender: function() {{
+                if (VERIFY_ONLY || this.renderPending) return;
+                this.renderPending = true;
+                requestAnimationFrame(function() {{ Game.renderPending = false; Game.updateUI(); TASController.updateDisplay(); }});
+            }},
+
             updateUI: function() {{
                 var cookiesDisplay = document.getElementById('cookiesDisplay');
                 var cpsDisplay = document.getElementById('cpsDisplay');
@@ -221,10 +947,11 @@ def _generate_verification_html(output_path: str, goal: float, total_time_ms: in
             timeMs: 0,
             cookiesBaked: 0,
             cookiesFromClicks: 0,
-            lastClickTimeMs: -20,
+            lastClickTimeMs: -RULESET.clickIntervalMs,
             lastProductionFrame: -1,
-            fps: 30,
-            msPerFrame: 1000/30,
+            fps: RULESET.fps,
+            msPerFrame: 1000/RULESET.fps,
+            clickInterval: RULESET.clickIntervalMs,
             automatedPath: null,
             automatedCurrentStep: 0,
             automatedRunning: false,
@@ -233,104 +960,124 @@ def _generate_verification_html(output_path: str, goal: float, total_time_ms: in
             init: function() {{ this.updateDisplay(); }},
             log: function(msg, type) {{ var logDiv=document.getElementById('log'); var entry=document.createElement('div'); entry.className=type||''; entry.textContent=msg; logDiv.appendChild(entry); logDiv.scrollTop=logDiv.scrollHeight; console.log(msg); }},
 
-            advanceOneMs: function() {{ this.timeMs+=1; var currentFrame=Math.floor(this.timeMs/this.msPerFrame); if (currentFrame>this.lastProductionFrame && Game.cookiesPs>0) {{ var productionThisFrame=Game.cookiesPs/this.fps; Game.cookies+=productionThisFrame; Game.cookiesEarned+=productionThisFrame; this.cookiesBaked+=productionThisFrame; this.lastProductionFrame=currentFrame; for (var n in Game.Objects) {{ var o=Game.Objects[n]; if (o.amount>0) o.produced += (o.amount*o.baseCps)/this.fps; }} }} this.autoClick(); Game.updateUI(); this.updateDisplay(); }},
+            advanceOneMs: function() {{ this.timeMs+=1; var currentFrame=Math.floor(this.timeMs/this.msPerFrame); if (currentFrame>this.lastProductionFrame && Game.cookiesPs>0) this.produce(currentFrame); this.autoClick(); Game.scheduleRender(); }},
 
-            autoClick: function() {{ if (this.timeMs % 20 === 0 && this.timeMs !== this.lastClickTimeMs) {{ var clickPower=1; Game.cookies+=clickPower; Game.cookiesEarned+=clickPower; Game.cookieClicks++; this.cookiesBaked+=clickPower; this.cookiesFromClicks+=clickPower; this.lastClickTimeMs=this.timeMs; }} }},
+            produce: function(frame) {{ var productionThisFrame=Game.cookiesPs/this.fps; Game.cookies+=productionThisFrame; Game.cookiesEarned+=productionThisFrame; this.cookiesBaked+=productionThisFrame; this.lastProductionFrame=frame; for (var n in Game.Objects) {{ var o=Game.Objects[n]; if (o.amount>0) o.produced += (o.amount*o.baseCps)/this.fps; }} }},
 
-            clickCookie: function() {{ if (this.timeMs - this.lastClickTimeMs < 20) return false; var clickPower=1; Game.cookies+=clickPower; Game.cookiesEarned+=clickPower; Game.cookieClicks++; this.cookiesBaked+=clickPower; this.cookiesFromClicks+=clickPower; this.lastClickTimeMs=this.timeMs; Game.updateUI(); this.updateDisplay(); return true; }},
+            // Smallest millisecond t with Math.floor(t/msPerFrame) >= frame (same test advanceOneMs uses)
+            frameEntryMs: function(frame) {{ var t=Math.ceil(frame*this.msPerFrame); while (t>0 && Math.floor((t-1)/this.msPerFrame)>=frame) t--; while (Math.floor(t/this.msPerFrame)<frame) t++; return t; }},
 
-            buyBuilding: function(buildingName) {{ var map={{'cursor':'Cursor','grandma':'Grandma','farm':'Farm','mine':'Mine','factory':'Factory','bank':'Bank','temple':'Temple','wizard_tower':'Wizard tower','shipment':'Shipment','alchemy_lab':'Alchemy lab'}}; var jsName=map[buildingName]||buildingName; if (Game.Objects[jsName]) return Game.Objects[jsName].buy(); return false; }},
+            // Same result as: while (this.timeMs < target) this.advanceOneMs(); but only visits click and frame events
+            advanceTo: function(target) {{
+                if (this.timeMs >= target) return;
+                var nextClick = (Math.floor(this.timeMs/this.clickInterval)+1)*this.clickInterval;
+                var nextProd = Infinity;
+                if (Game.cookiesPs > 0) nextProd = Math.floor((this.timeMs+1)/this.msPerFrame) > this.lastProductionFrame ? this.timeMs+1 : this.frameEntryMs(this.lastProductionFrame+1);
+                while (true) {{
+                    var u = nextProd < nextClick ? nextProd : nextClick;
+                    if (u > target) break;
+                    this.timeMs = u;
+                    if (u === nextProd) {{ this.produce(Math.floor(u/this.msPerFrame)); nextProd = this.frameEntryMs(this.lastProductionFrame+1); }}
+                    if (u === nextClick) {{ this.autoClick(); nextClick += this.clickInterval; }}
+                }}
+                this.timeMs = target;
+                Game.scheduleRender();
+            }},
+
+            autoClick: function() {{ if (this.timeMs % this.clickInterval === 0 && this.timeMs !== this.lastClickTimeMs) {{ var clickPower=1; Game.cookies+=clickPower; Game.cookiesEarned+=clickPower; Game.cookieClicks++; this.cookiesBaked+=clickPower; this.cookiesFromClicks+=clickPower; this.lastClickTimeMs=this.timeMs; }} }},
+
+            clickCookie: function() {{ if (this.timeMs - this.lastClickTimeMs < this.clickInterval) return false; var clickPower=1; Game.cookies+=clickPower; Game.cookiesEarned+=clickPower; Game.cookieClicks++; this.cookiesBaked+=clickPower; this.cookiesFromClicks+=clickPower; this.lastClickTimeMs=this.timeMs; Game.updateUI(); this.updateDisplay(); return true; }},
+
+            buyBuilding: function(buildingName) {{ var jsName=NAME_MAP[buildingName]||buildingName; if (Game.Objects[jsName]) return Game.Objects[jsName].buy(); return false; }},
 
             updateDisplay: function() {{ var seconds=(this.timeMs/1000).toFixed(2); document.getElementById('tasTimeMs').textContent='Time: '+this.timeMs+'ms ('+seconds+'s)'; document.getElementById('tasFrame').textContent='Frame: '+Math.floor(this.timeMs/this.msPerFrame); }},
 
             loadAndExecutePath: function(path) {{ this.automatedPath=path; this.automatedCurrentStep=0; }},
             startAutomatedPlayback: function() {{ document.getElementById('tasStatus').textContent='Status: Running...'; var msg=document.getElementById('autoExecMessage'); if (msg) msg.style.display='none'; Game.stopGameLoop(); this.realStartTime=Date.now(); this.automatedRunning=true; this.automatedCurrentStep=0; this.executeNextAction(); }},
 
+            // Plays actions until the path is done; normal mode yields every ~12ms so the page can paint
             executeNextAction: function() {{
-                // Check if we've processed all actions
-                if (this.automatedCurrentStep >= this.automatedPath.length) {{
-                    // Check for initial click at current time (before any advancement)
-                    this.autoClick();
+                var sliceEnd = VERIFY_ONLY ? Infinity : performance.now() + 12;
+                while (this.automatedCurrentStep < this.automatedPath.length) {{
+                    var action=this.automatedPath[this.automatedCurrentStep];
                     
-                    // Advance through all time up to the expected time
-                    while (this.timeMs < EXPECTED_TIME) {{
-                        this.advanceOneMs();
+                    // Handle RLE-compressed format: [count, 'buy', building, time]
+                    var count = 1, actionType, actionValue, actionTime;
+                    if (typeof action[0] === 'number') {{
+                        // RLE format
+                        count = action[0];
+                        actionType = action[1];
+                        actionValue = action[2];
+                        actionTime = action[3];
+                    }} else {{
+                        // Legacy format: ['buy', building, time]
+                        actionType = action[0];
+                        actionValue = action[1];
+                        actionTime = action[2];
                     }}
                     
-                    // We've reached the expected time - complete verification
-                    if (this.automatedRunning) {{
-                        Game.stopGameLoop();
-                        var realElapsedMs = Date.now() - this.realStartTime; var realElapsedSec=(realElapsedMs/1000).toFixed(2);
-                        this.log('=== VERIFICATION COMPLETE ===','success');
-                        var timeDiff=this.timeMs-EXPECTED_TIME;
-                        this.log('Simulated time: '+this.timeMs+'ms ('+(this.timeMs/1000).toFixed(2)+'s)','success');
-                        this.log('Expected time: '+EXPECTED_TIME+'ms | Diff: '+timeDiff+'ms '+(Math.abs(timeDiff)<10?'✓':'⚠'), Math.abs(timeDiff)<10?'success':'warning');
-                        this.log('Program run time: '+realElapsedSec+'s ('+this.automatedPath.length+' purchase actions)','success');
-                        this.log('Cookies: '+this.cookiesBaked.toFixed(1)+' / '+GOAL_COOKIES+' goal '+(Math.abs(this.cookiesBaked-GOAL_COOKIES)<1e-6?'✓':'⚠'), Math.abs(this.cookiesBaked-GOAL_COOKIES)<1e-6?'success':'warning');
-
-                        // Predicted vs actual frames
-                        var framesSim = Math.floor(this.timeMs / this.msPerFrame);
-                        var framesOk = (framesSim === PREDICTED_FRAMES);
-                        this.log('Frames: '+framesSim+' / predicted '+PREDICTED_FRAMES+' '+(framesOk?'✓':'⚠'), framesOk?'success':'warning');
-
-                        // Predicted vs actual building counts
-                        var actual = {{}};
-                        for (var name in Game.Objects) {{ var obj=Game.Objects[name]; if (obj.amount>0) actual[name]=obj.amount; }}
-                        var buildingsOk = JSON.stringify(actual) === JSON.stringify(PREDICTED_BUILDINGS);
-                        this.log('Buildings: '+JSON.stringify(actual)+' / predicted '+JSON.stringify(PREDICTED_BUILDINGS)+' '+(buildingsOk?'✓':'⚠'), buildingsOk?'success':'warning');
-
-                        document.getElementById('tasStatus').textContent='Status: Complete ✓';
-                        this.automatedRunning=false;
-                        Game.updateUIAfterCompletion();
-                        var msg2=document.getElementById('autoExecMessage'); if (msg2) {{ msg2.innerHTML='🎉 Verification Complete! 🎉'; msg2.style.display='block'; msg2.style.color='#FFD700'; }}
+                    // Process the current time first (clicks/production at current moment)
+                    if (this.timeMs === 0 && actionTime > 0) {{
+                        // Special case: process time 0 before advancing
+                        this.autoClick();
                     }}
-                    return;
-                }}
-                
-                var action=this.automatedPath[this.automatedCurrentStep];
-                
-                // Handle RLE-compressed format: [count, 'buy', building, time]
-                var count = 1, actionType, actionValue, actionTime;
-                if (typeof action[0] === 'number') {{
-                    // RLE format
-                    count = action[0];
-                    actionType = action[1];
-                    actionValue = action[2];
-                    actionTime = action[3];
-                }} else {{
-                    // Legacy format: ['buy', building, time]
-                    actionType = action[0];
-                    actionValue = action[1];
-                    actionTime = action[2];
-                }}
-                
-                // Advance time to the action's timestamp (auto-clicking and production happen automatically)
-                // Process the current time first (clicks/production at current moment)
-                if (this.timeMs === 0 && actionTime > 0) {{
-                    // Special case: process time 0 before advancing
-                    this.autoClick();
-                }}
-                
-                // Then advance millisecond-by-millisecond to the action time
-                while (this.timeMs < actionTime) {{
-                    this.advanceOneMs();
-                }}
-                
-                // Execute the purchase action(s) (clicks are automatic, not in path)
-                if (actionType==='buy') {{
-                    for (var i = 0; i < count; i++) {{
-                        this.buyBuilding(actionValue);
+                    
+                    // Jump to the action time (auto-clicking and production happen on the way)
+                    this.advanceTo(actionTime);
+                    
+                    // Execute the purchase action(s) (clicks are automatic, not in path)
+                    if (actionType==='buy') {{
+                        for (var i = 0; i < count; i++) {{
+                            this.buyBuilding(actionValue);
+                        }}
+                    }}
+                    
+                    this.automatedCurrentStep++;
+                    if (performance.now() >= sliceEnd) {{
+                        setTimeout(()=>this.executeNextAction(),0);
+                        return;
                     }}
                 }}
                 
-                this.automatedCurrentStep++;
-                setTimeout(()=>this.executeNextAction(),0);
+                // All actions processed: check for a click at the current time, then run out the clock
+                this.autoClick();
+                this.advanceTo(EXPECTED_TIME);
+                this.completeVerification();
+            }},
+
+            completeVerification: function() {{
+                if (!this.automatedRunning) return;
+                Game.stopGameLoop();
+                var realElapsedMs = Date.now() - this.realStartTime; var realElapsedSec=(realElapsedMs/1000).toFixed(2);
+                this.log('=== VERIFICATION COMPLETE ===','success');
+                var timeDiff=this.timeMs-EXPECTED_TIME;
+                this.log('Simulated time: '+this.timeMs+'ms ('+(this.timeMs/1000).toFixed(2)+'s)','success');
+                this.log('Expected time: '+EXPECTED_TIME+'ms | Diff: '+timeDiff+'ms '+(Math.abs(timeDiff)<10?'✓':'⚠'), Math.abs(timeDiff)<10?'success':'warning');
+                this.log('Program run time: '+realElapsedSec+'s ('+this.automatedPath.length+' purchase actions)','success');
+                this.log('Cookies: '+this.cookiesBaked.toFixed(1)+' / '+GOAL_COOKIES+' goal '+(Math.abs(this.cookiesBaked-GOAL_COOKIES)<1e-6?'✓':'⚠'), Math.abs(this.cookiesBaked-GOAL_COOKIES)<1e-6?'success':'warning');
+
+                // Predicted vs actual frames
+                var framesSim = Math.floor(this.timeMs / this.msPerFrame);
+                var framesOk = (framesSim === PREDICTED_FRAMES);
+                this.log('Frames: '+framesSim+' / predicted '+PREDICTED_FRAMES+' '+(framesOk?'✓':'⚠'), framesOk?'success':'warning');
+
+                // Predicted vs actual building counts
+                var actual = {{}};
+                for (var name in Game.Objects) {{ var obj=Game.Objects[name]; if (obj.amount>0) actual[name]=obj.amount; }}
+                var buildingsOk = JSON.stringify(actual) === JSON.stringify(PREDICTED_BUILDINGS);
+                this.log('Buildings: '+JSON.stringify(actual)+' / predicted '+JSON.stringify(PREDICTED_BUILDINGS)+' '+(buildingsOk?'✓':'⚠'), buildingsOk?'success':'warning');
+
+                document.getElementById('tasStatus').textContent='Status: Complete ✓';
+                this.automatedRunning=false;
+                Game.updateUI(); this.updateDisplay();
+                Game.updateUIAfterCompletion();
+                var msg2=document.getElementById('autoExecMessage'); if (msg2) {{ msg2.innerHTML='🎉 Verification Complete! 🎉'; msg2.style.display='block'; msg2.style.color='#FFD700'; }}
             }}
         }};
 
         window.addEventListener('load', function() {{
             var buildingsUsed=[]; var seen={{}};
-            for (var i=0;i<BFS_PATH.length;i++) {{ if (BFS_PATH[i][0]==='buy') {{ var m={{'cursor':'Cursor','grandma':'Grandma','farm':'Farm','mine':'Mine','factory':'Factory','bank':'Bank','temple':'Temple','wizard_tower':'Wizard tower','shipment':'Shipment','alchemy_lab':'Alchemy lab'}}; var js=m[BFS_PATH[i][1]]||BFS_PATH[i][1]; if (!seen[js]) {{ seen[js]=1; buildingsUsed.push(js); }} }} }}
+            for (var i=0;i<BFS_PATH.length;i++) {{ var a=BFS_PATH[i]; if (typeof a[0]==='number') a=a.slice(1); if (a[0]==='buy') {{ var js=NAME_MAP[a[1]]||a[1]; if (!seen[js]) {{ seen[js]=1; buildingsUsed.push(js); }} }} }}
             Game.init(true); Game.buildUI(buildingsUsed.length>0?buildingsUsed:null);
             TASController.init(); TASController.loadAndExecutePath(BFS_PATH);
             // Start immediately
@@ -345,10 +1092,11 @@ def _generate_verification_html(output_path: str, goal: float, total_time_ms: in
 
 
 class CookieClickerOptimizer:
-    def __init__(self):
+    def __init__(self, ruleset: Optional[Ruleset] = None):
         # Define buildings with their base stats from Cookie Clicker source code
         # Note: CPS values are PER SECOND (will be divided by 30 for per-frame production)
         # Building costs follow: basePrice = (n+9+(n<5?0:pow(n-5,1.75)*5))*pow(10,n)*(max(1,n-14))
+        # and CPS follows baseCps = pow(n, n*0.5+2), both rounded to 2 significant digits (n = id >= 1)
         self.buildings = {
             'cursor': Building('cursor', 0, 15, 0.1),
             'grandma': Building('grandma', 1, 100, 1),
@@ -360,20 +1108,53 @@ class CookieClickerOptimizer:
             'wizard_tower': Building('wizard_tower', 7, 330000000, 44000),
             'shipment': Building('shipment', 8, 5100000000, 260000),
             'alchemy_lab': Building('alchemy_lab', 9, 75000000000, 1600000),
+            'portal': Building('portal', 10, 1000000000000, 10000000),
+            'time_machine': Building('time_machine', 11, 14000000000000, 65000000),
+            'antimatter_condenser': Building('antimatter_condenser', 12, 170000000000000, 430000000),
+            'prism': Building('prism', 13, 2100000000000000, 2900000000),
+            'chancemaker': Building('chancemaker', 14, 26000000000000000, 21000000000),
+            'fractal_engine': Building('fractal_engine', 15, 310000000000000000, 150000000000),
+            'javascript_console': Building('javascript_console', 16, 7100000000000000000, 1100000000000),
+            'idleverse': Building('idleverse', 17, 120000000000000000000, 8300000000000),
+            'cortex_baker': Building('cortex_baker', 18, 1900000000000000000000, 64000000000000),
+            'you': Building('you', 19, 27000000000000000000000, 510000000000000),
         }
         
         # Define upgrades from Cookie Clicker source code
         self.upgrades = self._initialize_upgrades()
         
+        # Click interval, frame rate, price increase and bulk quantities; the simulation loops are compiled
+        # from it once here, and verification pages embed it
+        self.ruleset = ruleset if ruleset is not None else Ruleset()
+        self._kernels = self.ruleset.compile()
+        # Memo for the time-to-afford walk in _simulate_until_first_event (None walks with the kernel every time)
+        self.afford_cache = TimeToAffordCache(self.ruleset, self._kernels)
+        # Skip children pick up their parent's options and walk (False rebuilds and restarts them each time)
+        self.skip_cursors = True
+        # Purchase quantities offered per building: 'all' (1..what the goal could pay
+        # for), 'bulk' (the ruleset's purchase_quantities) or 'reachable' (like 'all', bounded by what can be
+        # banked before bfs_optimize's incumbent time)
+        self.option_policy = 'all'
+        # Debug: also advance every bfs_optimize expansion with advance_time and raise if _state_at_event differs
+        self.check_fused_advance = False
         # Price increase multiplier from source: Game.priceIncrease (usually 1.15)
-        self.price_increase = 1.15
+        self.price_increase = self.ruleset.price_increase
         # Game runs at 30 FPS
-        self.fps = 30
+        self.fps = self.ruleset.fps
         # Allowed bulk purchase quantities
-        self.purchase_quantities = [1, 10, 100]
+        self.purchase_quantities = list(self.ruleset.purchase_quantities)
         # Milliseconds per frame at 30 FPS
-        self.ms_per_frame = 100 / 3
-    
+        self.ms_per_frame = self.ruleset.ms_per_frame
+        # Counters from the most recent bfs_optimize call (depth, expansions, beam report)
+        self.last_search_stats = None
+        # SolutionTrace of the most recent successful bfs_optimize call
+        self.last_solution = None
+        # Per building: ceil'd price at each owned count and prefix sums of those prices (prefix[n] = cost of
+        # the first n units), extended on demand. Prices are the game's float formula, so lookups stay exact;
+        # tables assume base costs and price_increase are not changed after construction.
+        self._price_tables = {}
+        self._price_prefix = {}
+
     def _initialize_upgrades(self) -> dict:
         """Initialize all upgrades from Cookie Clicker source code."""
         upgrades = {}
@@ -512,43 +1293,64 @@ class CookieClickerOptimizer:
         """Get the cost of an upgrade."""
         return self.upgrades[upgrade_name].cost
     
+    def _extend_price_table(self, building_name: str, count: int) -> Tuple[List[int], List[int]]:
+        """Make the price table of building_name cover owned counts up to count; returns (prices, prefix)."""
+        prices = self._price_tables.setdefault(building_name, [])
+        prefix = self._price_prefix.setdefault(building_name, [0])
+        if count < len(prices):
+            return prices, prefix
+        base_cost = self.buildings[building_name].base_cost
+        # Grow geometrically so repeated lookups just past the end stay amortized O(1)
+        for k in range(len(prices), max(count + 1, 2 * len(prices), 64)):
+            # From source: price = basePrice * pow(Game.priceIncrease, max(0, amount-free))
+            # We assume no free buildings, so it's basePrice * pow(1.15, amount)
+            price = math.ceil(base_cost * (self.price_increase ** k))
+            prices.append(price)
+            prefix.append(prefix[-1] + price)
+        return prices, prefix
+
     def get_building_cost(self, building_name: str, current_count: int) -> float:
         """Calculate cost of next building using Cookie Clicker formula"""
-        building = self.buildings[building_name]
-        # From source: price = basePrice * pow(Game.priceIncrease, max(0, amount-free))
-        # We assume no free buildings, so it's basePrice * pow(1.15, amount)
-        return math.ceil(building.base_cost * (self.price_increase ** current_count))
+        prices = self._price_tables.get(building_name)
+        if prices is None or current_count >= len(prices):
+            prices, _ = self._extend_price_table(building_name, current_count)
+        return prices[current_count]
     
     def cost_for_quantity(self, building_name: str, current_count: int, qty: int) -> int:
         """Sum of sequential costs for buying qty units starting from current_count."""
-        total = 0
-        for k in range(qty):
-            total += self.get_building_cost(building_name, current_count + k)
-        return total
+        prefix = self._price_prefix.get(building_name)
+        if prefix is None or current_count + qty >= len(prefix):
+            _, prefix = self._extend_price_table(building_name, current_count + qty)
+        return prefix[current_count + qty] - prefix[current_count]
     
     def max_affordable_qty_by_goal(self, building_name: str, start_count: int, goal_cookies: float) -> int:
         """Maximum quantity (>=0) such that cumulative cost from start_count does not exceed goal_cookies."""
-        total = 0
-        qty = 0
+        # Costs are integers, so cost <= goal exactly when cost <= floor(goal); the bound stays an exact int
+        # even where goal plus the prefix would round as a float
+        limit = math.floor(goal_cookies)
+        prices, prefix = self._extend_price_table(building_name, start_count)
         # Geometric growth ensures this loop is small for realistic goals
-        while True:
-            price = self.get_building_cost(building_name, start_count + qty)
-            if total + price > goal_cookies:
-                break
-            total += price
-            qty += 1
-        return qty
+        while prefix[-1] - prefix[start_count] <= limit:
+            prices, prefix = self._extend_price_table(building_name, len(prices))
+        return bisect.bisect_right(prefix, prefix[start_count] + limit, lo=start_count) - 1 - start_count
     
     def purchase_multiple(self, state: GameState, building_name: str, qty: int) -> Optional[GameState]:
-        new_state = state.copy()
-        for _ in range(qty):
-            # Guard affordability to avoid rounding mismatches
-            curr_count = new_state.buildings.get(building_name, 0)
-            price = self.get_building_cost(building_name, curr_count)
-            if new_state.cookies + 1e-9 < price:
+        curr_count = state.buildings.get(building_name, 0)
+        prices, _ = self._extend_price_table(building_name, curr_count + qty)
+        cookies = state.cookies
+        for price in prices[curr_count:curr_count + qty]:
+            # Exact test, as the page's buyBuilding makes it (the bank is bit-identical to the page's)
+            if cookies < price:
                 return None
-            # Perform single purchase
-            new_state = self.purchase_building(new_state, building_name)
+            cookies -= price
+        
+        # Same result as qty purchase_building calls: CPS and click power only depend on the final counts
+        new_state = state.copy()
+        new_state.cookies = cookies
+        new_state.buildings[building_name] = curr_count + qty
+        new_state.cps = self.calculate_total_cps(new_state)
+        if 'thousand_fingers' in new_state.upgrades:
+            new_state.click_power = self.calculate_click_power(new_state)
         
         # Remove deferred options only for the building type we just purchased
         # Keep other building types deferred
@@ -651,13 +1453,14 @@ class CookieClickerOptimizer:
     
     def apply_deterministic_clicks(self, state: GameState, target_time_ms: int) -> GameState:
         """Apply all deterministic clicks from current time up to (not including) target_time_ms.
-        Clicks occur automatically every 20ms starting at 0ms: 0, 20, 40, 60, ..."""
+        Clicks occur automatically every click interval (20ms) starting at 0ms: 0, 20, 40, 60, ..."""
         new_state = state.copy()
+        interval = self.ruleset.click_interval_ms
         
         # Calculate which clicks should have occurred
         # Clicks happen at: 0, 20, 40, 60, 80, ...
         # Find the first click >= current time
-        current_click_time = ((state.time_ms + 19) // 20) * 20  # Round up to next multiple of 20
+        current_click_time = ((state.time_ms + interval - 1) // interval) * interval  # Round up to next click time
         
         # Apply all clicks from current_click_time up to (but not including) target_time_ms
         while current_click_time < target_time_ms:
@@ -666,7 +1469,7 @@ class CookieClickerOptimizer:
                 new_state.cookies += click_power
                 new_state.cookies_baked += click_power
                 new_state.last_click_time_ms = current_click_time
-            current_click_time += 20
+            current_click_time += interval
         
         return new_state
     
@@ -698,135 +1501,179 @@ class CookieClickerOptimizer:
             if 'trillion_fingers' in state.upgrades:
                 add *= 20
             click_power += add * non_cursor_count
-        
+
         return click_power
-    
+
+    def fresh_state(self) -> GameState:
+        """The game at 0ms: nothing banked or owned, a click due at 0ms and frame 0 not yet produced."""
+        return GameState(cookies=0, cookies_baked=0, buildings={}, cps=0.0, time_ms=0,
+                         last_click_time_ms=-self.ruleset.click_interval_ms, last_production_frame=-1,
+                         click_power=1.0)
+
+    def state_from_snapshot(self, snapshot: dict) -> GameState:
+        """
+        Build a search start state from a GameState.to_snapshot() dict or an export checkpoint.
+        Required: cookies, cookies_baked, buildings. cps and click_power are recomputed from buildings
+        and upgrades when missing. Missing click/frame phase means everything at time_ms has happened
+        (the click on a 20ms boundary and frame production, as advance_time leaves a state);
+        a snapshot at 0ms or without CpS and without phase has never produced, like the fresh game.
+        """
+        missing = [k for k in ('cookies', 'cookies_baked', 'buildings') if k not in snapshot]
+        if missing:
+            raise ValueError(f"snapshot is missing {', '.join(missing)}")
+        unknown = set(snapshot['buildings']) - set(self.buildings)
+        unknown |= set(snapshot.get('upgrades', ())) - set(self.upgrades)
+        if unknown:
+            raise ValueError(f"snapshot has unknown buildings/upgrades: {', '.join(sorted(unknown))}")
+        time_ms = int(snapshot.get('time_ms', 0))
+        interval = self.ruleset.click_interval_ms
+        state = GameState(
+            cookies=float(snapshot['cookies']),
+            cookies_baked=float(snapshot['cookies_baked']),
+            buildings={b: int(n) for b, n in snapshot['buildings'].items() if n},
+            cps=0.0,
+            time_ms=time_ms,
+            last_click_time_ms=int(snapshot.get('last_click_time_ms',
+                                                (time_ms // interval) * interval if time_ms > 0 else -interval)),
+            last_production_frame=int(snapshot.get('last_production_frame',
+                                                   self.ruleset.frame_at(time_ms) if time_ms > 0 else -1)),
+            click_power=1.0,
+            upgrades=set(snapshot.get('upgrades', ()))
+        )
+        state.cps = float(snapshot['cps']) if snapshot.get('cps') is not None else self.calculate_total_cps(state)
+        state.click_power = (float(snapshot['click_power']) if snapshot.get('click_power') is not None
+                             else self.calculate_click_power(state))
+        if 'last_production_frame' not in snapshot and state.cps == 0:
+            state.last_production_frame = -1  # nothing has been produced yet
+        return state
+
     def advance_time(self, state: GameState, from_ms: int, to_ms: int) -> GameState:
         """
         Advance time from from_ms to to_ms, applying:
-        1. Deterministic clicks (every 20ms: 0, 20, 40, ...)
-        2. Frame production (every ~33.33ms)
+        1. Deterministic clicks (every click interval: 0, 20, 40, ...)
+        2. Frame production (every ~33.33ms), when entering each new frame
+        Runs the ruleset's compiled advance kernel.
         """
-        new_state = state.copy()
-        
-        # Apply all deterministic clicks in this time range
-        for t in range(from_ms, to_ms + 1):
-            # Check if this is a click time (multiple of 20) AND we haven't already clicked at this time
-            if t % 20 == 0 and t >= 0 and t != new_state.last_click_time_ms:
-                click_power = new_state.click_power
-                new_state.cookies += click_power
-                new_state.cookies_baked += click_power
-                new_state.last_click_time_ms = t
-        
-        # Advance time and apply production
-        new_state.time_ms = to_ms
-        
-        # Calculate frames that should have production applied
-        ms_per_frame = 100 / 3  # 33.333... ms per frame
-        start_frame = state.last_production_frame
-        end_frame = math.floor(new_state.time_ms / ms_per_frame)
-        
-        # Apply production when entering each new frame
-        # JavaScript: if (currentFrame > lastProductionFrame) { produce; lastProductionFrame = currentFrame; }
-        # This means we produce when ENTERING a frame, so if we're at time T in frame F,
-        # we should have produced for all frames from (lastProductionFrame + 1) through F (inclusive)
-        for frame in range(start_frame + 1, end_frame + 1):
-            if new_state.cps > 0:
-                production_this_frame = new_state.cps / self.fps
-                new_state.cookies += production_this_frame
-                new_state.cookies_baked += production_this_frame
-            # Update last_production_frame to match JavaScript behavior
-            new_state.last_production_frame = frame
-        
-        return new_state
+        return self._kernels.advance(state, from_ms, to_ms)
     
-    def _simulate_until_first_event(self, state: GameState, goal_cookies: Optional[float]) -> Tuple[int, str, set, float, float, int, int]:
+    def _option_budget(self, state: GameState, goal_cookies: float, horizon_ms: Optional[int]) -> float:
+        """
+        Most cookies an option of state may cost. Until the next purchase production is fixed, so under the
+        'reachable' policy the bank cannot pass state.cookies plus every click and frame up to horizon_ms;
+        a click and a frame are added as margin.
+        """
+        if self.option_policy != 'reachable' or horizon_ms is None:
+            return goal_cookies
+        span = max(horizon_ms - state.time_ms, 0)
+        clicks = span // self.ruleset.click_interval_ms + 2
+        frames = math.ceil(span / self.ms_per_frame) + 2
+        return min(goal_cookies, state.cookies + clicks * state.click_power + frames * state.cps / self.fps)
+
+    def _simulate_until_first_event(self, state: GameState, goal_cookies: Optional[float],
+                                    horizon_ms: Optional[int] = None) -> Tuple[int, str, set, float, float, int, int, Optional[SkipCursor]]:
         """
         Event-driven simulation from the current state until the first of:
-          - Goal reached (cookies_baked >= goal_cookies) -> returns (dt, 'goal', set(), cookies, baked, last_click, last_frame)
+          - Goal reached (cookies_baked >= goal_cookies) -> returns (dt, 'goal', set(), cookies, baked, last_click, last_frame, None)
           - One or more purchase options (building, qty) become affordable for the first time ->
-            returns (dt, 'afford', A, cookies, baked, last_click, last_frame)
-        Clicking is deterministic: occurs every 20ms starting at 0ms.
+            returns (dt, 'afford', A, cookies, baked, last_click, last_frame, skip_cursor)
+        Clicking is deterministic: occurs every click interval (20ms) starting at 0ms. The stepping is the
+        ruleset's next_event kernel, which starts frames on the same milliseconds as advance_time, run
+        through afford_cache when it is set.
+        skip_cursor is for the skip child, which defers A: from it the child's own simulation takes the
+        remaining options and continues the walk instead of starting both over (see skip_cursors).
+        Which quantities A offers follows option_policy; horizon_ms (the incumbent's time) bounds them under
+        'reachable'. A cursor built against a later horizon only offers more, so skip children keep it.
         """
-        # Build cost map for non-deferred options
-        options_costs = {}
-        # Extract building names that are deferred (any quantity of that building is deferred)
-        deferred_buildings = {opt[0] for opt in state.deferred_options}
-        
-        for bname in self.buildings.keys():
-            # Skip this building entirely if ANY quantity of it has been deferred
-            if bname in deferred_buildings:
-                continue
-                
-            start_count = state.buildings.get(bname, 0)
-            # Determine dynamic upper bound from goal
-            ub = self.max_affordable_qty_by_goal(bname, start_count, goal_cookies) if goal_cookies is not None else 100
-            # Incrementally accumulate costs for 1..ub
-            running = 0
-            for k in range(1, ub + 1):
-                price_k = self.get_building_cost(bname, start_count + (k - 1))
-                running += price_k
-                opt = (bname, k)
-                options_costs[opt] = running
-        
-        t0 = state.time_ms
-        t = t0
-        cookies = state.cookies
-        baked = state.cookies_baked
-        last_click = state.last_click_time_ms
-        last_frame = state.last_production_frame
-        cps = state.cps
-        click_power = state.click_power
-        
-        # Deterministic click at current time if it's a click time (multiple of 20)
-        if t % 20 == 0 and t >= 0 and t != last_click:
-            cookies += click_power
-            baked += click_power
-            last_click = t
-        
-        # Check goal immediately
-        if goal_cookies is not None and baked >= goal_cookies:
-            return 0, 'goal', set(), cookies, baked, last_click, last_frame
-        
-        # Check affordability immediately
-        A = {opt for opt, cost in options_costs.items() if cost <= cookies}
-        if A:
-            return 0, 'afford', A, cookies, baked, last_click, last_frame
-        
-        # Iterate events: next frame production or next click time
-        while True:
-            # Next frame production time: floor((last_frame+1)*ms_per_frame)
-            # Frame N starts at floor(N * ms_per_frame) milliseconds
-            t_frame = math.floor((last_frame + 1) * self.ms_per_frame)
-            # Next click time (deterministic: next multiple of 20 after last_click)
-            t_click = ((last_click // 20) + 1) * 20
-            # If no CpS, ignore frame events by setting them after click time
-            if cps <= 0:
-                next_t = t_click
+        goal = goal_cookies if goal_cookies is not None else math.inf
+        cursor = state.skip_cursor
+        if cursor is not None and cursor.goal == goal_cookies:
+            option_ranges = cursor.option_ranges
+        else:
+            cursor = None
+            # Non-deferred options as (building, prefix sums, owned count, ub): option (building, k) for k in
+            # 1..ub costs prefix[count + k] - prefix[count], which grows with k, so the affordable ones are 1..m
+            option_ranges = []
+            # Extract building names that are deferred (any quantity of that building is deferred)
+            deferred_buildings = {opt[0] for opt in state.deferred_options}
+            budget = self._option_budget(state, goal_cookies, horizon_ms) if goal_cookies is not None else None
+            largest_bulk = max(self.purchase_quantities) if self.option_policy == 'bulk' else None
+
+            for bname in self.buildings.keys():
+                # Skip this building entirely if ANY quantity of it has been deferred
+                if bname in deferred_buildings:
+                    continue
+
+                start_count = state.buildings.get(bname, 0)
+                # Determine dynamic upper bound from goal (or the reachable bank)
+                ub = self.max_affordable_qty_by_goal(bname, start_count, budget) if budget is not None else 100
+                if largest_bulk is not None:
+                    ub = min(ub, largest_bulk)
+                if ub == 0:
+                    continue
+                _, prefix = self._extend_price_table(bname, start_count + ub)
+                option_ranges.append((bname, prefix, start_count, ub))
+            option_ranges.sort(key=lambda r: r[1][r[2] + 1] - r[1][r[2]])
+        cheapest = option_ranges[0][1][option_ranges[0][2] + 1] - option_ranges[0][1][option_ranges[0][2]] \
+            if option_ranges else math.inf
+
+        if self.afford_cache is None:
+            walk = None
+            t, ev_type, cookies, baked, last_click, last_frame = self._kernels.next_event(
+                state.time_ms, state.cookies, state.cookies_baked, state.last_click_time_ms,
+                state.last_production_frame, state.cps, state.click_power, goal, cheapest)
+        elif cursor is not None and cursor.walk is not None:
+            (t, ev_type, cookies, baked, last_click, last_frame), walk = \
+                self.afford_cache.resume(cursor.walk, goal, cheapest)
+        else:
+            (t, ev_type, cookies, baked, last_click, last_frame), walk = self.afford_cache.walk(
+                state.time_ms, state.cookies, state.cookies_baked, state.last_click_time_ms,
+                state.last_production_frame, state.cps, state.click_power, goal, cheapest)
+        if ev_type == 'goal':
+            return t - state.time_ms, ev_type, set(), cookies, baked, last_click, last_frame, None
+
+        # Integer costs: cost <= cookies exactly when cost <= floor(cookies), and the affordable ones of a
+        # building are 1..m. Ordered by price, the first building with nothing affordable ends the scan
+        A = set()
+        affordable_buildings = 0
+        for bname, prefix, start_count, ub in option_ranges:
+            m = bisect.bisect_right(prefix, prefix[start_count] + math.floor(cookies), start_count,
+                                    start_count + ub + 1) - 1 - start_count
+            if m == 0:
+                break
+            if self.option_policy == 'bulk':
+                A.update((bname, k) for k in self.purchase_quantities if k <= m)
             else:
-                next_t = t_frame if t_frame <= t_click else t_click
-            
-            # Advance virtual time to next_t and apply the event(s)
-            t = next_t
-            if cps > 0 and t == t_frame:
-                prod = cps / self.fps
-                cookies += prod
-                baked += prod
-                last_frame += 1
-            if t == t_click:
-                cookies += click_power
-                baked += click_power
-                last_click = t
-            
-            # Check goal
-            if goal_cookies is not None and baked >= goal_cookies:
-                return t - t0, 'goal', set(), cookies, baked, last_click, last_frame
-            
-            # Check affordability
-            A = {opt for opt, cost in options_costs.items() if cost <= cookies}
-            if A:
-                return t - t0, 'afford', A, cookies, baked, last_click, last_frame
+                A.update((bname, k) for k in range(1, m + 1))
+            affordable_buildings += 1
+        skip_cursor = SkipCursor(goal_cookies, option_ranges[affordable_buildings:], walk) \
+            if self.skip_cursors else None
+        return t - state.time_ms, ev_type, A, cookies, baked, last_click, last_frame, skip_cursor
     
+    def _state_at_event(self, state: GameState, dt: int, cookies: float, baked: float, last_click: int,
+                        last_frame: int) -> GameState:
+        """
+        The state dt milliseconds on, built from what _simulate_until_first_event returned instead of walking
+        the gap again with advance_time. The walk stops only after every event of its last millisecond, so the
+        two agree except for last_production_frame: next_event returns it already moved up to a lagging
+        frame, while advance_time leaves it alone unless something was produced.
+        With check_fused_advance set, advance_time runs as well and any difference raises AssertionError.
+        """
+        new_state = state.copy()
+        new_state.cookies = cookies
+        new_state.cookies_baked = baked
+        new_state.last_click_time_ms = last_click
+        new_state.time_ms = state.time_ms + dt
+        if state.cps > 0 and last_frame > max(state.last_production_frame,
+                                              math.floor((max(state.time_ms, 0) + 1) / self.ms_per_frame) - 1):
+            new_state.last_production_frame = last_frame
+        if self.check_fused_advance:
+            walked = self.advance_time(state, state.time_ms, new_state.time_ms)
+            for name in ('time_ms', 'cookies', 'cookies_baked', 'last_click_time_ms', 'last_production_frame'):
+                if getattr(walked, name) != getattr(new_state, name):
+                    raise AssertionError(f"fused advance from {state.time_ms}ms by {dt}ms: {name} "
+                                         f"{getattr(new_state, name)!r} != advance_time {getattr(walked, name)!r}")
+        return new_state
+
     def _advance_state_with_time(self, state: GameState, dt: int, base_path: List[Tuple[str, int, int]]) -> Tuple[GameState, List[Tuple[str, int, int]]]:
         """
         Advance the state forward by dt milliseconds, applying frame production and deterministic clicking.
@@ -836,7 +1683,32 @@ class CookieClickerOptimizer:
         new_state = self.advance_time(state, state.time_ms, state.time_ms + dt)
         return new_state, actions
     
-    def bfs_optimize(self, goal_cookies: float, max_time_ms: Optional[int] = None, max_depth: Optional[int] = None) -> Optional[Tuple[List[Tuple[str, int, int]], int]]:
+    def _prefix_drop_times(self, path: List[Tuple[str, int, int]], total_time_ms: int, dropped_paths: dict) -> List[int]:
+        """
+        Bucket times of dropped states with the same purchase history as a prefix of path, at a time between
+        that prefix's last purchase and the next one (sorted). For the run's own incumbent these are copies
+        of its line that the winner survived through a sibling of; for a path the run never found, they are
+        the cuts that lost it.
+        """
+        hits = []
+        key = 0
+        for k in range(len(path) + 1):
+            if k > 0:
+                key = hash((key, path[k - 1][1], path[k - 1][2]))
+            times = dropped_paths.get((k, key))
+            if not times:
+                continue
+            window_start = path[k - 1][2] if k > 0 else 0
+            window_end = path[k][2] if k < len(path) else total_time_ms
+            hits.extend(t for t in times if window_start <= t <= window_end)
+        return sorted(hits)
+    
+    def bfs_optimize(self, goal_cookies: float, max_time_ms: Optional[int] = None, max_depth: Optional[int] = None,
+                     beam_policy: Optional[BeamPolicy] = None,
+                     initial_state: Optional[GameState] = None,
+                     context: Optional[SearchContext] = None,
+                     on_depth: Optional[Callable[[int, int, int, int], None]] = None,
+                     option_policy: Optional[str] = None) -> Optional[Tuple[List[Tuple[str, int, int]], int]]:
         """
         Event-driven BFS (first-opportunity rule):
         - Greedy, instantaneous clicking (no branching).
@@ -845,133 +1717,365 @@ class CookieClickerOptimizer:
             • one child per newly affordable option (buy-now), and
             • one skip child that defers all those options until the next purchase occurs.
         - If goal is reached before any purchase becomes affordable, return immediately.
+        Each time bucket is ranked and truncated by beam_policy (default: 50 states by cookies baked);
+        counters and the beam report are left in self.last_search_stats.
+        initial_state (e.g. from state_from_snapshot) starts the search mid-game instead of from zero;
+        path times, max_time_ms and the returned total stay absolute.
+        With a SearchContext the search is kept resumable, and a later call with a larger goal continues it.
+        on_depth(depth, states_expanded, frontier_size, visited_size) is called as each time bucket is taken
+        off the queue (search_profiler.py snapshots memory from it).
+        option_policy ('all', 'bulk' or 'reachable') overrides self.option_policy for this search only.
         """
-        initial_state = GameState(
-            cookies=0,
-            cookies_baked=0,  # Track cumulative production
-            buildings={},
-            cps=0.0,  # Current cookies per second (divided by 30 each frame)
-            time_ms=0,
-            last_click_time_ms=-20,  # Start at -20 so first click at t=0 is valid
-            last_production_frame=-1,  # Start at -1 so first frame (0) can produce
-            click_power=1.0,
-            deferred_options=set()
-        )
-        
-        # States organized by time in milliseconds: {time_ms: [(state, path), ...]}
-        states_by_time = {0: [(initial_state, [])]}
-        visited = set()
-        
-        if max_time_ms is None:
-            print(f"Starting BFS with goal: {goal_cookies} cookies (no time limit)")
+        if option_policy is None:
+            option_policy = self.option_policy
+        if option_policy not in ('all', 'bulk', 'reachable'):
+            raise ValueError(f"unknown option_policy {option_policy!r}")
+        default_policy = self.option_policy
+        self.option_policy = option_policy
+        try:
+            return self._bfs_search(goal_cookies, max_time_ms, max_depth, beam_policy, initial_state, context, on_depth)
+        finally:
+            self.option_policy = default_policy
+
+    def _bfs_search(self, goal_cookies: float, max_time_ms: Optional[int], max_depth: Optional[int],
+                    beam_policy: Optional[BeamPolicy], initial_state: Optional[GameState],
+                    context: Optional[SearchContext],
+                    on_depth: Optional[Callable[[int, int, int, int], None]]) -> Optional[Tuple[List[Tuple[str, int, int]], int]]:
+        """The search behind bfs_optimize, run under the already validated self.option_policy."""
+        self.last_solution = None
+        cache_before = self.afford_cache.stats() if self.afford_cache is not None else None
+        policy = beam_policy if beam_policy is not None else BeamPolicy()
+        score_key = policy.score_key()
+        resuming = context is not None and context.can_resume(goal_cookies, max_time_ms, policy, initial_state,
+                                                              self.option_policy)
+
+        if resuming:
+            states_by_time = context.states_by_time
+            frontier_size = context.frontier_size
+            visited = context.visited
+            states_expanded = context.states_expanded
+            beam_report = context.beam_report
+            dropped_paths = context.dropped_paths
+            width = context.width
+            depth = context.depth
+            parked = context.parked
+            pareto_fronts = context.pareto_fronts
+            context.resumes += 1
+            print(f"Resuming BFS with goal: {goal_cookies} cookies from goal {context.goal} "
+                  f"({len(parked)} parked states, {frontier_size} queued)")
         else:
-            print(f"Starting BFS with goal: {goal_cookies} cookies (max {max_time_ms}ms)")
-        
-        depth = 0
+            width = policy.width
+            start_state = initial_state
+            if start_state is not None:
+                start_state = start_state.copy()
+                start_state.deferred_options = set()
+            else:
+                start_state = self.fresh_state()
+
+            # States organized by time in milliseconds: {time_ms: FrontierBucket of (state, last PathStep or None,
+            # order)}. order = (parent bucket time, parent position, child index) is increasing in push order; a
+            # resumed search uses it to slot children of parked states where a cold search would have pushed them
+            states_by_time = {start_state.time_ms: FrontierBucket()}
+            states_by_time[start_state.time_ms].append((start_state, None, ()))
+            frontier_size = 1  # states queued across all buckets
+            visited = set()
+            states_expanded = 0
+            beam_report = {
+                'truncated_buckets': 0,
+                'dropped_states': 0,
+                'min_width': width,
+                'max_width': width,
+                'incumbent_prefix_drops': 0,  # dropped states sharing a prefix of the incumbent's path
+                'children_pushed': 0,
+                'duplicates_merged': 0,  # children merged into an equivalent queued state (merge_duplicates)
+                'duplicate_slots': 0,  # beam slots taken by a state already expanded from the same bucket
+                'max_bucket_duplicate_rate': 0.0,
+                'afford_events': 0,  # expansions that branched (skip child plus one child per option)
+                'options': 0,  # purchase options offered at those events (option_policy)
+            }
+            # (unit purchases, PathStep.key) -> times at which a state with that purchase history was dropped
+            dropped_paths = {}
+            depth = 0
+            parked = []
+            pareto_fronts = []  # bucket fronts recorded for policy.front_times
+            if context is not None:
+                context.searches += 1
+
+            if max_time_ms is None:
+                print(f"Starting BFS with goal: {goal_cookies} cookies (no time limit)")
+            else:
+                print(f"Starting BFS with goal: {goal_cookies} cookies (max {max_time_ms}ms)")
+
+        expanded_before = states_expanded
         best_solution = None  # Track best solution found so far
         best_time = float('inf')
-        
+        recorded = {front['requested_ms'] for front in pareto_fronts}
+        pending_front_times = sorted(t for t in set(policy.front_times) if t not in recorded)
+        # States that met the goal, kept so a SearchContext can expand them for a larger goal
+        new_parked = [] if context is not None else None
+
+        def push(state, step, order):
+            bucket = states_by_time.get(state.time_ms)
+            if bucket is None:
+                bucket = states_by_time[state.time_ms] = FrontierBucket()
+            return bucket.push((state, step, order), merge_key(state) if policy.merge_duplicates else None)
+
+        def expand(state, step, order):
+            """Simulate to the first event; record a solution or queue the skip and buy-now children."""
+            nonlocal best_solution, best_time, frontier_size
+            # Children past the incumbent are never expanded, unless a SearchContext resumes for a larger goal
+            horizon_ms = best_time if best_time != float('inf') and context is None else None
+            # Simulate forward to the first significant event (goal or affordability)
+            dt, ev_type, A, virt_cookies, virt_baked, virt_last_click, virt_last_frame, skip_cursor = \
+                self._simulate_until_first_event(state, goal_cookies, horizon_ms)
+
+            # The state at the event, from the walk's own totals (time and deterministic clicks are implicit,
+            # so the path gains no steps)
+            advanced_state = self._state_at_event(state, dt, virt_cookies, virt_baked, virt_last_click,
+                                                  virt_last_frame)
+
+            # If goal is reached before any purchase is affordable
+            if ev_type == 'goal':
+                if advanced_state.time_ms < best_time:
+                    best_solution = (step, advanced_state.time_ms, advanced_state)
+                    best_time = advanced_state.time_ms
+                    if depth <= 10 or depth % 100 == 0:  # Log first few and periodically
+                        print(f"Found solution at time {advanced_state.time_ms}ms (new best)")
+                if new_parked is not None:
+                    new_parked.append((order, state, step, True))
+                return  # Don't return yet, check if there's a better solution
+
+            # ev_type == 'afford': create buy-now children and a skip child
+            # A is set of (building, qty) that FIRST become affordable now
+            beam_report['afford_events'] += 1
+            beam_report['options'] += len(A)
+
+            # Generate skip child (defer these options until next purchase)
+            skip_state = advanced_state.copy()
+            for opt in A:
+                skip_state.deferred_options.add(opt)
+            skip_state.skip_cursor = skip_cursor
+            if max_time_ms is None or skip_state.time_ms <= max_time_ms:
+                frontier_size += push(skip_state, step, order + (0,))
+
+            # Generate buy-now children
+            for child, (bname, qty) in enumerate(A, 1):
+                buy_state = advanced_state.copy()
+                buy_state = self.purchase_multiple(buy_state, bname, qty)
+                if buy_state is None:
+                    continue  # safety guard against rounding issues
+                # The step expands to one ('buy', bname, t) per unit, keeping the verifier unchanged
+                buy_step = PathStep.extend(step, bname, qty, buy_state.time_ms, advanced_state)
+                if max_time_ms is None or buy_state.time_ms <= max_time_ms:
+                    frontier_size += push(buy_state, buy_step, order + (child,))
+
+        def state_signature(state):
+            # Signature for pruning (time, cookies, baked, buildings, click, frame, deferred)
+            # Use higher precision (6 decimal places) to capture small production differences
+            return (
+                state.time_ms,
+                round(state.cookies * 1000000) / 1000000,
+                round(state.cookies_baked * 1000000) / 1000000,
+                tuple(sorted(state.buildings.items())),
+                state.last_click_time_ms,
+                state.last_production_frame,
+                tuple(sorted(state.deferred_options))
+            )
+
+        def merge_key(state):
+            # state_signature without the bank: equal keys mean equal buildings bought, so the larger bank wins
+            return (
+                state.time_ms,
+                tuple(sorted(state.buildings.items())),
+                state.last_click_time_ms,
+                state.last_production_frame,
+                tuple(sorted(state.deferred_options))
+            )
+
+        # Parked states all sit in buckets before the old goal's crossing, so they come first, in push order
+        for order, state, step, already_visited in sorted(parked, key=lambda p: p[0]):
+            if state.cookies_baked >= goal_cookies:
+                if state.time_ms < best_time:
+                    best_solution = (step, state.time_ms, state)
+                    best_time = state.time_ms
+                new_parked.append((order, state, step, already_visited))
+                continue
+            if not already_visited:
+                state_sig = state_signature(state)
+                if state_sig in visited:
+                    continue
+                visited.add(state_sig)
+                states_expanded += 1
+            expand(state, step, order)
+
         while (max_depth is None or depth < max_depth) and states_by_time:
             depth += 1
             time_ms = min(states_by_time.keys())
-            
+
             # Early termination: if we have a solution and all remaining states
             # are at times >= best solution time, we can stop
             if best_solution is not None and time_ms >= best_time:
                 print(f"Early termination: best solution is {best_time}ms, remaining states at >={time_ms}ms")
                 break
-            
+
             if max_time_ms is not None and time_ms > max_time_ms:
                 break
             current_states = states_by_time.pop(time_ms)
-            
+            frontier_size -= len(current_states)
+            duplicates, pushed = current_states.merged, current_states.pushed
+            beam_report['children_pushed'] += current_states.pushed
+            beam_report['duplicates_merged'] += current_states.merged
+            if on_depth is not None:
+                on_depth(depth, states_expanded, frontier_size, len(visited))
+
             if depth <= 20 or depth % 100 == 0:
                 # Show cookies baked by current states
-                cookies_baked_values = [state.cookies_baked for state, path in current_states]
+                cookies_baked_values = [state.cookies_baked for state, _, _ in current_states]
                 print(f"Depth {depth}: Time {time_ms}ms, {len(current_states)} states, cookies baked: {sorted(cookies_baked_values, reverse=True)[:10]}")
-            
+
             # Keep strongest states per time
-            current_states.sort(key=lambda x: x[0].cookies_baked, reverse=True)
-            max_states_per_time = 50
-            current_states = current_states[:max_states_per_time]
-            
-            for state, path in current_states:
+            width = policy.adjust_width(width, frontier_size)
+            beam_report['min_width'] = min(beam_report['min_width'], width)
+            beam_report['max_width'] = max(beam_report['max_width'], width)
+            while pending_front_times and time_ms >= pending_front_times[0]:
+                bucket_states = [entry[0] for entry in current_states]
+                pareto_fronts.append({
+                    'requested_ms': pending_front_times.pop(0),
+                    'time_ms': time_ms,
+                    'bucket_size': len(bucket_states),
+                    'front': [bucket_states[i].to_snapshot() for i in pareto_front(bucket_states)],
+                })
+            current_states, dropped = policy.select(current_states, width, score_key)
+            if dropped:
+                beam_report['truncated_buckets'] += 1
+                beam_report['dropped_states'] += len(dropped)
+                if policy.track_drops:
+                    for _, dropped_step, _ in dropped:
+                        key = (dropped_step.units, dropped_step.key) if dropped_step is not None else (0, 0)
+                        dropped_paths.setdefault(key, []).append(time_ms)
+
+            for position, (state, step, _) in enumerate(current_states):
                 # Check if goal already met
                 if state.cookies_baked >= goal_cookies:
                     if state.time_ms < best_time:
-                        best_solution = (path, state.time_ms)
+                        best_solution = (step, state.time_ms, state)
                         best_time = state.time_ms
                         if depth <= 10 or depth % 100 == 0:  # Log first few and periodically
                             print(f"Found solution at time {state.time_ms}ms (new best)")
+                    if new_parked is not None:
+                        new_parked.append(((time_ms, position), state, step, False))
                     continue  # Don't return yet, check if there's a better solution
-                
-                # Signature for pruning (time, cookies, baked, buildings, click, frame, deferred)
-                # Use higher precision (6 decimal places) to capture small production differences
-                state_sig = (
-                    state.time_ms,
-                    round(state.cookies * 1000000) / 1000000,
-                    round(state.cookies_baked * 1000000) / 1000000,
-                    tuple(sorted(state.buildings.items())),
-                    state.last_click_time_ms,
-                    state.last_production_frame,
-                    tuple(sorted(state.deferred_options))
-                )
+
+                state_sig = state_signature(state)
                 if state_sig in visited:
+                    beam_report['duplicate_slots'] += 1
+                    duplicates += 1
                     continue
                 visited.add(state_sig)
-                
-                # Simulate forward to the first significant event (goal or affordability)
-                dt, ev_type, A, virt_cookies, virt_baked, virt_last_click, virt_last_frame = \
-                    self._simulate_until_first_event(state, goal_cookies)
-                
-                # Advance state (time and deterministic clicks are implicit, not stored)
-                advanced_state, actions = self._advance_state_with_time(state, dt, path)
-                new_path_base = path + actions
-                
-                # If goal is reached before any purchase is affordable
-                if ev_type == 'goal':
-                    if advanced_state.time_ms < best_time:
-                        best_solution = (new_path_base, advanced_state.time_ms)
-                        best_time = advanced_state.time_ms
-                        if depth <= 10 or depth % 100 == 0:  # Log first few and periodically
-                            print(f"Found solution at time {advanced_state.time_ms}ms (new best)")
-                    continue  # Don't return yet, check if there's a better solution
-                
-                # ev_type == 'afford': create buy-now children and a skip child
-                # A is set of (building, qty) that FIRST become affordable now
-                
-                # Generate skip child (defer these options until next purchase)
-                skip_state = advanced_state.copy()
-                for opt in A:
-                    skip_state.deferred_options.add(opt)
-                if max_time_ms is None or skip_state.time_ms <= max_time_ms:
-                    states_by_time.setdefault(skip_state.time_ms, []).append((skip_state, new_path_base))
-                
-                # Generate buy-now children
-                for (bname, qty) in A:
-                    buy_state = advanced_state.copy()
-                    buy_state = self.purchase_multiple(buy_state, bname, qty)
-                    if buy_state is None:
-                        continue  # safety guard against rounding issues
-                    buy_path = list(new_path_base)
-                    # Record each unit purchase to keep verifier unchanged
-                    for _ in range(qty):
-                        buy_path.append(('buy', bname, buy_state.time_ms))
-                    if max_time_ms is None or buy_state.time_ms <= max_time_ms:
-                        states_by_time.setdefault(buy_state.time_ms, []).append((buy_state, buy_path))
-        
+                states_expanded += 1
+
+                expand(state, step, (time_ms, position))
+            if current_states and duplicates:
+                beam_report['max_bucket_duplicate_rate'] = max(beam_report['max_bucket_duplicate_rate'],
+                                                               duplicates / max(pushed, 1))
+
+        best_path = path_from_step(best_solution[0]) if best_solution is not None else None
+        if best_solution is not None and dropped_paths:
+            beam_report['incumbent_prefix_drops'] = len(self._prefix_drop_times(best_path, best_time, dropped_paths))
+        beam_report['final_width'] = width
+        beam_report['incumbent_prefix_drop_share'] = (beam_report['incumbent_prefix_drops'] / beam_report['dropped_states']
+                                                      if beam_report['dropped_states'] else 0.0)
+        self.last_search_stats = {
+            'depth': depth,
+            'states_expanded': states_expanded,
+            'beam': beam_report,
+        }
+        if policy.front_times:
+            self.last_search_stats['pareto_fronts'] = pareto_fronts
+        print(f"Beam: width {beam_report['min_width']}-{beam_report['max_width']}, "
+              f"{beam_report['dropped_states']} states dropped in {beam_report['truncated_buckets']} buckets, "
+              f"{beam_report['incumbent_prefix_drops']} of them copies of a prefix of the incumbent's path")
+        print(f"Options ({self.option_policy}): {beam_report['options'] / max(beam_report['afford_events'], 1):.2f} "
+              f"per purchase event over {beam_report['afford_events']} events")
+        print(f"Duplicates: {beam_report['duplicates_merged']} of {beam_report['children_pushed']} children merged "
+              f"on insert, {beam_report['duplicate_slots']} beam slots taken by duplicates, "
+              f"worst bucket {beam_report['max_bucket_duplicate_rate']:.1%}")
+        if cache_before is not None:
+            cache = self.afford_cache.stats()
+            cache_report = {name: cache[name] - cache_before[name]
+                            for name in ('lookups', 'hits', 'evictions', 'fallbacks', 'resumed', 'stepped', 'summed')}
+            cache_report['hit_rate'] = cache_report['hits'] / cache_report['lookups'] if cache_report['lookups'] else 0.0
+            cache_report['blocks'] = cache['blocks']
+            self.last_search_stats['afford_cache'] = cache_report
+            per_state = max(states_expanded - expanded_before, 1)
+            print(f"Time-to-afford cache: {cache_report['lookups']} lookups, {cache_report['hit_rate']:.1%} hits, "
+                  f"{cache_report['evictions']} evictions, {cache_report['fallbacks']} kernel fallbacks; "
+                  f"{cache_report['resumed']} skip walks resumed, {cache_report['stepped'] / per_state:.2f} events "
+                  f"stepped and {cache_report['summed'] / per_state:.0f} additions summed per expanded state")
+
+        if best_solution is not None:
+            self.last_solution = SolutionTrace(best_solution[0], best_time, best_solution[2])
+        if context is not None:
+            context.goal = goal_cookies
+            context.max_time_ms = max_time_ms
+            context.policy = policy
+            context.initial_state = initial_state
+            context.option_policy = self.option_policy
+            context.states_by_time = states_by_time
+            context.visited = visited
+            context.parked = new_parked
+            context.frontier_size = frontier_size
+            context.width = width
+            context.depth = depth
+            context.states_expanded = states_expanded
+            context.beam_report = beam_report
+            context.dropped_paths = dropped_paths
+            context.pareto_fronts = pareto_fronts
+            context.solution = self.last_solution
+
         # Return best solution found
         if best_solution is not None:
             print(f"\nReturning best solution: {best_time}ms after {depth} depth levels")
-            return best_solution
-        
+            return best_path, best_time
+
         if max_time_ms is None:
             print(f"No solution found after {depth} depth levels")
         else:
             print(f"No solution found within {max_time_ms}ms after {depth} depth levels")
         return None
 
-def export_bfs_path_to_visualization(path: List[Tuple], goal: float, total_time_ms: int, optimizer: 'CookieClickerOptimizer') -> str:
+    def audit_truncation(self, goal_cookies: float, beam_policy: Optional[BeamPolicy] = None,
+                         wide_width: Optional[int] = None, **kwargs) -> dict:
+        """
+        Whether beam truncation cut the line to a better incumbent: search with beam_policy, search again
+        with the width raised to wide_width (default 4x), and look up the wider incumbent's purchase history
+        among the states the first search dropped. lineage_cut_ms lists the bucket times at which the first
+        search dropped a state on the wider incumbent's line; it is empty when the wider run found nothing
+        faster or the first search lost that line some other way (e.g. to a duplicate).
+        Extra keyword arguments go to both bfs_optimize calls.
+        """
+        policy = beam_policy if beam_policy is not None else BeamPolicy()
+        wide_policy = replace(policy, width=wide_width if wide_width is not None else 4 * policy.width,
+                              max_width=max(policy.max_width, wide_width or 4 * policy.width), track_drops=False)
+        context = SearchContext()
+        narrow = self.bfs_optimize(goal_cookies, beam_policy=replace(policy, track_drops=True), context=context,
+                                   **kwargs)
+        narrow_report = self.last_search_stats['beam']
+        wide = self.bfs_optimize(goal_cookies, beam_policy=wide_policy, **kwargs)
+        cuts = []
+        if wide is not None and (narrow is None or wide[1] < narrow[1]):
+            cuts = self._prefix_drop_times(wide[0], wide[1], context.dropped_paths)
+        return {
+            'time_ms': narrow[1] if narrow is not None else None,
+            'wide_time_ms': wide[1] if wide is not None else None,
+            'width': policy.width,
+            'wide_width': wide_policy.width,
+            'dropped_states': narrow_report['dropped_states'],
+            'lineage_cut_ms': cuts,
+        }
+
+def export_bfs_path_to_visualization(path: List[Tuple], goal: float, total_time_ms: int, optimizer: 'CookieClickerOptimizer',
+                                     trace: Optional[SolutionTrace] = None) -> str:
     """
     Export BFS path data to visualization format and save to bfs_data_exports folder.
     Returns the path to the exported file.
@@ -983,7 +2087,20 @@ def export_bfs_path_to_visualization(path: List[Tuple], goal: float, total_time_
     - Only purchase events and click_power changes are exported
     
     This dramatically reduces file size, write time, and read time for large BFS solutions.
+    Passing the search's SolutionTrace (optimizer.last_solution) skips re-simulating the path.
+    For a much smaller columnar file see bfs_export_format.export_bfs_path_to_binary.
     """
+    viz_data = build_visualization_data(path, goal, total_time_ms, optimizer, trace)
+    filepath = _new_export_path(goal, 'json')
+    
+    # Write to file
+    with open(filepath, 'w', encoding='utf-8') as f:
+        json.dump(viz_data, f, indent=2)
+    
+    return str(filepath)
+
+def _new_export_path(goal: float, extension: str):
+    """Timestamped file path inside the bfs_data_exports folder (created if missing)."""
     from pathlib import Path
     from datetime import datetime
     
@@ -993,8 +2110,77 @@ def export_bfs_path_to_visualization(path: List[Tuple], goal: float, total_time_
     
     # Generate filename with timestamp
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"bfs_{int(goal)}_cookies_{timestamp}.json"
-    filepath = export_folder / filename
+    filename = f"bfs_{int(goal)}_cookies_{timestamp}.{extension}"
+    return export_folder / filename
+
+def export_pareto_fronts(fronts: List[dict], goal: float) -> str:
+    """Write the fronts recorded for BeamPolicy.front_times (last_search_stats['pareto_fronts']) to bfs_data_exports."""
+    filepath = _new_export_path(goal, 'pareto.json')
+    with open(filepath, 'w', encoding='utf-8') as f:
+        json.dump({
+            "type": "pareto_fronts",
+            "goal": goal,
+            "objectives": ["cookies_baked", "cookies", "cps"],
+            "fronts": fronts,
+        }, f, indent=2)
+    return str(filepath)
+
+def _purchase_event(building_name: str, time_ms: int, cost: float, is_upgrade: bool, state: GameState) -> dict:
+    """Single purchase event with the state checkpoint AFTER the purchase."""
+    return {
+        "kind": "purchase",
+        "t": time_ms,
+        "item_key": building_name,
+        "cost": cost,
+        "is_upgrade": is_upgrade,
+        # State checkpoint after this purchase (with proper simulation); the click and frame phase make it
+        # loadable as an exact search start (load_snapshot)
+        "state_after": {
+            "cookies": state.cookies,
+            "cookies_baked": state.cookies_baked,
+            "buildings": dict(state.buildings),
+            "cps": state.cps,
+            "click_power": state.click_power,
+            "time_ms": state.time_ms,
+            "last_click_time_ms": state.last_click_time_ms,
+            "last_production_frame": state.last_production_frame
+        }
+    }
+
+def _visualization_data(goal: float, total_time_ms: int, events: list, state: GameState) -> dict:
+    """timeline_paths structure around already-built events and the state at total_time_ms."""
+    return {
+        "type": "timeline_paths",
+        "title": f"BFS Optimal Path to {int(goal)} Cookies",
+        "goal": goal,
+        "paths": [{
+            "name": f"Optimal Path ({total_time_ms}ms)",
+            "color": "BLUE_C",
+            "events": events,
+            "total_ms": total_time_ms,
+            # Add final state at completion time for verification
+            "final_state": {
+                "cookies": state.cookies,
+                "cookies_baked": state.cookies_baked,
+                "buildings": dict(state.buildings),
+                "cps": state.cps,
+                "click_power": state.click_power,
+                "time_ms": state.time_ms,
+                "last_production_frame": state.last_production_frame
+            }
+        }]
+    }
+
+def build_visualization_data(path: List[Tuple], goal: float, total_time_ms: int, optimizer: 'CookieClickerOptimizer',
+                             trace: Optional[SolutionTrace] = None) -> dict:
+    """
+    Build the timeline_paths structure written by export_bfs_path_to_visualization.
+    With a SolutionTrace the search's own states are used; otherwise the path is replayed from time 0.
+    """
+    if trace is not None:
+        events = [_purchase_event(building, time_ms, cost, False, state)
+                  for building, time_ms, cost, state in trace.iter_purchases(optimizer)]
+        return _visualization_data(goal, total_time_ms, events, trace.final_state)
     
     # Convert path to events format (no RLE compression to preserve accurate timestamps)
     # Note: RLE was causing issues where purchases at different timestamps
@@ -1004,17 +2190,7 @@ def export_bfs_path_to_visualization(path: List[Tuple], goal: float, total_time_
     
     # Convert to events
     events = []
-    state = GameState(
-        cookies=0,
-        cookies_baked=0,
-        buildings={},
-        cps=0.0,
-        time_ms=0,
-        last_click_time_ms=-20,
-        last_production_frame=-1,
-        click_power=1.0,
-        deferred_options=set()
-    )
+    state = optimizer.fresh_state()
     
     for count, action_type, action_value, action_time_ms in compressed_path:
         if action_type == 'buy':
@@ -1045,54 +2221,122 @@ def export_bfs_path_to_visualization(path: List[Tuple], goal: float, total_time_
             
             # Record single purchase event with state checkpoint AFTER purchase
             # Note: purchase_building() already recalculates CPS and click_power
-            events.append({
-                "kind": "purchase",
-                "t": action_time_ms,
-                "item_key": building_name,
-                "cost": cost,
-                "is_upgrade": is_upgrade,
-                # State checkpoint after this purchase (with proper simulation)
-                "state_after": {
-                    "cookies": state.cookies,
-                    "cookies_baked": state.cookies_baked,
-                    "buildings": dict(state.buildings),
-                    "cps": state.cps,
-                    "click_power": state.click_power
-                }
-            })
+            events.append(_purchase_event(building_name, action_time_ms, cost, is_upgrade, state))
     
     # Advance to final time to capture end state
     if total_time_ms > state.time_ms:
         state = optimizer.advance_time(state, state.time_ms, total_time_ms)
     
-    # Create visualization data structure
-    viz_data = {
-        "type": "timeline_paths",
-        "title": f"BFS Optimal Path to {int(goal)} Cookies",
-        "goal": goal,
-        "paths": [{
-            "name": f"Optimal Path ({total_time_ms}ms)",
-            "color": "BLUE_C",
-            "events": events,
-            "total_ms": total_time_ms,
-            # Add final state at completion time for verification
-            "final_state": {
-                "cookies": state.cookies,
-                "cookies_baked": state.cookies_baked,
-                "buildings": dict(state.buildings),
-                "cps": state.cps,
-                "click_power": state.click_power,
-                "time_ms": state.time_ms,
-                "last_production_frame": state.last_production_frame
-            }
-        }]
-    }
+    return _visualization_data(goal, total_time_ms, events, state)
+
+def build_verification_payload(path: List[Tuple[str, str, int]]) -> Tuple[list, dict]:
+    """
+    Convert a BFS path into the verification page's action list and predicted building counts.
+    Consecutive purchases of the same building at the same time are grouped as [count, 'buy', building, time];
+    predicted counts are keyed by JS building name.
+    """
+    json_path = []
+    predicted_buildings_counts = {}
     
-    # Write to file
-    with open(filepath, 'w', encoding='utf-8') as f:
-        json.dump(viz_data, f, indent=2)
+    i = 0
+    while i < len(path):
+        action_type, action_value, action_time_ms = path[i]
+        
+        if action_type == 'buy':
+            # Count consecutive purchases of same building at same time
+            building = action_value
+            time = action_time_ms
+            count = 1
+            
+            # Look ahead for consecutive same purchases
+            while i + count < len(path):
+                next_type, next_building, next_time = path[i + count]
+                if next_type == 'buy' and next_building == building and next_time == time:
+                    count += 1
+                else:
+                    break
+            
+            # Store as: [count, 'buy', building, time]
+            json_path.append([count, action_type, action_value, action_time_ms])
+            
+            js_name = _build_js_building_name(action_value)
+            predicted_buildings_counts[js_name] = predicted_buildings_counts.get(js_name, 0) + count
+            
+            i += count
+        else:
+            # Non-buy actions stored as before (shouldn't happen with current optimization)
+            json_path.append([action_type, action_value, action_time_ms])
+            i += 1
     
-    return str(filepath)
+    return json_path, predicted_buildings_counts
+
+def collect_solution_outputs(trace: SolutionTrace, goal: float, optimizer: 'CookieClickerOptimizer') -> Tuple[dict, list, dict, List[str]]:
+    """
+    Single pass over the winning path that produces everything main() reports:
+    the visualization export data, the verification page's RLE actions and predicted building counts,
+    and the console lines for each purchase. States come from the search, so nothing is re-simulated.
+    """
+    events = []
+    json_path = []
+    predicted_buildings_counts = {}
+    summary_lines = []
+    for building, time_ms, cost, state_after in trace.iter_purchases(optimizer):
+        events.append(_purchase_event(building, time_ms, cost, False, state_after))
+        # Same grouping as build_verification_payload: [count, 'buy', building, time]
+        if json_path and json_path[-1][2] == building and json_path[-1][3] == time_ms:
+            json_path[-1][0] += 1
+        else:
+            json_path.append([1, 'buy', building, time_ms])
+        js_name = _build_js_building_name(building)
+        predicted_buildings_counts[js_name] = predicted_buildings_counts.get(js_name, 0) + 1
+        summary_lines.append(f"{len(events):2d}. Buy {building} #{state_after.buildings[building]} for {cost:,.0f} cookies at {time_ms}ms")
+    viz_data = _visualization_data(goal, trace.total_time_ms, events, trace.final_state)
+    return viz_data, json_path, predicted_buildings_counts, summary_lines
+
+def replay_purchases(path: List[Tuple[str, str, int]], optimizer: 'CookieClickerOptimizer') -> GameState:
+    """State right after the last purchase of path, replayed from 0ms with advance_time."""
+    state = optimizer.fresh_state()
+    for _action, building, time_ms in path:
+        if time_ms > state.time_ms:
+            state = optimizer.advance_time(state, state.time_ms, time_ms)
+        state = optimizer.purchase_building(state, building)
+    return state
+
+def load_snapshot(filename: str, optimizer: 'CookieClickerOptimizer', at_ms: Optional[int] = None,
+                  event: Optional[int] = None) -> GameState:
+    """
+    Read a search start state from a GameState.to_snapshot() JSON file or from an
+    export_bfs_path_to_visualization file. For exports the checkpoint is the purchase event number
+    event (negative counts from the end), else the last purchase at or before at_ms, else the last purchase.
+    Checkpoints carry their click and frame phase; for exports written before they did, the purchases up
+    to the checkpoint are replayed from 0ms instead of guessing the phase.
+    """
+    with open(filename, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if data.get('type') != 'timeline_paths':
+        return optimizer.state_from_snapshot(data)
+
+    events = [e for e in data['paths'][0]['events'] if e.get('kind') == 'purchase']
+    if not events:
+        raise ValueError(f"{filename}: export has no purchase checkpoints")
+    if event is not None:
+        index = event if event >= 0 else len(events) + event
+    elif at_ms is not None:
+        index = max((i for i, e in enumerate(events) if e['t'] <= at_ms), default=None)
+        if index is None:
+            raise ValueError(f"{filename}: no purchase at or before {at_ms}ms")
+    else:
+        index = len(events) - 1
+    if not 0 <= index < len(events):
+        raise ValueError(f"{filename}: event {event} out of range (export has {len(events)} purchases)")
+
+    checkpoint = events[index]
+    snapshot = dict(checkpoint['state_after'])
+    if 'last_production_frame' not in snapshot:
+        return replay_purchases([('buy', e['item_key'], e['t']) for e in events[:index + 1]], optimizer)
+    snapshot['time_ms'] = checkpoint['t']
+    snapshot['upgrades'] = [e['item_key'] for e in events[:index + 1] if e.get('is_upgrade')]
+    return optimizer.state_from_snapshot(snapshot)
 
 def compress_path(path):
     """Compress consecutive identical actions for cleaner output (using millisecond timestamps)
@@ -1116,6 +2360,15 @@ def compress_path(path):
     
     return compressed
 
+def cli_option(argv: List[str], name: str, default=None):
+    """Value after flag name in argv, removing both from argv; default when the flag is absent."""
+    if name in argv:
+        index = argv.index(name)
+        value = argv[index + 1]
+        del argv[index:index + 2]
+        return value
+    return default
+
 def main():
     optimizer = CookieClickerOptimizer()
     
@@ -1139,52 +2392,24 @@ def main():
             return
         
         path, total_time_ms = result
+        
+        # One pass over the search's own states: export data, verification actions and console lines
+        viz_data, json_path, predicted_buildings_counts, summary_lines = \
+            collect_solution_outputs(optimizer.last_solution, goal, optimizer)
 
         # Export BFS data for visualization
         try:
-            viz_export_path = export_bfs_path_to_visualization(path, goal, total_time_ms, optimizer)
+            viz_export_path = _new_export_path(goal, 'json')
+            with open(viz_export_path, 'w', encoding='utf-8') as f:
+                json.dump(viz_data, f, indent=2)
             print(f"\n✓ Exported BFS data for visualization: {viz_export_path}")
         except Exception as e:
             print(f"\n⚠ Failed to export BFS visualization data: {e}")
 
-        # Prepare path for verification page with RLE compression
-        # Group consecutive purchases of the same building at the same time
-        json_path = []
-        predicted_buildings_counts = {}
-        
-        i = 0
-        while i < len(path):
-            action_type, action_value, action_time_ms = path[i]
-            
-            if action_type == 'buy':
-                # Count consecutive purchases of same building at same time
-                building = action_value
-                time = action_time_ms
-                count = 1
-                
-                # Look ahead for consecutive same purchases
-                while i + count < len(path):
-                    next_type, next_building, next_time = path[i + count]
-                    if next_type == 'buy' and next_building == building and next_time == time:
-                        count += 1
-                    else:
-                        break
-                
-                # Store as: [count, 'buy', building, time]
-                json_path.append([count, action_type, action_value, action_time_ms])
-                
-                js_name = _build_js_building_name(action_value)
-                predicted_buildings_counts[js_name] = predicted_buildings_counts.get(js_name, 0) + count
-                
-                i += count
-            else:
-                # Non-buy actions stored as before (shouldn't happen with current optimization)
-                json_path.append([action_type, action_value, action_time_ms])
-                i += 1
-
         # Generate and launch verification HTML
         out_html = os.path.join('Automated Verification', 'auto_verification.html')
-        _generate_verification_html(out_html, goal, total_time_ms, json_path, predicted_buildings_counts)
+        _generate_verification_html(out_html, goal, total_time_ms, json_path, predicted_buildings_counts, optimizer.buildings,
+                                    ruleset=optimizer.ruleset)
 
         try:
             webbrowser.open('file://' + os.path.abspath(out_html))
@@ -1199,38 +2424,19 @@ def main():
         print("\nOptimal path:")
         print("-" * 60)
         
-        # Compress consecutive actions for cleaner output
-        compressed_path = compress_path(path)
-        
-        current_cookies = 0
-        buildings_owned = {}
-        action_number = 1
-        
-        for action_group in compressed_path:
-            action_type = action_group['type']
-            count = action_group['count']
-            
-            if action_type == 'buy':
-                building = action_group['building']
-                time_ms = action_group['time_ms']
-                buildings_owned[building] = buildings_owned.get(building, 0) + 1
-                
-                # Calculate cost
-                cost = optimizer.get_building_cost(building, buildings_owned[building] - 1)
-                current_cookies -= cost
-                
-                print(f"{action_number:2d}. Buy {building} #{buildings_owned[building]} for {cost:,.0f} cookies at {time_ms}ms")
-            
-            action_number += 1
+        for line in summary_lines:
+            print(line)
         
         print(f"\nFinal state:")
         print("Buildings owned:")
-        for building, count in buildings_owned.items():
+        for building, count in optimizer.last_solution.final_state.buildings.items():
             if count > 0:
                 print(f"  {building}: {count}")
-        print(f"\nNote: Clicks occur deterministically every 20ms starting at 0ms (0, 20, 40, 60, ...).")
+        interval = optimizer.ruleset.click_interval_ms
+        print(f"\nNote: Clicks occur deterministically every {interval}ms starting at 0ms "
+              f"(0, {interval}, {2 * interval}, {3 * interval}, ...).")
         print(f"      Building purchases are instant (0ms).")
-        print(f"      Production applied each frame (~33.33ms) based on CpS at frame start.")
+        print(f"      Production applied each frame (~{optimizer.ruleset.ms_per_frame:.2f}ms) based on CpS at frame start.")
                 
     except ValueError:
         print("Please enter a valid number.")
@@ -1238,4 +2444,8 @@ def main():
         print("\nSearch cancelled by user.")
 
 if __name__ == "__main__":
+    if '--profile' in sys.argv[1:]:
+        # Non-interactive: profile the search alone (see search_profiler.py for options)
+        from search_profiler import main as profile_main
+        sys.exit(profile_main(sys.argv[1:]))
     main()
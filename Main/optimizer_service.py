@@ -0,0 +1,368 @@
+"""
+Local optimization service: one long-running process that answers bfs_optimize queries over HTTP.
+
+- Searches run in a pool of warm worker processes (imports done, optimizer constructed).
+- Identical requests that arrive while a search is running share that search.
+- Finished results are kept in an in-memory LRU, so repeats are answered without searching.
+- Goals, beam widths and max_time_ms are capped (--max-goal, --max-beam-width, --max-time-ms), and requests
+  without max_time_ms get the cap, so no request can hold a worker indefinitely.
+- If a worker dies (e.g. out of memory) the pool is rebuilt and the search retried once; a search that
+  breaks the new pool as well fails with 503 and later requests are served normally.
+
+Usage:
+    python optimizer_service.py serve [--host 127.0.0.1] [--port 8765] [--unix PATH] [--workers N] [--cache-size 1024]
+                                      [--max-goal 1e5] [--max-beam-width 400] [--max-time-ms 3600000]
+    python optimizer_service.py loadtest [--host/--port/--unix ...] [--requests 1000] [--concurrency 200] [--goals 1000,2000,3000]
+
+Endpoints:
+    GET  /solve?goal=1000[&beam_width=50][&max_time_ms=60000]
+    POST /solve   {"goal": 1000, "beam_width": 50}
+    GET  /stats
+"""
+import asyncio
+import io
+import json
+import os
+import sys
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import redirect_stdout
+from typing import List, Optional
+from urllib.parse import parse_qsl, urlsplit
+
+DEFAULT_PORT = 8765
+MAX_BODY_BYTES = 1 << 16
+MAX_GOAL = 1e5  # goal 1e5 takes minutes with the default beam; larger ones need the CLI
+MAX_BEAM_WIDTH = 400
+MAX_TIME_MS = 3600000  # game time searched at most (one hour), also the default
+
+_worker_optimizer = None
+
+
+def _init_worker():
+    """Pool initializer: build the optimizer once per worker and run a tiny search to warm it up."""
+    global _worker_optimizer
+    from main import CookieClickerOptimizer
+    _worker_optimizer = CookieClickerOptimizer()
+    with redirect_stdout(io.StringIO()):
+        _worker_optimizer.bfs_optimize(10)
+
+
+def _solve_in_worker(goal: float, beam_width: int, max_time_ms: Optional[int]) -> dict:
+    from main import BeamPolicy, build_verification_payload
+    optimizer = _worker_optimizer
+    started = time.perf_counter()
+    with redirect_stdout(io.StringIO()):
+        result = optimizer.bfs_optimize(goal, max_time_ms=max_time_ms, beam_policy=BeamPolicy(width=beam_width))
+    response = {
+        'goal': goal,
+        'beam_width': beam_width,
+        'max_time_ms': max_time_ms,
+        'found': result is not None,
+        'search_s': round(time.perf_counter() - started, 4),
+        'states_expanded': optimizer.last_search_stats['states_expanded'],
+    }
+    if result is not None:
+        path, total_time_ms = result
+        final_state = optimizer.last_solution.final_state
+        json_path, predicted = build_verification_payload(path)
+        response.update(
+            total_time_ms=total_time_ms,
+            cookies_baked=final_state.cookies_baked,
+            purchases=len(path),
+            path=json_path,
+            buildings={b: n for b, n in final_state.buildings.items() if n > 0},
+        )
+    return response
+
+
+class RequestError(Exception):
+    """Bad request; reported to the client as HTTP 400."""
+
+
+class OptimizerService:
+    """Coalescing, caching front end over a process pool of warm optimizers."""
+
+    def __init__(self, workers: Optional[int] = None, cache_size: int = 1024, max_goal: float = MAX_GOAL,
+                 max_beam_width: int = MAX_BEAM_WIDTH, max_time_ms: int = MAX_TIME_MS):
+        self.workers = workers or os.cpu_count() or 1
+        self.cache_size = cache_size
+        self.max_goal = max_goal
+        self.max_beam_width = max_beam_width
+        self.max_time_ms = max_time_ms
+        self.cache = OrderedDict()  # key -> response dict, least recently used first
+        self.in_flight = {}  # key -> asyncio.Task of the running search
+        self.pool = None
+        self.stats = {'requests': 0, 'cache_hits': 0, 'coalesced': 0, 'searches': 0, 'errors': 0,
+                      'pool_restarts': 0}
+
+    def start(self):
+        self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker)
+        # Spawn and warm every worker now rather than on the first requests
+        for future in [self.pool.submit(_solve_in_worker, 10, 50, None) for _ in range(self.workers)]:
+            future.result()
+
+    def shutdown(self):
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures=True)
+            self.pool = None
+
+    def _replace_pool(self, broken: ProcessPoolExecutor):
+        """Swap in a fresh pool for a broken one (once, however many searches saw it break)."""
+        if self.pool is not broken:
+            return
+        broken.shutdown(wait=False, cancel_futures=True)
+        self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker)
+        self.stats['pool_restarts'] += 1
+
+    def request_key(self, params: dict) -> tuple:
+        try:
+            goal = float(params['goal'])
+            beam_width = int(params.get('beam_width', 50))
+            max_time_ms = params.get('max_time_ms')
+            max_time_ms = int(float(max_time_ms)) if max_time_ms not in (None, '') else None
+        except KeyError:
+            raise RequestError("missing 'goal'")
+        except (TypeError, ValueError) as e:
+            raise RequestError(f"invalid parameter: {e}")
+        if not 0 < goal <= self.max_goal:
+            raise RequestError(f"goal must be positive and at most {self.max_goal:g}")
+        if not 1 <= beam_width <= self.max_beam_width:
+            raise RequestError(f"beam_width must be between 1 and {self.max_beam_width}")
+        if max_time_ms is None:
+            max_time_ms = self.max_time_ms
+        if not 0 <= max_time_ms <= self.max_time_ms:
+            raise RequestError(f"max_time_ms must be between 0 and {self.max_time_ms}")
+        return goal, beam_width, max_time_ms
+
+    async def solve(self, params: dict) -> tuple:
+        """Return (response, source) with source one of 'cache', 'coalesced', 'search'."""
+        key = self.request_key(params)
+        self.stats['requests'] += 1
+        cached = self.cache.get(key)
+        if cached is not None:
+            self.cache.move_to_end(key)
+            self.stats['cache_hits'] += 1
+            return cached, 'cache'
+        future = self.in_flight.get(key)
+        if future is not None:
+            self.stats['coalesced'] += 1
+            return await asyncio.shield(future), 'coalesced'
+
+        future = asyncio.ensure_future(self._search(key))
+        self.in_flight[key] = future
+        self.stats['searches'] += 1
+        future.add_done_callback(lambda done: self._finish(key, done))
+        # shield: a client hanging up must not cancel a search other requests are waiting on
+        return await asyncio.shield(future), 'search'
+
+    async def _search(self, key: tuple) -> dict:
+        """Run one search in the pool, rebuilding the pool and retrying once if a worker died."""
+        loop = asyncio.get_running_loop()
+        for attempt in range(2):
+            pool = self.pool
+            try:
+                return await loop.run_in_executor(pool, _solve_in_worker, *key)
+            except BrokenProcessPool:
+                self._replace_pool(pool)
+                if attempt:
+                    raise
+
+    def _finish(self, key: tuple, future: asyncio.Future):
+        self.in_flight.pop(key, None)
+        if future.cancelled() or future.exception() is not None:
+            return
+        self.cache[key] = future.result()
+        self.cache.move_to_end(key)
+        while len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+    def snapshot(self) -> dict:
+        return {**self.stats, 'cached': len(self.cache), 'in_flight': len(self.in_flight), 'workers': self.workers}
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Minimal HTTP/1.1: one request per connection unless the client asks for keep-alive."""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, target, version = request_line.decode('latin-1').split(' ', 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                body = b''
+                length = int(headers.get('content-length', 0))
+                if length > MAX_BODY_BYTES:
+                    await self._respond(writer, 413, {'error': 'request body too large'}, False)
+                    break
+                if length:
+                    body = await reader.readexactly(length)
+                keep_alive = headers.get('connection', '').lower() == 'keep-alive'
+                status, payload = await self.dispatch(method, target, body)
+                await self._respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def dispatch(self, method: str, target: str, body: bytes) -> tuple:
+        url = urlsplit(target)
+        if url.path == '/stats' and method == 'GET':
+            return 200, self.snapshot()
+        if url.path != '/solve' or method not in ('GET', 'POST'):
+            return 404, {'error': f'no route for {method} {url.path}'}
+        try:
+            params = dict(parse_qsl(url.query))
+            if method == 'POST' and body:
+                payload = json.loads(body)
+                if not isinstance(payload, dict):
+                    raise RequestError(f"request body must be a JSON object, not {type(payload).__name__}")
+                params.update(payload)
+            response, source = await self.solve(params)
+            return 200, {**response, 'source': source}
+        except (RequestError, json.JSONDecodeError, UnicodeDecodeError) as e:
+            return 400, {'error': str(e)}
+        except BrokenProcessPool:
+            self.stats['errors'] += 1
+            return 503, {'error': 'the search worker died twice on this request'}
+        except Exception as e:
+            self.stats['errors'] += 1
+            return 500, {'error': f'{type(e).__name__}: {e}'}
+
+    @staticmethod
+    async def _respond(writer: asyncio.StreamWriter, status: int, payload: dict, keep_alive: bool):
+        body = json.dumps(payload).encode()
+        reason = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 413: 'Payload Too Large',
+                  503: 'Service Unavailable'}.get(status, 'Error')
+        writer.write(f"HTTP/1.1 {status} {reason}\r\nContent-Type: application/json\r\n"
+                     f"Content-Length: {len(body)}\r\nConnection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+                     .encode() + body)
+        await writer.drain()
+
+
+async def serve(host: str = '127.0.0.1', port: int = DEFAULT_PORT, unix_path: Optional[str] = None,
+                workers: Optional[int] = None, cache_size: int = 1024, **limits):
+    service = OptimizerService(workers, cache_size, **limits)
+    service.start()
+    try:
+        if unix_path:
+            server = await asyncio.start_unix_server(service.handle_connection, path=unix_path, backlog=1024)
+            where = unix_path
+        else:
+            server = await asyncio.start_server(service.handle_connection, host, port, backlog=1024)
+            where = f'http://{host}:{port}'
+        print(f"Optimizer service on {where} with {service.workers} warm workers, cache {cache_size}", flush=True)
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.shutdown()
+        if unix_path and os.path.exists(unix_path):
+            os.unlink(unix_path)
+
+
+async def request(path: str, host: str = '127.0.0.1', port: int = DEFAULT_PORT,
+                  unix_path: Optional[str] = None) -> tuple:
+    """GET path from the service; returns (status, decoded JSON)."""
+    if unix_path:
+        reader, writer = await asyncio.open_unix_connection(unix_path)
+    else:
+        reader, writer = await asyncio.open_connection(host, port)
+    try:
+        writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}\r\nConnection: close\r\n\r\n".encode())
+        await writer.drain()
+        status = int((await reader.readline()).split()[1])
+        length = 0
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            if name.lower() == 'content-length':
+                length = int(value)
+        return status, json.loads(await reader.readexactly(length))
+    finally:
+        writer.close()
+
+
+async def load_test(goals: List[float], requests: int = 1000, concurrency: int = 200, **address) -> dict:
+    """Drive the service with concurrent /solve requests cycling through goals and summarize latencies."""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    sources = {}
+    failures = 0
+
+    async def one(i: int):
+        nonlocal failures
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                status, payload = await request(f'/solve?goal={goals[i % len(goals)]:g}', **address)
+            except OSError:
+                status, payload = 0, {}
+            latencies.append(time.perf_counter() - started)
+            if status != 200:
+                failures += 1
+                return
+            sources[payload['source']] = sources.get(payload['source'], 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+
+    def pct(p):
+        return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000, 2)
+
+    _, server_stats = await request('/stats', **address)
+    return {
+        'requests': requests,
+        'concurrency': concurrency,
+        'elapsed_s': round(elapsed, 3),
+        'requests_per_s': round(requests / elapsed, 1),
+        'latency_ms': {'p50': pct(0.5), 'p90': pct(0.9), 'p99': pct(0.99), 'max': pct(1.0)},
+        'sources': sources,
+        'failures': failures,
+        'server': server_stats,
+    }
+
+
+def main(argv: List[str]) -> int:
+    from main import cli_option
+    argv = list(argv)
+    if not argv or argv[0] not in ('serve', 'loadtest'):
+        print(__doc__)
+        return 2
+    address = {
+        'host': cli_option(argv, '--host', '127.0.0.1'),
+        'port': int(cli_option(argv, '--port', DEFAULT_PORT)),
+        'unix_path': cli_option(argv, '--unix'),
+    }
+    if argv[0] == 'serve':
+        workers = cli_option(argv, '--workers')
+        try:
+            asyncio.run(serve(workers=int(workers) if workers else None,
+                              cache_size=int(cli_option(argv, '--cache-size', 1024)),
+                              max_goal=float(cli_option(argv, '--max-goal', MAX_GOAL)),
+                              max_beam_width=int(cli_option(argv, '--max-beam-width', MAX_BEAM_WIDTH)),
+                              max_time_ms=int(cli_option(argv, '--max-time-ms', MAX_TIME_MS)), **address))
+        except KeyboardInterrupt:
+            pass
+        return 0
+    goals = [float(g) for g in cli_option(argv, '--goals', '1000,2000,3000').split(',') if g]
+    report = asyncio.run(load_test(goals, int(cli_option(argv, '--requests', 1000)),
+                                   int(cli_option(argv, '--concurrency', 200)), **address))
+    print(json.dumps(report, indent=2))
+    return 0 if report['failures'] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,354 @@
+"""
+Headless replay verifier for BFS paths.
+
+Reproduces the TASController embedded by _generate_verification_html without a browser:
+- advanceOneMs: time moves first, then production on frame entry, then the auto-click
+- autoClick on multiples of the click interval, 20ms (never twice in the same millisecond)
+- production only when entering a new frame while CpS > 0 (lastProductionFrame stays put while CpS is 0)
+- actions as [count, 'buy', building, time] (RLE) or legacy ['buy', building, time]
+
+Instead of stepping every millisecond it jumps between click and frame events, applying them in the
+same order (production before click) so the float sums match the page bit for bit. Click interval,
+frame rate and price increase are read from the page's RULESET (the default Ruleset for JSON files).
+
+Usage:
+    python replay_verifier.py auto_verification.html [more.html|bfs_path.json ...] [--json]
+    python replay_verifier.py --checkpoints EXPORT.json|EXPORT.bfsx [...]
+
+--checkpoints loads every purchase checkpoint of a bfs_data_exports file as a search start state
+(load_snapshot, or the .bfsx reader) and checks it field by field against the path replayed from 0ms with
+advance_time, click and frame phase included.
+"""
+import json
+import math
+import re
+import sys
+import time
+from dataclasses import dataclass, field, asdict
+from typing import List, Optional
+
+from main import (CookieClickerOptimizer, Ruleset, build_verification_payload, load_snapshot,
+                  _build_js_building_name)
+
+# Constants as written in the generated page
+JS_CLICK_POWER = 1
+TIME_TOLERANCE_MS = 10
+COOKIE_TOLERANCE = 1e-6
+
+
+@dataclass
+class ReplayResult:
+    """Final TASController/Game state after replaying a path."""
+    time_ms: int
+    cookies: float  # Game.cookies (bank)
+    cookies_baked: float  # TASController.cookiesBaked
+    cookies_from_clicks: float
+    cookie_clicks: int
+    frames: int  # Math.floor(timeMs / msPerFrame)
+    buildings: dict  # JS name -> amount, only buildings with amount > 0 (page order)
+    failed_purchases: List[list] = field(default_factory=list)  # [building, time] of buys the page would reject
+
+
+@dataclass
+class VerificationReport:
+    """Structured pass/fail for one path, mirroring the checks logged by the verification page."""
+    passed: bool
+    goal: float
+    expected_time_ms: int
+    time_ms: int
+    time_ok: bool
+    cookies_baked: float
+    cookies_ok: bool  # goal reached
+    cookies_exact: bool  # the page's |baked - goal| < 1e-6 check
+    frames: int
+    predicted_frames: int
+    frames_ok: bool
+    buildings: dict
+    predicted_buildings: dict
+    buildings_ok: bool
+    failed_purchases: List[list]
+    failures: List[str]
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+class ReplayEngine:
+    """Event-driven port of the page's Game + TASController pair."""
+
+    def __init__(self, optimizer: Optional[CookieClickerOptimizer] = None, ruleset: Optional[Ruleset] = None):
+        optimizer = optimizer or CookieClickerOptimizer()
+        # Game.Objects in declaration order: js name -> (basePrice, baseCps)
+        self.objects = {}
+        for bname, building in sorted(optimizer.buildings.items(), key=lambda kv: kv[1].id):
+            self.objects[_build_js_building_name(bname)] = (building.base_cost, building.base_cps)
+        self.ruleset = ruleset if ruleset is not None else optimizer.ruleset
+        self.price_increase = self.ruleset.price_increase
+        # Smallest integer millisecond whose Math.floor(t / msPerFrame) reaches a frame
+        self._frame_entry_ms = self.ruleset.compile().frame_entry_ms
+
+    def replay(self, path_json: list, expected_time_ms: int) -> ReplayResult:
+        """Play path_json exactly as executeNextAction would and return the final state."""
+        objects = self.objects
+        amounts = {name: 0 for name in objects}
+        price_increase = self.price_increase
+        ms_per_frame = self.ruleset.ms_per_frame
+        fps = self.ruleset.fps
+        interval = self.ruleset.click_interval_ms
+        click_power = JS_CLICK_POWER
+
+        t = 0
+        cookies = 0.0
+        baked = 0.0
+        from_clicks = 0.0
+        clicks = 0
+        cps = 0.0
+        last_click = -interval
+        last_frame = -1
+        failed = []
+
+        def auto_click():
+            nonlocal cookies, baked, from_clicks, clicks, last_click
+            if t % interval == 0 and t != last_click:
+                cookies += click_power
+                baked += click_power
+                from_clicks += click_power
+                clicks += 1
+                last_click = t
+
+        def advance_to(target):
+            # Equivalent to: while (timeMs < target) advanceOneMs();
+            nonlocal t, cookies, baked, from_clicks, clicks, last_click, last_frame
+            if t >= target:
+                return
+            prod = cps / fps
+            next_click = (t // interval + 1) * interval
+            if cps > 0:
+                if math.floor((t + 1) / ms_per_frame) > last_frame:
+                    next_prod = t + 1
+                else:
+                    next_prod = self._frame_entry_ms(last_frame + 1)
+            else:
+                next_prod = target + 1
+            while True:
+                u = next_prod if next_prod < next_click else next_click
+                if u > target:
+                    break
+                if u == next_prod:
+                    cookies += prod
+                    baked += prod
+                    last_frame = math.floor(u / ms_per_frame)
+                    next_prod = self._frame_entry_ms(last_frame + 1)
+                if u == next_click:
+                    cookies += click_power
+                    baked += click_power
+                    from_clicks += click_power
+                    clicks += 1
+                    last_click = u
+                    next_click += interval
+            t = target
+
+        for action in path_json:
+            if isinstance(action[0], (int, float)):
+                count, action_type, action_value, action_time = action[0], action[1], action[2], action[3]
+            else:
+                count, action_type, action_value, action_time = 1, action[0], action[1], action[2]
+            if t == 0 and action_time > 0:
+                auto_click()
+            advance_to(action_time)
+            if action_type != 'buy':
+                continue
+            js_name = _build_js_building_name(action_value)
+            for _ in range(int(count)):
+                if js_name not in objects:
+                    failed.append([action_value, t])
+                    continue
+                base_price, _base_cps = objects[js_name]
+                price = math.ceil(base_price * price_increase ** amounts[js_name])
+                if cookies >= price:
+                    cookies -= price
+                    amounts[js_name] += 1
+                    cps = 0.0
+                    for name, (_bp, base_cps) in objects.items():
+                        cps += amounts[name] * base_cps
+                else:
+                    failed.append([action_value, t])
+
+        auto_click()
+        advance_to(expected_time_ms)
+
+        return ReplayResult(
+            time_ms=t,
+            cookies=cookies,
+            cookies_baked=baked,
+            cookies_from_clicks=from_clicks,
+            cookie_clicks=clicks,
+            frames=math.floor(t / ms_per_frame),
+            buildings={name: n for name, n in amounts.items() if n > 0},
+            failed_purchases=failed,
+        )
+
+    def verify(self, path_json: list, goal: float, expected_time_ms: int, predicted_buildings: dict) -> VerificationReport:
+        """Replay and apply the page's end-of-run checks."""
+        result = self.replay(path_json, expected_time_ms)
+        predicted_frames = math.floor(expected_time_ms / self.ruleset.ms_per_frame)
+        time_ok = abs(result.time_ms - expected_time_ms) < TIME_TOLERANCE_MS
+        cookies_ok = result.cookies_baked >= goal
+        frames_ok = result.frames == predicted_frames
+        # The page compares JSON strings (order-sensitive); counts are what matter here
+        buildings_ok = result.buildings == dict(predicted_buildings)
+
+        failures = []
+        if not time_ok:
+            failures.append(f"time {result.time_ms}ms vs expected {expected_time_ms}ms")
+        if not cookies_ok:
+            failures.append(f"cookies baked {result.cookies_baked!r} below goal {goal!r}")
+        if not frames_ok:
+            failures.append(f"frames {result.frames} vs predicted {predicted_frames}")
+        if not buildings_ok:
+            failures.append(f"buildings {result.buildings} vs predicted {dict(predicted_buildings)}")
+        if result.failed_purchases:
+            failures.append(f"{len(result.failed_purchases)} purchases rejected, first {result.failed_purchases[0]}")
+
+        return VerificationReport(
+            passed=not failures,
+            goal=goal,
+            expected_time_ms=expected_time_ms,
+            time_ms=result.time_ms,
+            time_ok=time_ok,
+            cookies_baked=result.cookies_baked,
+            cookies_ok=cookies_ok,
+            cookies_exact=abs(result.cookies_baked - goal) < COOKIE_TOLERANCE,
+            frames=result.frames,
+            predicted_frames=predicted_frames,
+            frames_ok=frames_ok,
+            buildings=result.buildings,
+            predicted_buildings=dict(predicted_buildings),
+            buildings_ok=buildings_ok,
+            failed_purchases=result.failed_purchases,
+            failures=failures,
+        )
+
+    def verify_solution(self, path: list, goal: float, total_time_ms: int) -> VerificationReport:
+        """Verify a raw bfs_optimize path (list of ('buy', building, time))."""
+        json_path, predicted = build_verification_payload(path)
+        return self.verify(json_path, goal, total_time_ms, predicted)
+
+    def verify_many(self, cases: list) -> List[VerificationReport]:
+        """Verify (path_json, goal, expected_time_ms, predicted_buildings) tuples."""
+        return [self.verify(*case) for case in cases]
+
+
+def load_case(filename: str) -> tuple:
+    """
+    Read (path_json, goal, expected_time_ms, predicted_buildings) from a generated verification page
+    or from an export_bfs_path.py JSON file.
+    """
+    with open(filename, 'r', encoding='utf-8') as f:
+        text = f.read()
+    if filename.endswith('.html'):
+        def const(name):
+            match = re.search(r'const ' + name + r' = (.*?);\n', text)
+            if match is None:
+                raise ValueError(f"{filename}: no {name} constant")
+            return json.loads(match.group(1))
+        return const('BFS_PATH'), const('GOAL_COOKIES'), const('EXPECTED_TIME'), const('PREDICTED_BUILDINGS')
+    data = json.loads(text)
+    path_json = data['path']
+    predicted = {}
+    for action in path_json:
+        if isinstance(action[0], (int, float)):
+            count, action_type, action_value = action[0], action[1], action[2]
+        else:
+            count, action_type, action_value = 1, action[0], action[1]
+        if action_type == 'buy':
+            js_name = _build_js_building_name(action_value)
+            predicted[js_name] = predicted.get(js_name, 0) + count
+    return path_json, data['goal_cookies'], data['total_time_ms'], predicted
+
+
+def load_ruleset(filename: str) -> Ruleset:
+    """The RULESET a verification page was generated with (default rules for JSON files and older pages)."""
+    if filename.endswith('.html'):
+        with open(filename, 'r', encoding='utf-8') as f:
+            match = re.search(r'const RULESET = (.*?);\n', f.read())
+        if match is not None:
+            return Ruleset.from_js(json.loads(match.group(1)))
+    return Ruleset()
+
+
+CHECKPOINT_FIELDS = ('time_ms', 'cookies', 'cookies_baked', 'buildings', 'cps', 'click_power', 'last_click_time_ms',
+                     'last_production_frame')
+
+
+def check_checkpoints(filename: str, optimizer: CookieClickerOptimizer) -> List[str]:
+    """
+    Differences between each loaded purchase checkpoint of an export (JSON or .bfsx) and the state right
+    after that purchase in a replay from 0ms; empty when every checkpoint is an exact start state.
+    """
+    if filename.endswith('.bfsx'):
+        from bfs_export_format import BFSBinaryReader
+        with open(filename, 'rb') as f:
+            reader = BFSBinaryReader(f)
+            path = reader.read_path()
+        loaded = {c['purchase_index']: optimizer.state_from_snapshot(c['state_after']) for c in reader.checkpoints}
+    else:
+        with open(filename, 'r', encoding='utf-8') as f:
+            events = [e for e in json.load(f)['paths'][0]['events'] if e.get('kind') == 'purchase']
+        path = [('buy', e['item_key'], e['t']) for e in events]
+        loaded = {i: load_snapshot(filename, optimizer, event=i) for i in range(len(events))}
+    state = optimizer.fresh_state()
+    failures = []
+    for index, (_action, building, time_ms) in enumerate(path):
+        if time_ms > state.time_ms:
+            state = optimizer.advance_time(state, state.time_ms, time_ms)
+        state = optimizer.purchase_building(state, building)
+        if index in loaded:
+            failures.extend(f"checkpoint {index} ({building} at {time_ms}ms): {name} "
+                            f"{getattr(loaded[index], name)!r} != replay {getattr(state, name)!r}"
+                            for name in CHECKPOINT_FIELDS if getattr(loaded[index], name) != getattr(state, name))
+    return failures
+
+
+def main(argv: List[str]) -> int:
+    if argv and argv[0] == '--checkpoints':
+        optimizer = CookieClickerOptimizer()
+        failed = 0
+        for filename in argv[1:]:
+            failures = check_checkpoints(filename, optimizer)
+            failed += bool(failures)
+            print(f"{'⚠' if failures else '✓'} {filename}: {len(failures)} checkpoint difference(s)")
+            for failure in failures:
+                print(f"    {failure}")
+        return 1 if failed or len(argv) < 2 else 0
+    as_json = '--json' in argv
+    files = [a for a in argv if a != '--json']
+    if not files:
+        print(__doc__)
+        return 2
+    optimizer = CookieClickerOptimizer()
+    engines = {}  # one engine per ruleset
+    all_passed = True
+    started = time.perf_counter()
+    for filename in files:
+        ruleset = load_ruleset(filename)
+        engine = engines.get(ruleset)
+        if engine is None:
+            engine = engines[ruleset] = ReplayEngine(optimizer, ruleset)
+        report = engine.verify(*load_case(filename))
+        all_passed = all_passed and report.passed
+        if as_json:
+            print(json.dumps({'file': filename, **report.to_dict()}))
+        else:
+            status = '✓' if report.passed else '⚠'
+            print(f"{status} {filename}: {report.time_ms}ms, baked {report.cookies_baked:.1f} / {report.goal}, "
+                  f"frames {report.frames}/{report.predicted_frames}, buildings {report.buildings}")
+            for failure in report.failures:
+                print(f"    {failure}")
+    if not as_json:
+        print(f"Verified {len(files)} path(s) in {time.perf_counter() - started:.3f}s")
+    return 0 if all_passed else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,175 @@
+"""
+Profiling mode for bfs_optimize. It records cProfile stats for the search alone and tracemalloc snapshots
+every N depth levels. The interactive prompt, the exports and the browser are all skipped.
+
+Usage:
+    python main.py --profile GOAL [options]
+    python search_profiler.py GOAL [options]
+
+Options:
+    --mode both|cpu|memory   which passes to run (default both; two separate searches so tracing does not
+                             skew the timings)
+    --snapshot-every N       tracemalloc snapshot every N depth levels (default 100)
+    --frames N               traceback depth kept by tracemalloc (default 3; deeper tracebacks slow the
+                             memory pass a lot for little change in attribution)
+    --beam-width N           BeamPolicy width (default 50)
+
+Files are written to bfs_data_exports/ and share one timestamped name:
+    bfs_<goal>_cookies_<timestamp>.prof                      cProfile stats (python -m pstats, snakeviz)
+    bfs_<goal>_cookies_<timestamp>.depth00100.tracemalloc    tracemalloc.Snapshot.load()
+    bfs_<goal>_cookies_<timestamp>.memory.jsonl              traced memory per snapshot, by allocation site
+"""
+import cProfile
+import dis
+import inspect
+import io
+import json
+import pstats
+import sys
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+from typing import List, Optional
+
+from main import (BeamPolicy, CookieClickerOptimizer, GameState, PathStep, _new_export_path, cli_option,
+                  path_from_step, path_steps)
+
+SITES = ('GameState.copy', 'paths', 'visited', 'other')
+
+
+def _code_lines(code) -> set:
+    return {(code.co_filename, line) for _, line in dis.findlinestarts(code) if line is not None}
+
+
+def allocation_sites() -> dict:
+    """(filename, lineno) -> site name for the allocation sites the memory report breaks out."""
+    sites = {}
+    for line in _code_lines(GameState.copy.__code__):
+        sites[line] = 'GameState.copy'
+    for fn in (PathStep.extend, path_steps, path_from_step):
+        for line in _code_lines(fn.__code__):
+            sites[line] = 'paths'
+    # The visited set: the signatures stored in it and the set's own growth on add
+    bfs = CookieClickerOptimizer._bfs_search
+    for const in bfs.__code__.co_consts:
+        if inspect.iscode(const) and const.co_name == 'state_signature':
+            for line in _code_lines(const):
+                sites[line] = 'visited'
+    source, first_line = inspect.getsourcelines(bfs)
+    for offset, text in enumerate(source):
+        if 'visited.add(' in text:
+            sites[(bfs.__code__.co_filename, first_line + offset)] = 'visited'
+    return sites
+
+
+def memory_by_site(snapshot: tracemalloc.Snapshot, sites: dict) -> dict:
+    """Traced bytes per site; a trace belongs to the most recent frame of its traceback that is a known site."""
+    totals = dict.fromkeys(SITES, 0)
+    for stat in snapshot.statistics('traceback'):
+        site = 'other'
+        for frame in reversed(stat.traceback):
+            site = sites.get((frame.filename, frame.lineno))
+            if site is not None:
+                break
+        totals[site or 'other'] += stat.size
+    return totals
+
+
+def profile_cpu(optimizer: CookieClickerOptimizer, goal: float, policy: BeamPolicy, prof_path: str) -> dict:
+    profile = cProfile.Profile()
+    started = time.perf_counter()
+    with redirect_stdout(io.StringIO()):
+        profile.enable()
+        result = optimizer.bfs_optimize(goal, beam_policy=policy)
+        profile.disable()
+    wall_s = time.perf_counter() - started
+    profile.dump_stats(prof_path)
+    stats = pstats.Stats(profile).stats
+    calls = sum(nc for _cc, nc, _tt, _ct, _callers in stats.values())
+    total_tt = sum(tt for _cc, _nc, tt, _ct, _callers in stats.values()) or 1.0
+    (_file, _line, top_name), top = max(stats.items(), key=lambda kv: kv[1][2])
+    return {'result': result, 'wall_s': wall_s, 'calls': calls, 'top': top_name, 'top_share': top[2] / total_tt}
+
+
+def profile_memory(optimizer: CookieClickerOptimizer, goal: float, policy: BeamPolicy, base_path, every: int,
+                   frames: int) -> dict:
+    sites = allocation_sites()
+    ignore = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, '<frozen importlib._bootstrap*>')]
+    jsonl_path = base_path.with_name(base_path.stem + '.memory.jsonl')
+    peak = {'traced': 0, 'depth': 0, 'sites': dict.fromkeys(SITES, 0)}
+    snapshots = 0
+    started = time.perf_counter()
+
+    def on_depth(depth, states_expanded, frontier_size, visited_size):
+        nonlocal snapshots
+        if depth % every:
+            return
+        snapshot = tracemalloc.take_snapshot().filter_traces(ignore)
+        snapshot_path = base_path.with_name(f'{base_path.stem}.depth{depth:05d}.tracemalloc')
+        snapshot.dump(str(snapshot_path))
+        by_site = memory_by_site(snapshot, sites)
+        traced = sum(by_site.values())
+        if traced > peak['traced']:
+            peak.update(traced=traced, depth=depth, sites=by_site)
+        out.write(json.dumps({
+            'depth': depth,
+            'states_expanded': states_expanded,
+            'frontier_size': frontier_size,
+            'visited_size': visited_size,
+            'traced_bytes': traced,
+            'peak_bytes': tracemalloc.get_traced_memory()[1],
+            'by_site': by_site,
+            'snapshot': snapshot_path.name,
+        }) + '\n')
+        snapshots += 1
+
+    with open(jsonl_path, 'w', encoding='utf-8') as out:
+        tracemalloc.start(frames)
+        try:
+            with redirect_stdout(io.StringIO()):
+                result = optimizer.bfs_optimize(goal, beam_policy=policy, on_depth=on_depth)
+            peak_bytes = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return {'result': result, 'wall_s': time.perf_counter() - started, 'snapshots': snapshots,
+            'peak_bytes': peak_bytes, 'peak': peak, 'jsonl': jsonl_path}
+
+
+def main(argv: List[str]) -> int:
+    argv = [a for a in argv if a != '--profile']
+    if not argv or argv[0] in ('-h', '--help'):
+        print(__doc__)
+        return 2
+    mode = cli_option(argv, '--mode', 'both')
+    every = int(cli_option(argv, '--snapshot-every', 100))
+    frames = int(cli_option(argv, '--frames', 3))
+    policy = BeamPolicy(width=int(cli_option(argv, '--beam-width', 50)))
+    if mode not in ('both', 'cpu', 'memory') or len(argv) != 1 or every < 1:
+        print(__doc__)
+        return 2
+    goal = float(argv[0])
+
+    optimizer = CookieClickerOptimizer()
+    base_path = _new_export_path(goal, 'prof')
+    parts = [f"Profiled goal {goal:g}"]
+    result: Optional[tuple] = None
+    if mode in ('both', 'cpu'):
+        cpu = profile_cpu(optimizer, goal, policy, str(base_path))
+        result = cpu['result']
+        parts.append(f"search {cpu['wall_s']:.2f}s under cProfile, {cpu['calls']:,} calls, "
+                     f"top {cpu['top']} {cpu['top_share']:.0%} -> {base_path.name}")
+    if mode in ('both', 'memory'):
+        memory = profile_memory(optimizer, goal, policy, base_path, every, frames)
+        result = memory['result']
+        peak = memory['peak']
+        shares = ', '.join(f"{site} {peak['sites'][site] / (peak['traced'] or 1):.0%}" for site in SITES)
+        parts.append(f"peak {memory['peak_bytes'] / 2**20:.1f} MiB traced; largest snapshot at depth {peak['depth']} "
+                     f"({shares}); {memory['snapshots']} snapshots -> {memory['jsonl'].name}")
+    parts.insert(1, f"{result[1]}ms, {optimizer.last_search_stats['states_expanded']} states expanded"
+                 if result is not None else "no solution")
+    print('; '.join(parts))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
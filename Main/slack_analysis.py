@@ -0,0 +1,279 @@
+"""
+Purchase-timing slack: for every purchase of a path, how many milliseconds it can be delayed before the
+goal is reached any later.
+
+A delayed purchase keeps its place in the path order. Each later purchase happens at its own time, or as
+soon as it is affordable once the purchase before it is done. One forward pass caches the state right
+before every purchase, and each probe replays from the cached state of the delayed purchase. A replay
+stops at the first later purchase that is back on the original timetable. From there the run has the same
+buildings as the original and differs only by a cookie deficit. Whether the goal is still reached on time
+then depends only on that deficit, and the tolerated deficit per purchase is bracketed once, from the last
+purchase backwards. Purchases pushed past their time are paid in one pass with the buildings copied from
+the cached states, so a long delay does not cost a purchase_building call per purchase it passes.
+
+Usage:
+    python slack_analysis.py GOAL [--beam-width N] [--json]     # solve, then analyse the winning path
+    python slack_analysis.py FILE [--json]                      # bfs_data_exports JSON or verification page
+
+Columns: slack_ms is the largest delay that keeps the total time, binding the purchase (or the goal) whose
+cookie margin the first lost frame of production would eat into, and late_total_ms the total time with
+one more millisecond of delay.
+"""
+import bisect
+import io
+import json
+import math
+import sys
+import time
+from contextlib import redirect_stdout
+from typing import List, Optional, Tuple
+
+from main import BeamPolicy, CookieClickerOptimizer, GameState, cli_option
+
+# Deficits this close to a cached tolerance are replayed further instead of decided from it, so float
+# rounding in the subtraction cannot flip a result
+DEFICIT_EPSILON = 1e-6
+
+
+class SlackAnalyzer:
+    """
+    Slack of every purchase in a ('buy', building, time_ms) path for one goal.
+
+    tolerance[j] and intolerance[j] bracket the cookie deficit a run can carry into purchase j, on the
+    original timetable, while still reaching the goal at the original total time. They are found from the
+    last purchase backwards, so every replay stops at the next purchase that is back on the timetable.
+    """
+
+    def __init__(self, optimizer: CookieClickerOptimizer, path: List[Tuple[str, str, int]], goal: float,
+                 initial_state: Optional[GameState] = None):
+        self.optimizer = optimizer
+        self.goal = goal
+        self.buildings = [building for _, building, _ in path]
+        self.times = [time_ms for _, _, time_ms in path]
+        state = initial_state or optimizer.fresh_state()
+        # Forward pass: the state right before each purchase and that purchase's cost
+        self.before: List[GameState] = []
+        self.costs: List[float] = []
+        for index, (building, time_ms) in enumerate(zip(self.buildings, self.times)):
+            if time_ms > state.time_ms:
+                state = optimizer.advance_time(state, state.time_ms, time_ms)
+            cost = optimizer.get_building_cost(building, state.buildings.get(building, 0))
+            if state.cookies < cost:
+                raise ValueError(f"purchase {index} ({building} at {time_ms}ms) is not affordable: "
+                                 f"{state.cookies:.2f} < {cost}")
+            self.before.append(state)
+            self.costs.append(cost)
+            state = optimizer.purchase_building(state, building)
+        self.after_last = state
+        self.total_time_ms = state.time_ms if state.cookies_baked >= goal else self._goal_time(state)
+        at_goal = optimizer.advance_time(state, state.time_ms, self.total_time_ms) \
+            if self.total_time_ms > state.time_ms else state
+
+        # margin[j]: cookies the run can lose before purchase j with j and everything after it still bought
+        # on time; binding[j] is the purchase (or 'goal') that sets it
+        count = len(path)
+        self.margin = [0.0] * (count + 1)
+        self.binding: List[object] = ['goal'] * (count + 1)
+        self.margin[count] = at_goal.cookies_baked - goal
+        for j in range(count - 1, -1, -1):
+            left = self.before[j].cookies - self.costs[j]
+            if left < self.margin[j + 1]:
+                self.margin[j], self.binding[j] = left, j
+            else:
+                self.margin[j], self.binding[j] = self.margin[j + 1], self.binding[j + 1]
+
+        # Later purchases that slip can still leave the goal on time, so the tolerance reaches past the margin
+        self.tolerance = [0.0] * count
+        self.intolerance = [math.inf] * count
+        for j in range(count - 1, -1, -1):
+            self.tolerance[j], self.intolerance[j] = self._bracket_tolerance(j)
+
+    def _bracket_tolerance(self, j: int) -> Tuple[float, float]:
+        on_time = max(self.margin[j], 0.0)
+        late = max(2 * on_time, 1.0)
+        while self._on_time_with_deficit(j, late):
+            on_time, late = late, 2 * late
+        while late - on_time > DEFICIT_EPSILON * max(1.0, late):
+            middle = (on_time + late) / 2
+            if self._on_time_with_deficit(j, middle):
+                on_time = middle
+            else:
+                late = middle
+        return on_time, late
+
+    def _on_time_with_deficit(self, j: int, deficit: float) -> bool:
+        state = self.before[j].copy()
+        state.cookies -= deficit
+        state.cookies_baked -= deficit
+        return self._resume(state, j, exact=False, checked=j + 1) is not None
+
+    def _finish(self, state: GameState, exact: bool) -> Optional[int]:
+        """Time the goal is reached from state with no more purchases (None for a late run unless exact)."""
+        if state.time_ms <= self.total_time_ms:
+            if self.total_time_ms > state.time_ms:
+                state = self.optimizer.advance_time(state, state.time_ms, self.total_time_ms)
+            if state.cookies_baked >= self.goal:
+                return min(state.time_ms, self.total_time_ms)
+        return self._goal_time(state) if exact else None
+
+    def _goal_time(self, state: GameState) -> int:
+        return self.optimizer._kernels.next_event(
+            state.time_ms, state.cookies, state.cookies_baked, state.last_click_time_ms,
+            state.last_production_frame, state.cps, state.click_power, self.goal, math.inf)[0]
+
+    def _catch_up(self, state: GameState, j: int) -> Tuple[GameState, int]:
+        """
+        Buy purchases j.. that are due by state.time_ms, in order, while affordable. The buildings then match
+        the original run after the same purchases, so they are copied instead of recomputed per purchase.
+        """
+        due = bisect.bisect_right(self.times, state.time_ms)
+        cookies = state.cookies
+        end = j
+        while end < due and cookies >= self.costs[end]:
+            cookies -= self.costs[end]
+            end += 1
+        if end == j:
+            return state, j
+        reference = self.before[end] if end < len(self.before) else self.after_last
+        state = state.copy()
+        state.cookies = cookies
+        state.buildings = reference.buildings.copy()
+        state.cps = reference.cps
+        state.click_power = reference.click_power
+        return state, end
+
+    def _resume(self, state: GameState, start: int, exact: bool, checked: int = 0) -> Optional[int]:
+        """
+        Total time buying purchases start.. in order from state, each at its own time or as soon as affordable.
+        A late run returns None unless exact. Purchases from checked on may be decided from their tolerance.
+        """
+        optimizer = self.optimizer
+        j = start
+        while j < len(self.buildings):
+            time_ms = self.times[j]
+            if state.time_ms <= time_ms:
+                if time_ms > state.time_ms:
+                    state = optimizer.advance_time(state, state.time_ms, time_ms)
+                if j >= checked:
+                    # Same buildings as the original run at the same time: only the bank differs from here on
+                    deficit = self.before[j].cookies - state.cookies
+                    if deficit < self.tolerance[j] - DEFICIT_EPSILON:
+                        return self.total_time_ms
+                    if not exact and deficit > self.intolerance[j] + DEFICIT_EPSILON:
+                        return None
+            state, bought = self._catch_up(state, j)
+            if bought > j:
+                j = bought
+                continue
+            t = optimizer._kernels.next_event(
+                state.time_ms, state.cookies, state.cookies_baked, state.last_click_time_ms,
+                state.last_production_frame, state.cps, state.click_power, self.goal, self.costs[j])[0]
+            state = optimizer.advance_time(state, state.time_ms, t)
+            if state.cookies_baked >= self.goal:
+                # Reached while still waiting to buy
+                return state.time_ms if exact or state.time_ms <= self.total_time_ms else None
+        return self._finish(state, exact)
+
+    def delayed_total(self, index: int, delay_ms: int, exact: bool = True) -> Optional[int]:
+        """Total time with purchase index made delay_ms later; None for a late run unless exact."""
+        state = self.before[index]
+        if delay_ms > 0:
+            state = self.optimizer.advance_time(state, state.time_ms, state.time_ms + delay_ms)
+        return self._resume(state, index, exact, checked=index + 1)
+
+    def slack(self, index: int, max_delay_ms: Optional[int] = None) -> int:
+        """Largest delay (ms) of purchase index that keeps the total time, by doubling then bisection."""
+        cap = self.total_time_ms - self.times[index] if max_delay_ms is None else max_delay_ms
+        on_time = 0
+        delay = 1
+        while delay <= cap and self.delayed_total(index, delay, exact=False) is not None:
+            on_time = delay
+            delay *= 2
+        late = min(delay, cap + 1)
+        while late - on_time > 1:
+            middle = (on_time + late) // 2
+            if self.delayed_total(index, middle, exact=False) is not None:
+                on_time = middle
+            else:
+                late = middle
+        return on_time
+
+    def table(self, max_delay_ms: Optional[int] = None) -> List[dict]:
+        """One record per purchase: slack_ms, the binding constraint and the total with one more ms of delay."""
+        rows = []
+        for index, (building, time_ms) in enumerate(zip(self.buildings, self.times)):
+            slack_ms = self.slack(index, max_delay_ms)
+            binding = self.binding[index + 1]
+            rows.append({
+                'index': index,
+                'building': building,
+                'time_ms': time_ms,
+                'slack_ms': slack_ms,
+                'margin_cookies': self.margin[index + 1],
+                'binding': binding if binding == 'goal' else f"purchase {binding}",
+                'late_total_ms': self.delayed_total(index, slack_ms + 1),
+            })
+        return rows
+
+
+def load_path(filename: str) -> Tuple[list, float]:
+    """(unit purchase path, goal) from a bfs_data_exports JSON file or a verification page."""
+    from replay_verifier import load_case
+    path_json, goal, _total_time_ms, _predicted = load_case(filename)
+    path = []
+    for action in path_json:
+        if isinstance(action[0], (int, float)):
+            count, action_type, action_value, action_time = action[0], action[1], action[2], action[3]
+        else:
+            count, action_type, action_value, action_time = 1, action[0], action[1], action[2]
+        if action_type == 'buy':
+            path.extend([('buy', action_value, int(action_time))] * int(count))
+    return path, goal
+
+
+def main(argv: List[str]) -> int:
+    argv = list(argv)
+    if not argv or argv[0] in ('-h', '--help'):
+        print(__doc__)
+        return 2
+    beam_width = int(cli_option(argv, '--beam-width', 50))
+    as_json = '--json' in argv
+    if as_json:
+        argv.remove('--json')
+    if len(argv) != 1:
+        print(__doc__)
+        return 2
+
+    optimizer = CookieClickerOptimizer()
+    try:
+        goal = float(argv[0])
+    except ValueError:
+        path, goal = load_path(argv[0])
+    else:
+        with redirect_stdout(io.StringIO()):
+            result = optimizer.bfs_optimize(goal, beam_policy=BeamPolicy(width=beam_width))
+        if result is None:
+            print(f"No path reaches {goal:g}", file=sys.stderr)
+            return 1
+        path = result[0]
+
+    started = time.perf_counter()
+    analyzer = SlackAnalyzer(optimizer, path, goal)
+    rows = analyzer.table()
+    elapsed = time.perf_counter() - started
+    if as_json:
+        for row in rows:
+            print(json.dumps(row))
+    else:
+        print(f"{'#':>5} {'building':<20} {'time ms':>10} {'slack ms':>9} {'margin':>10} {'binding':<14} {'late total':>10}")
+        for row in rows:
+            print(f"{row['index']:>5} {row['building']:<20} {row['time_ms']:>10} {row['slack_ms']:>9} "
+                  f"{row['margin_cookies']:>10.3f} {row['binding']:<14} {row['late_total_ms']:>10}")
+    tight = sum(1 for row in rows if row['slack_ms'] == 0)
+    print(f"Goal {goal:g} at {analyzer.total_time_ms}ms: {len(rows)} purchases, {tight} with no slack; "
+          f"analysed in {elapsed:.2f}s", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,294 @@
+"""
+Monte Carlo evaluation of bfs_optimize paths under golden cookie randomness. The search assumes a fully
+deterministic game, while real runs see golden cookies spawn and grant Frenzy or Lucky. The paths the
+search nearly chose ("candidates", every path that reached the goal) are replayed over thousands of
+seeded random runs, vectorized with NumPy across runs and candidates. They are then ranked by their
+time-to-goal distribution.
+
+Each run buys a candidate's purchases in order, each as soon as it is affordable. Without golden cookies
+that reproduces the candidate's deterministic times, since the search only buys an option on the
+millisecond it first becomes affordable. Income is modelled as a continuous rate (clicks plus CpS), so
+times can differ from the exact simulator by a click or a frame. Golden cookies:
+- the spawn timer starts at 0 and restarts when a golden cookie is clicked. Past min_spawn_s, a spawn has
+  probability ((t - min) / (max - min)) ** 5 per frame, which is certain at max_spawn_s
+- each spawn is clicked reaction_ms later and grants Frenzy (CpS x7 for 77s) or Lucky
+  (+min(15% of the bank, 15 minutes of CpS) + 13)
+Run times are shifted by each candidate's deterministic time minus its golden-cookie-free model time, so
+a run without golden cookies reports the exact time. Every candidate sees the same random draws (common
+random numbers), so their differences are measured run by run rather than through independent noise.
+
+Usage:
+    python stochastic_eval.py GOAL [options]
+
+Options:
+    --candidates N     best deterministic candidates to evaluate (default 50)
+    --runs N           random runs per candidate (default 2000)
+    --seed S           random seed (default 0)
+    --rank KEY         mean, median or p90 (default mean)
+    --beam-width N     BeamPolicy width (default 50)
+    --reaction-ms T    golden cookie click delay (default 1000)
+    --json             one JSON record per candidate instead of the table
+
+Requires NumPy.
+"""
+import io
+import json
+import math
+import sys
+import time
+from contextlib import redirect_stdout
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # optional dependency: only this module needs it
+    np = None
+
+from main import BeamPolicy, CookieClickerOptimizer, SearchContext, cli_option, path_from_step
+
+RANK_KEYS = ('mean', 'median', 'p90')
+
+
+@dataclass(frozen=True)
+class GoldenCookieModel:
+    """Golden cookie rules for the evaluation (the game's base values, no upgrades)."""
+    min_spawn_s: float = 300.0  # Game.shimmerTypes.golden minTime: 5 minutes
+    max_spawn_s: float = 900.0  # maxTime: 15 minutes
+    reaction_ms: int = 1000  # from spawn to click
+    frenzy_chance: float = 0.5  # otherwise Lucky
+    frenzy_mult: float = 7.0
+    frenzy_s: float = 77.0
+    lucky_bank_frac: float = 0.15
+    lucky_cps_s: float = 900.0
+    lucky_flat: float = 13.0
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("stochastic_eval needs NumPy: pip install numpy")
+
+
+def candidate_paths(optimizer: CookieClickerOptimizer, goal: float, count: int = 50,
+                    beam_policy: Optional[BeamPolicy] = None) -> List[Tuple[list, int]]:
+    """
+    The count fastest distinct paths that reached the goal in a bfs_optimize run, as
+    (path, deterministic total_time_ms) sorted by time. The paths come from the states a SearchContext
+    parks at the goal, and the winner is always first.
+    """
+    context = SearchContext()
+    with redirect_stdout(io.StringIO()):
+        optimizer.bfs_optimize(goal, beam_policy=beam_policy, context=context)
+    finishes = {}
+    for _order, state, step, _visited in context.parked:
+        if state.cookies_baked >= goal:
+            total_time_ms = state.time_ms
+        else:
+            dt, _kind, *_ = optimizer._simulate_until_first_event(state, goal)
+            total_time_ms = state.time_ms + dt
+        path = tuple(path_from_step(step))
+        if total_time_ms < finishes.get(path, math.inf):
+            finishes[path] = total_time_ms
+    ranked = sorted(finishes.items(), key=lambda item: (item[1], len(item[0])))
+    return [(list(path), total_time_ms) for path, total_time_ms in ranked[:count]]
+
+
+def purchase_table(optimizer: CookieClickerOptimizer, path: list) -> Tuple[List[int], List[float]]:
+    """Unit purchase costs along path and the CpS after each purchase."""
+    state = optimizer.fresh_state()
+    costs, cps_after = [], []
+    for _action, building, _time_ms in path:
+        costs.append(optimizer.get_building_cost(building, state.buildings.get(building, 0)))
+        state = optimizer.purchase_building(state, building)
+        cps_after.append(state.cps)
+    return costs, cps_after
+
+
+def simulate_runs(optimizer: CookieClickerOptimizer, paths: List[list], goal: float, runs: int, seed: int = 0,
+                  model: Optional[GoldenCookieModel] = GoldenCookieModel()) -> 'np.ndarray':
+    """
+    Time to goal (ms) of every run: an array of shape (len(paths), runs). All candidates and runs
+    advance together, one event per run per iteration: the next purchase becoming affordable, the goal,
+    a golden cookie click or the end of a Frenzy. model=None turns golden cookies off.
+    """
+    _require_numpy()
+    tables = [purchase_table(optimizer, path) for path in paths]
+    width = max(len(costs) for costs, _ in tables) + 1
+    # Row c: candidate c's purchases, then an unreachable cost so runs past the last purchase only wait for the goal
+    costs = np.full((len(paths), width), np.inf)
+    cps_after = np.zeros((len(paths), width))
+    for c, (path_costs, path_cps) in enumerate(tables):
+        costs[c, :len(path_costs)] = path_costs
+        cps_after[c, :len(path_cps)] = path_cps
+
+    # One entry per (candidate, run), kept compact: finished runs are dropped from every array
+    total = len(paths) * runs
+    ids = np.arange(total)
+    cand = ids // runs
+    run = ids % runs
+    click_rate = 1.0 / optimizer.ruleset.click_interval_ms  # cookies per ms at click power 1
+    t = np.zeros(total)
+    bank = np.zeros(total)
+    baked = np.zeros(total)
+    cps = np.zeros(total)
+    bought = np.zeros(total, dtype=np.int64)
+    frenzy_end = np.zeros(total)
+    finish = np.full(total, np.nan)
+
+    if model is not None:
+        # Enough draws for twice the slowest candidate's golden-cookie-free finish; runs that use them all
+        # just see no more golden cookies
+        fps = optimizer.ruleset.fps
+        rng = np.random.default_rng(seed)
+        horizon_ms = 2 * np.nanmax(simulate_runs(optimizer, paths, goal, 1, model=None))
+        draws = int(horizon_ms // (model.min_spawn_s * 1000)) + 2
+        # Frames past min_spawn until the spawn: survival exp(-x**6 / (6 R**5)) for a window of R frames
+        window = (model.max_spawn_s - model.min_spawn_s) * fps
+        frames = np.minimum((6 * window ** 5 * rng.standard_exponential((runs, draws))) ** (1 / 6), window)
+        spawn_delay_ms = model.min_spawn_s * 1000 + frames * 1000 / fps + model.reaction_ms
+        frenzy = rng.random((runs, draws)) < model.frenzy_chance
+        frenzy_mult = model.frenzy_mult
+        clicked = np.zeros(total, dtype=np.int64)  # golden cookies clicked so far
+        golden_at = spawn_delay_ms[run, 0]
+    else:
+        frenzy_mult = 1.0
+        clicked = np.zeros(total, dtype=np.int64)
+        golden_at = np.full(total, np.inf)
+
+    while len(ids):
+        frenzied = t < frenzy_end
+        rate = click_rate + cps * np.where(frenzied, frenzy_mult, 1.0) / 1000
+        next_cost = costs[cand, bought]
+        to_goal = np.maximum(goal - baked, 0) / rate
+        to_buy = np.maximum(next_cost - bank, 0) / rate
+        to_golden = golden_at - t
+        to_calm = np.where(frenzied, frenzy_end - t, np.inf)
+        dt = np.minimum(np.minimum(to_goal, to_buy), np.minimum(to_golden, to_calm))
+        t += dt
+        bank += rate * dt
+        baked += rate * dt
+
+        # Ties go to the goal first, then the purchase
+        done = to_goal <= dt
+        buy = ~done & (to_buy <= dt)
+        bank[buy] -= next_cost[buy]
+        cps[buy] = cps_after[cand[buy], bought[buy]]
+        bought[buy] += 1
+
+        golden = ~done & ~buy & (to_golden <= dt)
+        if golden.any():
+            g = np.flatnonzero(golden)
+            is_frenzy = frenzy[run[g], clicked[g]]
+            frenzy_end[g[is_frenzy]] = t[g[is_frenzy]] + model.frenzy_s * 1000
+            lucky = g[~is_frenzy]
+            current_cps = cps[lucky] * np.where(t[lucky] < frenzy_end[lucky], frenzy_mult, 1.0)
+            prize = np.minimum(bank[lucky] * model.lucky_bank_frac, current_cps * model.lucky_cps_s) + model.lucky_flat
+            bank[lucky] += prize
+            baked[lucky] += prize
+            clicked[g] += 1
+            golden_at[g] = np.where(clicked[g] < draws,
+                                    t[g] + spawn_delay_ms[run[g], np.minimum(clicked[g], draws - 1)], np.inf)
+
+        if done.any():
+            finish[ids[done]] = t[done]
+            keep = ~done
+            ids, cand, run, t, bank, baked, cps, bought, frenzy_end, clicked, golden_at = (
+                a[keep] for a in (ids, cand, run, t, bank, baked, cps, bought, frenzy_end, clicked, golden_at))
+    return finish.reshape(len(paths), runs)
+
+
+def summarize(times: 'np.ndarray') -> dict:
+    """Distribution summary (ms) of one candidate's run times."""
+    return {
+        'mean': float(times.mean()),
+        'std': float(times.std()),
+        'min': float(times.min()),
+        'p10': float(np.percentile(times, 10)),
+        'median': float(np.median(times)),
+        'p90': float(np.percentile(times, 90)),
+        'max': float(times.max()),
+    }
+
+
+def evaluate_paths(optimizer: CookieClickerOptimizer, candidates: List[Tuple[list, int]], goal: float,
+                   runs: int = 2000, seed: int = 0, model: GoldenCookieModel = GoldenCookieModel(),
+                   rank: str = 'mean') -> List[dict]:
+    """
+    Simulate every (path, deterministic time) candidate and return one record per candidate, best
+    first by the rank statistic. win_rate is the share of runs in which the candidate is fastest
+    (ties shared).
+    """
+    if rank not in RANK_KEYS:
+        raise ValueError(f"rank must be one of {', '.join(RANK_KEYS)}, got {rank!r}")
+    paths = [path for path, _ in candidates]
+    times = simulate_runs(optimizer, paths, goal, runs, seed, model)
+    # Move each candidate onto the exact simulator's scale: without golden cookies a run then takes
+    # exactly the deterministic time, and the continuous-income error cancels out of the ranking
+    baseline = simulate_runs(optimizer, paths, goal, 1, model=None)[:, 0]
+    times += (np.array([deterministic_ms for _, deterministic_ms in candidates]) - baseline)[:, None]
+    fastest = times == times.min(axis=0)
+    wins = (fastest / fastest.sum(axis=0)).sum(axis=1) / runs
+    records = []
+    for c, (path, deterministic_ms) in enumerate(candidates):
+        records.append({
+            'candidate': c,
+            'deterministic_ms': deterministic_ms,
+            'model_ms': float(baseline[c]),
+            'purchases': len(path),
+            'win_rate': float(wins[c]),
+            **summarize(times[c]),
+            'path': path,
+        })
+    records.sort(key=lambda record: (record[rank], record['candidate']))
+    return records
+
+
+def main(argv: List[str]) -> int:
+    argv = list(argv)
+    if not argv or argv[0] in ('-h', '--help'):
+        print(__doc__)
+        return 2
+    if np is None:
+        print("stochastic_eval needs NumPy: pip install numpy", file=sys.stderr)
+        return 2
+    count = int(cli_option(argv, '--candidates', 50))
+    runs = int(cli_option(argv, '--runs', 2000))
+    seed = int(cli_option(argv, '--seed', 0))
+    rank = cli_option(argv, '--rank', 'mean')
+    policy = BeamPolicy(width=int(cli_option(argv, '--beam-width', 50)))
+    model = GoldenCookieModel(reaction_ms=int(cli_option(argv, '--reaction-ms', 1000)))
+    as_json = '--json' in argv
+    if as_json:
+        argv.remove('--json')
+    if len(argv) != 1 or rank not in RANK_KEYS or count < 1 or runs < 1:
+        print(__doc__)
+        return 2
+    goal = float(argv[0])
+
+    optimizer = CookieClickerOptimizer()
+    started = time.perf_counter()
+    candidates = candidate_paths(optimizer, goal, count, policy)
+    searched = time.perf_counter()
+    if not candidates:
+        print(f"No path reaches {goal:g}", file=sys.stderr)
+        return 1
+    records = evaluate_paths(optimizer, candidates, goal, runs, seed, model, rank)
+    evaluated = time.perf_counter()
+
+    if as_json:
+        for record in records:
+            print(json.dumps(record))
+    else:
+        print(f"{'cand':>4} {'determ ms':>10} {'mean ms':>10} {'median':>10} {'p10':>10} {'p90':>10} "
+              f"{'std':>8} {'wins':>6} {'buys':>5}")
+        for record in records:
+            print(f"{record['candidate']:>4} {record['deterministic_ms']:>10} {record['mean']:>10.0f} "
+                  f"{record['median']:>10.0f} {record['p10']:>10.0f} {record['p90']:>10.0f} {record['std']:>8.0f} "
+                  f"{record['win_rate']:>6.1%} {record['purchases']:>5}")
+    print(f"Goal {goal:g}: {len(candidates)} candidates x {runs} runs (seed {seed}); search {searched - started:.2f}s, "
+          f"evaluation {evaluated - searched:.2f}s", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
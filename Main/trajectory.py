@@ -0,0 +1,254 @@
+"""
+Cookies, cookies baked, CpS and click power along a path, sampled at a fixed resolution, for plotting.
+
+Between two purchases production and click power are fixed, so the state at any millisecond follows from
+the state after the earlier purchase by counting the clicks and frame entries in between: clicks land on
+every click interval from 0ms, and frame F is entered on the first millisecond t with
+floor(t / ms_per_frame) >= F. Each segment is anchored once per purchase and every sample is computed
+in closed form with NumPy, so an hour-long path is sampled without stepping through its milliseconds.
+A sample at time t is the state after every click, frame and purchase at t. Totals are products rather
+than running sums, so they can differ from advance_time in the last bits.
+
+Usage:
+    python trajectory.py GOAL [options]        # solve, then sample the winning path
+    python trajectory.py FILE [options]        # bfs_data_exports JSON or verification page
+
+Options:
+    --resolution R     frame, 100ms, 1s or a number of milliseconds (default 1s)
+    --beam-width N     BeamPolicy width when solving (default 50)
+    --csv OUT          write the samples as CSV
+    --npz OUT          write the samples as a compressed NumPy archive
+    --check            also step through every sample with advance_time and fail on a difference above
+                       1e-9 of cookies baked
+
+Requires NumPy.
+"""
+import io
+import math
+import sys
+import time
+from contextlib import redirect_stdout
+from dataclasses import dataclass
+from typing import List, Optional, Union
+
+try:
+    import numpy as np
+except ImportError:  # optional dependency: only this module needs it
+    np = None
+
+from main import BeamPolicy, CookieClickerOptimizer, GameState, cli_option
+
+RESOLUTIONS = {'frame': None, '100ms': 100, '1s': 1000}  # None samples on every frame entry
+COLUMNS = ('time_ms', 'cookies', 'cookies_baked', 'cps', 'click_power')
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("trajectory needs NumPy: pip install numpy")
+
+
+@dataclass
+class Trajectory:
+    """Samples of a path, one array entry per sample time."""
+    time_ms: 'np.ndarray'
+    cookies: 'np.ndarray'
+    cookies_baked: 'np.ndarray'
+    cps: 'np.ndarray'
+    click_power: 'np.ndarray'
+
+    def __len__(self) -> int:
+        return len(self.time_ms)
+
+    def to_csv(self, filename: str):
+        np.savetxt(filename, np.column_stack([getattr(self, name) for name in COLUMNS]), delimiter=',',
+                   header=','.join(COLUMNS), comments='', fmt=['%d', '%.17g', '%.17g', '%.17g', '%.17g'])
+
+    def save(self, filename: str):
+        """Compressed .npz with one array per column (load with Trajectory.load)."""
+        np.savez_compressed(filename, **{name: getattr(self, name) for name in COLUMNS})
+
+    @classmethod
+    def load(cls, filename: str) -> 'Trajectory':
+        _require_numpy()
+        with np.load(filename) as data:
+            return cls(**{name: data[name] for name in COLUMNS})
+
+
+def sample_times(optimizer: CookieClickerOptimizer, start_ms: int, end_ms: int,
+                 resolution: Union[str, int] = '1s') -> 'np.ndarray':
+    """
+    Sample times from start_ms to end_ms inclusive: every frame entry ('frame'), or every resolution
+    milliseconds ('100ms', '1s' or an int) on multiples of it, with start_ms and end_ms always included.
+    """
+    _require_numpy()
+    step = RESOLUTIONS[resolution] if isinstance(resolution, str) else int(resolution)
+    if step is None:
+        ms_per_frame = optimizer.ms_per_frame
+        frames = np.arange(optimizer.ruleset.frame_at(start_ms) + 1, optimizer.ruleset.frame_at(end_ms) + 1)
+        # First millisecond of each frame, as Ruleset.compile tabulates it: ceil(F * ms_per_frame), moved by
+        # the one millisecond float division can put it off
+        times = np.ceil(frames * ms_per_frame).astype(np.int64)
+        times -= (times > 0) & (np.floor((times - 1) / ms_per_frame) >= frames)
+        times += np.floor(times / ms_per_frame) < frames
+    elif step <= 0:
+        raise ValueError(f"resolution must be positive, got {resolution!r}")
+    else:
+        times = np.arange((start_ms // step + 1) * step, end_ms + 1, step, dtype=np.int64)
+    times = np.concatenate(([start_ms], times[times > start_ms]))
+    if times[-1] != end_ms:
+        times = np.append(times, end_ms)
+    return times
+
+
+def trajectory(optimizer: CookieClickerOptimizer, path: list, times: 'np.ndarray',
+               initial_state: Optional[GameState] = None) -> Trajectory:
+    """
+    The state of a ('buy', building, time_ms) path at each of times (sorted, not before the start).
+    Each purchase is anchored with one closed-form advance and a purchase_building call; the samples are
+    then filled segment by segment in a few array operations.
+    """
+    _require_numpy()
+    interval = optimizer.ruleset.click_interval_ms
+    ms_per_frame = optimizer.ms_per_frame
+    fps = optimizer.fps
+    frame_at = optimizer.ruleset.frame_at
+    state = initial_state.copy() if initial_state is not None else optimizer.fresh_state()
+
+    # Per segment: the state after its opening purchase (or the start), whether the click on that
+    # millisecond is still due, and the last frame already produced (frames after it produce on entry, and
+    # one left behind is caught up on the next millisecond, as advance_time does)
+    anchors = []
+    for index in range(len(path) + 1):
+        pending = 1 if state.time_ms % interval == 0 and state.last_click_time_ms != state.time_ms \
+            and state.time_ms >= 0 else 0
+        base_frame = max(state.last_production_frame, math.floor((state.time_ms + 1) / ms_per_frame) - 1)
+        anchors.append((state.time_ms, state.cookies, state.cookies_baked, state.cps, state.click_power,
+                        pending, base_frame))
+        if index == len(path):
+            break
+        _action, building, at_ms = path[index]
+        if at_ms < state.time_ms:
+            raise ValueError(f"purchase {index} ({building}) at {at_ms}ms is before {state.time_ms}ms")
+        clicks = pending + at_ms // interval - state.time_ms // interval
+        frames = max(frame_at(at_ms) - base_frame, 0) if state.cps > 0 and at_ms > state.time_ms else 0
+        gained = clicks * state.click_power + frames * (state.cps / fps)
+        state.cookies += gained
+        state.cookies_baked += gained
+        if clicks:
+            state.last_click_time_ms = at_ms // interval * interval
+        if frames:
+            state.last_production_frame = base_frame + frames
+        state.time_ms = at_ms
+        state = optimizer.purchase_building(state, building)
+
+    times = np.asarray(times, dtype=np.int64)
+    start, cookies, baked, cps, click_power, pending, base_frame = (np.array(column) for column in zip(*anchors))
+    if len(times) and times[0] < start[0]:
+        raise ValueError(f"sample at {times[0]}ms is before the start at {start[0]}ms")
+    segment = np.searchsorted(start, times, side='right') - 1
+    a = start[segment]
+    clicks = pending[segment] + times // interval - a // interval
+    frames = np.where((times > a) & (cps[segment] > 0),
+                      np.maximum(np.floor(times / ms_per_frame).astype(np.int64) - base_frame[segment], 0), 0)
+    gained = clicks * click_power[segment] + frames * (cps[segment] / fps)
+    return Trajectory(time_ms=times, cookies=cookies[segment] + gained, cookies_baked=baked[segment] + gained,
+                      cps=cps[segment].astype(float), click_power=click_power[segment].astype(float))
+
+
+def sample_path(optimizer: CookieClickerOptimizer, path: list, end_ms: Optional[int] = None,
+                resolution: Union[str, int] = '1s', initial_state: Optional[GameState] = None) -> Trajectory:
+    """trajectory() at sample_times() from the start to end_ms (default: the last purchase)."""
+    start_ms = initial_state.time_ms if initial_state is not None else 0
+    if end_ms is None:
+        end_ms = path[-1][2] if path else start_ms
+    return trajectory(optimizer, path, sample_times(optimizer, start_ms, end_ms, resolution), initial_state)
+
+
+def stepped_trajectory(optimizer: CookieClickerOptimizer, path: list, times: 'np.ndarray',
+                       initial_state: Optional[GameState] = None) -> Trajectory:
+    """The same samples stepped with advance_time and purchase_building, to check trajectory() against."""
+    _require_numpy()
+    state = initial_state.copy() if initial_state is not None else optimizer.fresh_state()
+    rows = []
+    index = 0
+    for t in times.tolist():
+        while index < len(path) and path[index][2] <= t:
+            state = optimizer.purchase_building(optimizer.advance_time(state, state.time_ms, path[index][2]),
+                                                path[index][1])
+            index += 1
+        state = optimizer.advance_time(state, state.time_ms, t)
+        rows.append((t, state.cookies, state.cookies_baked, state.cps, state.click_power))
+    columns = np.array(rows, dtype=float).reshape(-1, len(COLUMNS)).T
+    return Trajectory(columns[0].astype(np.int64), *columns[1:])
+
+
+def max_difference(samples: Trajectory, reference: Trajectory) -> float:
+    """
+    Largest difference between two trajectories at the same times, relative to cookies baked (the bank
+    inherits the rounding of every cookie it was paid from, however little of it is left).
+    """
+    scale = np.maximum(np.abs(reference.cookies_baked), 1.0)
+    return max(float(np.max(np.abs(getattr(samples, name) - getattr(reference, name))
+                            / np.maximum(scale, np.abs(getattr(reference, name)))))
+               for name in COLUMNS[1:])
+
+
+def main(argv: List[str]) -> int:
+    argv = list(argv)
+    if not argv or argv[0] in ('-h', '--help'):
+        print(__doc__)
+        return 2
+    if np is None:
+        print("trajectory needs NumPy: pip install numpy", file=sys.stderr)
+        return 2
+    resolution = cli_option(argv, '--resolution', '1s')
+    if resolution not in RESOLUTIONS:
+        resolution = int(resolution)
+    beam_width = int(cli_option(argv, '--beam-width', 50))
+    csv_out = cli_option(argv, '--csv')
+    npz_out = cli_option(argv, '--npz')
+    check = '--check' in argv
+    if check:
+        argv.remove('--check')
+    if len(argv) != 1:
+        print(__doc__)
+        return 2
+
+    optimizer = CookieClickerOptimizer()
+    try:
+        goal = float(argv[0])
+    except ValueError:
+        from slack_analysis import load_path
+        path, goal = load_path(argv[0])
+        end_ms = None
+    else:
+        with redirect_stdout(io.StringIO()):
+            result = optimizer.bfs_optimize(goal, beam_policy=BeamPolicy(width=beam_width))
+        if result is None:
+            print(f"No path reaches {goal:g}", file=sys.stderr)
+            return 1
+        path, end_ms = result
+
+    started = time.perf_counter()
+    samples = sample_path(optimizer, path, end_ms, resolution)
+    elapsed = time.perf_counter() - started
+    if csv_out:
+        samples.to_csv(csv_out)
+    if npz_out:
+        samples.save(npz_out)
+    if not csv_out and not npz_out:
+        print(f"{'time ms':>10} {'cookies':>14} {'baked':>14} {'cps':>12} {'click':>8}")
+        for row in zip(*(getattr(samples, name).tolist() for name in COLUMNS)):
+            print(f"{row[0]:>10} {row[1]:>14.1f} {row[2]:>14.1f} {row[3]:>12.1f} {row[4]:>8.1f}")
+    print(f"Goal {goal:g}: {len(path)} purchases, {len(samples)} samples at {resolution} resolution "
+          f"in {elapsed * 1000:.1f}ms", file=sys.stderr)
+    if check:
+        worst = max_difference(samples, stepped_trajectory(optimizer, path, samples.time_ms))
+        print(f"Largest difference from advance_time (relative to cookies baked): {worst:.3g}", file=sys.stderr)
+        if worst > 1e-9:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))